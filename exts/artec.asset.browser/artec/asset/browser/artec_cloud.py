@@ -8,24 +8,37 @@
 #
 # Forked from SketchFabAssetProvider for asset store
 
-from dataclasses import dataclass
-from enum import Enum
+import asyncio
+from contextlib import contextmanager
+from functools import partial
+import itertools
+import math
+import os
+import threading
 from pathlib import Path
-from typing import Callable, Optional, Tuple, Dict, List
+from typing import Callable, Optional, Tuple, Dict, List, Union
 import tempfile
-from time import time
-import zipfile
 
 import aiohttp
-import aiofiles
 import carb
 import carb.settings
+import carb.tokens
 import omni.client
-import omni.kit.asset_converter as converter
-from urllib.parse import urlparse, urlencode
+from urllib.parse import urlparse, urlencode, parse_qsl, urlunparse
 
 from artec.services.browser.asset import BaseAssetStore, AssetModel, SearchCriteria, ProviderModel
+from artec.services.browser.asset import download_file, extract_zip, TransferError
 from .models.asset_fusion import AssetFusion
+from .conversion_poller import ConversionPoller, ConversionResult, ConversionTaskStatus
+from .conversion_scheduler import ConversionBackend, ConversionScheduler
+from .preconverter import Preconverter
+from .thumbnail_cache import ThumbnailCache
+from .search_cache import SearchRefresh, SearchResultCache, strip_url_queries
+from .project_mirror import CloudProjectMirror
+from .cloud_policy import CloudRequestPolicy
+from .download_history import DownloadHistory, DownloadPhase, DownloadRecord, DownloadStatus
+from .usdz_writer import UsdzWriter
+from .converted_cache import ConvertedAssetCache
 
 SETTING_ROOT = "/exts/artec.asset.browser/"
 SETTING_STORE_ENABLE = SETTING_ROOT + "enable"
@@ -34,19 +47,6 @@ CURRENT_PATH = Path(__file__).parent
 DATA_PATH = CURRENT_PATH.parent.parent.parent.joinpath("data")
 
 
-class ConversionTaskStatus(Enum):
-    ENQUEUED = 1
-    IN_PROGRESS = 2
-    PROCESSED = 3
-    FAILED = -1
-
-
-@dataclass
-class ConversionResult:
-    status: ConversionTaskStatus
-    download_url: str
-
-
 class ArtecCloudAssetProvider(BaseAssetStore):
     def __init__(self) -> None:
         settings = carb.settings.get_settings()
@@ -54,10 +54,84 @@ class ArtecCloudAssetProvider(BaseAssetStore):
         super().__init__(store_id=self._provider_id)
 
         self._max_count_per_page = settings.get_as_int(SETTING_ROOT + "maxCountPerPage")
+        self._max_concurrent_page_requests = settings.get_as_int(SETTING_ROOT + "maxConcurrentPageRequests")
+        self._max_concurrent_downloads = settings.get_as_int(SETTING_ROOT + "maxConcurrentDownloads")
+        self._download_connections = settings.get_as_int(SETTING_ROOT + "downloadConnections")
+        self._download_segment_size = settings.get_as_int(SETTING_ROOT + "downloadSegmentSizeMb") * 1024 * 1024
+        self._download_history = DownloadHistory(settings.get_as_int(SETTING_ROOT + "downloadHistorySize"))
         self._search_url = settings.get_as_string(SETTING_ROOT + "cloudSearchUrl")
         self._auth_token = None
         self._authorize_url = settings.get_as_string(SETTING_ROOT + "authorizeUrl")
+        # Every call to the cloud goes through the same policy, so concurrent searches and downloads share its budget
+        self._request_policy = CloudRequestPolicy(
+            rate=settings.get_as_float(SETTING_ROOT + "cloudRequestRate"),
+            burst=settings.get_as_int(SETTING_ROOT + "cloudRequestBurst"),
+            max_concurrency=settings.get_as_int(SETTING_ROOT + "cloudMaxConcurrentRequests"),
+            max_retries=settings.get_as_int(SETTING_ROOT + "cloudRequestRetries"),
+            failure_threshold=settings.get_as_int(SETTING_ROOT + "cloudCircuitFailureThreshold"),
+            reset_timeout=settings.get_as_float(SETTING_ROOT + "cloudCircuitResetTimeout"),
+            timeout=settings.get_as_float(SETTING_ROOT + "cloudRequestTimeout"),
+        )
         self._auth_params: Dict = {}
+        self._username = ""
+        self._search_cache = SearchResultCache(
+            carb.tokens.get_tokens_interface().resolve(settings.get_as_string(SETTING_ROOT + "searchCachePath")),
+            max_entries=settings.get_as_int(SETTING_ROOT + "searchCacheMaxEntries"),
+        )
+        self._search_refreshes: Dict[str, asyncio.Future] = {}
+        # Fusion id => check of the snapshot group of a conversion placed from the cache
+        self._snapshot_checks: Dict[str, asyncio.Future] = {}
+        self._search_refresh_subscribers: Dict[int, Callable[[SearchRefresh], None]] = {}
+        self._search_refresh_subscriber_ids = itertools.count()
+        self._project_mirror_enabled = settings.get_as_bool(SETTING_ROOT + "projectMirror")
+        self._project_mirror = CloudProjectMirror(
+            carb.tokens.get_tokens_interface().resolve(settings.get_as_string(SETTING_ROOT + "projectMirrorPath")),
+            self._fetch_mirror_page,
+            self._fetch_mirror_all,
+            self._fetch_mirror_project,
+            sync_interval=settings.get_as_float(SETTING_ROOT + "projectMirrorSyncInterval"),
+            full_sync_interval=settings.get_as_float(SETTING_ROOT + "projectMirrorFullSyncInterval"),
+            url_max_age=settings.get_as_float(SETTING_ROOT + "projectMirrorUrlMaxAge"),
+            page_size=self._max_count_per_page,
+        )
+        self._mirror_sync_future: Optional[asyncio.Future] = None
+        # Searches answered from the mirror since its last synchronization: key => (params, results)
+        self._mirror_served_searches: Dict[str, Tuple[Dict, List[Dict]]] = {}
+        self._converted_cache = ConvertedAssetCache(
+            carb.tokens.get_tokens_interface().resolve(settings.get_as_string(SETTING_ROOT + "convertedCachePath")),
+            settings.get_as_int(SETTING_ROOT + "convertedCacheSizeMb") * 1024 * 1024,
+        )
+        self._thumbnail_cache = ThumbnailCache(
+            carb.tokens.get_tokens_interface().resolve(settings.get_as_string(SETTING_ROOT + "thumbnailCachePath")),
+            settings.get_as_int(SETTING_ROOT + "thumbnailCacheSizeMb") * 1024 * 1024,
+            self._request_policy,
+        )
+        self._conversion_poller = ConversionPoller(
+            self._check_status,
+            min_interval=settings.get_as_float(SETTING_ROOT + "conversionPollMinInterval"),
+            max_interval=settings.get_as_float(SETTING_ROOT + "conversionPollMaxInterval"),
+        )
+        self._preconverter = Preconverter(
+            self._request_model,
+            self._conversion_poller,
+            max_tracked=settings.get_as_int(SETTING_ROOT + "preconvertMaxTracked"),
+            max_requests=settings.get_as_int(SETTING_ROOT + "preconvertMaxRequests"),
+        )
+        self._conversion_scheduler = ConversionScheduler(
+            max_workers=settings.get_as_int(SETTING_ROOT + "conversionWorkers") or self._max_concurrent_downloads,
+            backend=self._get_conversion_backend(settings.get_as_string(SETTING_ROOT + "conversionBackend")),
+            kit_path=carb.tokens.get_tokens_interface().resolve(
+                settings.get_as_string(SETTING_ROOT + "conversionKitPath") or ""
+            ),
+        )
+
+    @staticmethod
+    def _get_conversion_backend(name: str) -> ConversionBackend:
+        try:
+            return ConversionBackend(name)
+        except ValueError:
+            carb.log_warn(f"Unknown conversion backend '{name}', converting in process")
+            return ConversionBackend.IN_PROCESS
 
     def provider(self) -> ProviderModel:
         return ProviderModel(
@@ -70,13 +144,16 @@ class ArtecCloudAssetProvider(BaseAssetStore):
     async def authenticate(self, username: str, password: str):
         params = {"user[email]": username, "user[password]": password}
         async with aiohttp.ClientSession() as session:
-            async with session.post(self._authorize_url, params=params) as response:
-                self._auth_params = await response.json()
-                self._auth_token = self._auth_params.get("auth_token")
+            # Not idempotent, never retried
+            (_, body) = await self._request_policy.request_json(session, "POST", self._authorize_url, params=params)
+        self._auth_params = body if isinstance(body, dict) else {}
+        self._auth_token = self._auth_params.get("auth_token")
+        # Cached searches and mirrored projects belong to the user who ran them
+        self._username = username
+        if self._auth_token:
+            self._project_mirror.set_user(username)
 
     async def _search(self, search_criteria: SearchCriteria) -> Tuple[List[AssetModel], bool]:
-        assets: List[AssetModel] = []
-
         params = {
             "auth_token": self._auth_token,
             "sort_field": "",
@@ -98,31 +175,256 @@ class ArtecCloudAssetProvider(BaseAssetStore):
             if category:
                 params["slug"] = category
 
-        to_continue = True
-        while to_continue:
-            params["page"] += 1
-            (page_assets, to_continue) = await self._search_one_page(params)
+        if not self.authorized():
+            return ([], False)
 
-            if page_assets:
-                assets.extend(page_assets)
-                if not to_continue:
-                    break
-            else:
-                break
+        key = self._get_search_key(params["slug"], params["term"], (params["sort_field"], params["sort_direction"]))
+        if self._project_mirror_enabled:
+            if self._project_mirror.ready:
+                # Answered locally, the next synchronization refreshes these results and their expired urls
+                results = self._query_mirror(params)
+                self._mirror_served_searches[key] = (params, results)
+                if self._project_mirror.sync_due or self._project_mirror.urls_expired(results):
+                    self._schedule_mirror_sync()
+                return ([self._load_cached_asset(result) for result in results], False)
+            # First synchronization runs in the background, this search goes to the cloud meanwhile
+            self._schedule_mirror_sync()
+
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            # Stale while revalidate: answer at once, subscribers get the difference once refreshed
+            (cached_results, _) = cached
+            if key not in self._search_refreshes:
+                self._search_refreshes[key] = asyncio.ensure_future(
+                    self._refresh_search(key, params, cached_results)
+                )
+            return ([self._load_cached_asset(result) for result in cached_results], False)
+
+        # Pages are shown as they come, the complete listing follows as the result
+        (assets, more) = await self._search_all_pages(
+            params, on_page_fn=lambda page_assets: self._publish_search_page(params, page_assets)
+        )
+        await self._store_search(key, assets)
+        return (assets, more)
+
+    def subscribe_search_refresh(self, on_refresh_fn: Callable[[SearchRefresh], None]) -> int:
+        """
+        Subscribe to background refreshes of cached searches and to the pages of searches still running.
+        Args:
+            on_refresh_fn (Callable): Called with a SearchRefresh when refreshed results differ from cached ones,
+                and with the assets of each page as added ones while a search fetches its next pages.
+        Return:
+            Subscription id, to be passed to unsubscribe_search_refresh.
+        """
+        subscription_id = next(self._search_refresh_subscriber_ids)
+        self._search_refresh_subscribers[subscription_id] = on_refresh_fn
+        return subscription_id
+
+    def unsubscribe_search_refresh(self, subscription_id: int) -> None:
+        self._search_refresh_subscribers.pop(subscription_id, None)
+
+    def _get_search_key(self, category: str, term: str, sort: Tuple[str, str]) -> str:
+        return self._search_cache.get_key(self._username, category, term, list(sort))
+
+    async def _refresh_search(self, key: str, params: Dict, cached_results: List[Dict]) -> None:
+        try:
+            (assets, _) = await self._search_all_pages(params)
+        except Exception as e:
+            carb.log_warn(f"Failed to refresh cached cloud search: {e}")
+            return
+        finally:
+            self._search_refreshes.pop(key, None)
+
+        await self._store_search(key, assets)
+        self._publish_search_refresh(params, cached_results, assets)
+
+    def _publish_search_refresh(self, params: Dict, cached_results: List[Dict], assets: List[AssetModel]) -> None:
+        refresh = SearchRefresh(params["slug"], params["term"], (params["sort_field"], params["sort_direction"]))
+        cached_by_id = {result["identifier"]: result for result in cached_results}
+        fresh_ids = set()
+        for asset in assets:
+            fresh_ids.add(asset.identifier)
+            cached_result = cached_by_id.get(asset.identifier)
+            if cached_result is None:
+                refresh.added.append(asset)
+                continue
+            fresh_result = self._to_cached_asset(asset)
+            if strip_url_queries(cached_result) != strip_url_queries(fresh_result):
+                refresh.changed.append(asset)
+            elif cached_result != fresh_result:
+                # Shown items must not keep expired presigned urls, patched without rebuilding the grid
+                refresh.resigned.append(asset)
+        refresh.removed = [
+            self._load_cached_asset(result) for result in cached_results if result["identifier"] not in fresh_ids
+        ]
+        if refresh.empty:
+            return
+
+        carb.log_info(
+            f"Cloud search refreshed: {len(refresh.added)} added, {len(refresh.changed)} changed, "
+            f"{len(refresh.removed)} removed, {len(refresh.resigned)} re-signed"
+        )
+        self._notify_search_refresh(refresh)
 
-        return (assets, to_continue)
+    def _publish_search_page(self, params: Dict, assets: List[AssetModel]) -> None:
+        """Add a page of a search to the listed results while the next pages are fetched"""
+        refresh = SearchRefresh(
+            params["slug"], params["term"], (params["sort_field"], params["sort_direction"]), added=list(assets)
+        )
+        self._notify_search_refresh(refresh)
 
-    async def _search_one_page(self, params: Dict) -> Tuple[List[AssetModel], bool]:
+    def _notify_search_refresh(self, refresh: SearchRefresh) -> None:
+        for on_refresh_fn in list(self._search_refresh_subscribers.values()):
+            try:
+                on_refresh_fn(refresh)
+            except Exception as e:
+                carb.log_error(f"Failed to apply cloud search refresh: {e}")
+
+    def _schedule_mirror_sync(self) -> None:
+        if self._mirror_sync_future is None:
+            self._mirror_sync_future = asyncio.ensure_future(self._sync_mirror())
+
+    async def _sync_mirror(self) -> None:
+        try:
+            if not self._project_mirror.ready or self._project_mirror.sync_due:
+                await self._project_mirror.sync()
+            # Only the urls of projects shown are signed again
+            await self._project_mirror.resign(
+                result["identifier"] for (_, results) in self._mirror_served_searches.values() for result in results
+            )
+        except Exception as e:
+            carb.log_warn(f"Failed to synchronize cloud projects, searching the local mirror: {e}")
+            # Served searches are refreshed by the next synchronization
+            return
+        finally:
+            self._mirror_sync_future = None
+
+        served_searches = self._mirror_served_searches
+        self._mirror_served_searches = {}
+        for (params, results) in served_searches.values():
+            # Nothing is published when neither projects nor their urls changed
+            fresh_results = self._query_mirror(params)
+            self._publish_search_refresh(params, results, [self._load_cached_asset(result) for result in fresh_results])
+
+    def _query_mirror(self, params: Dict) -> List[Dict]:
+        return self._project_mirror.query(
+            params["slug"], params["term"], (params["sort_field"], params["sort_direction"])
+        )
+
+    async def _fetch_mirror_page(self, page: int, sort: Tuple[str, str]) -> Tuple[List[Dict], Dict]:
+        if not self.authorized():
+            raise RuntimeError("Not authorized")
+        params = self._get_listing_params(sort)
+        params["page"] = page
+        async with aiohttp.ClientSession() as session:
+            (assets, meta) = await self._fetch_page(session, params)
+        return ([self._to_cached_asset(asset) for asset in assets], meta)
+
+    async def _fetch_mirror_all(self, sort: Tuple[str, str]) -> List[Dict]:
+        if not self.authorized():
+            raise RuntimeError("Not authorized")
+        (assets, _) = await self._search_all_pages(self._get_listing_params(sort))
+        return [self._to_cached_asset(asset) for asset in assets]
+
+    async def _fetch_mirror_project(self, slug: str) -> Optional[Dict]:
+        if not self.authorized():
+            raise RuntimeError("Not authorized")
+        params = self._get_listing_params(("", ""))
+        params["slug"] = slug
+        params["page"] = 1
+        async with aiohttp.ClientSession() as session:
+            (assets, _) = await self._fetch_page(session, params)
+        for asset in assets:
+            if asset.product_url.rstrip("/").split("/")[-1] == slug:
+                return self._to_cached_asset(asset)
+        return None
+
+    def _get_listing_params(self, sort: Tuple[str, str]) -> Dict:
+        return {
+            "auth_token": self._auth_token,
+            "sort_field": sort[0],
+            "sort_direction": sort[1],
+            "term": "",
+            "slug": "",
+            "per_page": self._max_count_per_page,
+            "page": 0,
+        }
+
+    async def _store_search(self, key: str, assets: List[AssetModel]) -> None:
+        self._search_cache.put(key, [self._to_cached_asset(asset) for asset in assets])
+        await asyncio.get_event_loop().run_in_executor(None, self._search_cache.save)
+
+    def _to_cached_asset(self, asset: AssetModel) -> Dict:
+        result = asset.dict()
+        # Never persist the auth token
+        result["thumbnail"] = self._url_without_token(result["thumbnail"])
+        return result
+
+    def _load_cached_asset(self, result: Dict) -> AssetModel:
+        return AssetModel(**dict(result, thumbnail=self.url_with_token(result["thumbnail"])))
+
+    @staticmethod
+    def _url_without_token(url: str) -> str:
+        parsed = urlparse(url or "")
+        query = [(name, value) for (name, value) in parse_qsl(parsed.query) if name != "auth_token"]
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+    async def _search_all_pages(
+        self, params: Dict, on_page_fn: Optional[Callable[[List[AssetModel]], None]] = None
+    ) -> Tuple[List[AssetModel], bool]:
+        """Fetch every page of a project listing.
+
+        The first page is fetched alone to read ``meta.total_count``, the remaining pages are then requested
+        concurrently (at most ``maxConcurrentPageRequests`` at a time) and reassembled in page order.
+
+        Args:
+            params (Dict): Query parameters of the listing, "page" is overwritten.
+            on_page_fn (Callable): Called with the assets of each page, in page order, as soon as the page and all
+                pages before it are available.
+        """
         if not self.authorized():
             return ([], False)
-        items = []
-        meta = {}
 
         async with aiohttp.ClientSession() as session:
-            async with session.get(self._search_url, params=params) as response:
-                results = await response.json()
-                items = results.get("projects", [])
-                meta = results.get("meta")
+            (first_assets, meta) = await self._fetch_page(session, dict(params, page=1))
+            if on_page_fn and first_assets:
+                on_page_fn(first_assets)
+
+            per_page = meta.get("per_page") or params["per_page"]
+            total_count = meta.get("total_count", 0)
+            page_count = math.ceil(total_count / per_page) if per_page else 1
+            if page_count <= 1 or not first_assets:
+                return (first_assets, False)
+
+            semaphore = asyncio.Semaphore(max(1, self._max_concurrent_page_requests))
+
+            async def __fetch(page: int) -> List[AssetModel]:
+                async with semaphore:
+                    (page_assets, _) = await self._fetch_page(session, dict(params, page=page))
+                    return page_assets
+
+            assets: List[AssetModel] = list(first_assets)
+            tasks = [asyncio.ensure_future(__fetch(page)) for page in range(2, page_count + 1)]
+            try:
+                # Awaiting in page order keeps results ordered while later pages are still being fetched
+                for task in tasks:
+                    page_assets = await task
+                    assets.extend(page_assets)
+                    if on_page_fn and page_assets:
+                        on_page_fn(page_assets)
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+
+        return (assets, False)
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, params: Dict) -> Tuple[List[AssetModel], Dict]:
+        (status, results) = await self._request_policy.get_json(session, self._search_url, params=params)
+        if status != 200 or not isinstance(results, dict):
+            raise RuntimeError(f"Cloud search failed with status {status}")
+        items = results.get("projects", [])
+        meta = results.get("meta") or {}
 
         assets: List[AssetModel] = []
 
@@ -146,8 +448,7 @@ class ArtecCloudAssetProvider(BaseAssetStore):
                 )
             )
 
-        to_continue = meta["total_count"] > meta["current_page"] * meta["per_page"]
-        return (assets, to_continue)
+        return (assets, meta)
 
     def url_with_token(self, url: str) -> str:
         params = {"auth_token": self._auth_token}
@@ -156,48 +457,361 @@ class ArtecCloudAssetProvider(BaseAssetStore):
 
     def destroy(self):
         self._auth_params = {}
+        for refresh_future in self._search_refreshes.values():
+            refresh_future.cancel()
+        self._search_refreshes = {}
+        self._search_refresh_subscribers = {}
+        for check_future in self._snapshot_checks.values():
+            check_future.cancel()
+        self._snapshot_checks = {}
+        if self._mirror_sync_future is not None:
+            self._mirror_sync_future.cancel()
+            self._mirror_sync_future = None
+        self._project_mirror.destroy()
+        self._preconverter.destroy()
+        self._conversion_poller.destroy()
+        self._conversion_scheduler.destroy()
+        if self._download_history.records:
+            self._download_history.log_summary()
+        self._download_history.destroy()
+
+    @property
+    def download_history(self) -> DownloadHistory:
+        """Phase timings of the latest downloads"""
+        return self._download_history
 
     async def download(self, fusion: AssetFusion, dest_path: str,
                        on_progress_fn: Optional[Callable[[float], None]] = None, timeout: int = 600,
-                       on_prepared_fn: Optional[Callable[[float], None]] = None) -> Dict:
+                       on_prepared_fn: Optional[Callable[[float], None]] = None,
+                       queued_at: Optional[float] = None) -> Dict:
+        """
+        Download a fusion.
+        Args:
+            fusion (AssetFusion): Fusion to download.
+            dest_path (str): Destination folder.
+            on_progress_fn (Callable): Called with the progress of the current phase in [0, 1].
+            on_prepared_fn (Callable): Called once the conversion is ready to be transferred.
+            queued_at (float): Time the download was queued, recorded as its queue phase.
+        Return:
+            Response Dict with the downloaded usdz "url" and "status".
+        """
+        record = self._start_record(fusion, dest_path, queued_at)
+        with self._recording(record) as finish:
+            result = await self._place_cached_fusion(fusion, dest_path, record)
+            if result is None:
+                with record.phase(DownloadPhase.REQUEST):
+                    snapshot_group_id, eta = await self._get_conversion_request(fusion)
+                result = await self._download_requested(
+                    fusion, snapshot_group_id, eta, dest_path, on_progress_fn=on_progress_fn,
+                    on_prepared_fn=on_prepared_fn, record=record, conversion_timeout=timeout
+                )
+            finish(result)
+        return result
+
+    async def download_many(self, fusions: List[AssetFusion], dest_path: str,
+                            on_progress_fn: Optional[Callable[[float], None]] = None, timeout: int = 600,
+                            on_prepared_fn: Optional[Callable[[float], None]] = None,
+                            queued_at: Optional[float] = None) -> Dict:
+        """
+        Download several fusions into the same folder.
+        Conversions of all fusions are requested at once so the server converts them in parallel, then transfers and
+        local processing overlap, at most maxConcurrentDownloads at a time.
+        Args:
+            fusions (List[AssetFusion]): Fusions to download.
+            dest_path (str): Destination folder.
+            on_progress_fn (Callable): Called with the overall progress in [0, 1].
+            on_prepared_fn (Callable): Called once the first conversion is ready to be transferred.
+            queued_at (float): Time the download was queued, recorded as the queue phase of every fusion.
+        Return:
+            Response Dict. "url" is the first downloaded usdz and "status" is OK if at least one fusion was
+            downloaded. "results" holds the response of every fusion, in order.
+        """
+        progress = [0.0] * len(fusions)
+        prepared = False
+
+        def __on_progress(index: int, value: float) -> None:
+            progress[index] = value
+            if on_progress_fn:
+                on_progress_fn(sum(progress) / len(progress))
+
+        def __on_prepared() -> None:
+            nonlocal prepared
+            if not prepared:
+                prepared = True
+                if on_prepared_fn:
+                    on_prepared_fn()
+
+        records = [self._start_record(fusion, dest_path, queued_at) for fusion in fusions]
+
+        async def __request(fusion: AssetFusion, record: DownloadRecord) -> Union[Dict, Tuple[str, float]]:
+            cached_result = await self._place_cached_fusion(fusion, dest_path, record)
+            if cached_result is not None:
+                return cached_result
+            with record.phase(DownloadPhase.REQUEST):
+                return await self._get_conversion_request(fusion)
+
+        requests = await asyncio.gather(
+            *[__request(fusion, record) for fusion, record in zip(fusions, records)], return_exceptions=True
+        )
+        semaphore = asyncio.Semaphore(max(1, self._max_concurrent_downloads))
+
+        async def __download(index: int, fusion: AssetFusion, request) -> Dict:
+            result = {"url": None, "status": omni.client.Result.ERROR}
+            with self._recording(records[index]) as finish:
+                if isinstance(request, Exception):
+                    carb.log_warn(f"Failed to request conversion of {fusion.name}: {request}")
+                    return result
+                if isinstance(request, dict):
+                    # Placed from the converted asset cache
+                    __on_progress(index, 1.0)
+                    finish(request)
+                    return request
+                (snapshot_group_id, eta) = request
+                try:
+                    result = await self._download_requested(
+                        fusion,
+                        snapshot_group_id,
+                        eta,
+                        dest_path,
+                        on_progress_fn=partial(__on_progress, index),
+                        on_prepared_fn=__on_prepared,
+                        semaphore=semaphore,
+                        record=records[index],
+                        conversion_timeout=timeout,
+                    )
+                except Exception as e:
+                    carb.log_warn(f"Failed to download {fusion.name}: {e}")
+                finish(result)
+            return result
+
+        results = await asyncio.gather(
+            *[__download(index, fusion, request) for index, (fusion, request) in enumerate(zip(fusions, requests))]
+        )
+        urls = [result["url"] for result in results if result.get("status") == omni.client.Result.OK]
+        if len(urls) < len(fusions):
+            carb.log_warn(f"{len(fusions) - len(urls)} of {len(fusions)} fusions failed to download")
+        return {
+            "url": urls[0] if urls else None,
+            "status": omni.client.Result.OK if urls else omni.client.Result.ERROR,
+            "results": list(results),
+        }
+
+    @staticmethod
+    def _start_record(fusion: AssetFusion, dest_path: str, queued_at: Optional[float]) -> DownloadRecord:
+        record = DownloadRecord(fusion.name, fusion.url, dest_path)
+        if queued_at is not None:
+            record.add_phase(DownloadPhase.QUEUE, max(0.0, record.started_at - queued_at))
+        return record
+
+    @contextmanager
+    def _recording(self, record: DownloadRecord):
+        """
+        Add a download record to the history once the download is over, whatever its outcome.
+        Yields a function to call with the download response, without it the download is recorded as failed.
+        """
+        status = DownloadStatus.FAILED
+
+        def __finish(result: Dict) -> None:
+            nonlocal status
+            if result.get("status") == omni.client.Result.OK:
+                status = DownloadStatus.COMPLETED
+
+        try:
+            yield __finish
+        except asyncio.CancelledError:
+            status = DownloadStatus.CANCELLED
+            raise
+        finally:
+            record.finish(status)
+            self._download_history.add(record)
+
+    def preconvert(self, fusion: AssetFusion) -> None:
+        """Request the conversion of a fusion ahead of its download, which then only waits for what is left."""
+        self._preconverter.request(fusion)
+
+    async def _get_conversion_request(self, fusion: AssetFusion) -> Tuple[str, float]:
+        request = await self._preconverter.take(fusion)
+        if request is None:
+            request = await self._request_model(fusion)
+        return request
+
+    async def _download_requested(self, fusion: AssetFusion, snapshot_group_id, eta, dest_path: str,
+                                  on_progress_fn: Optional[Callable[[float], None]] = None,
+                                  on_prepared_fn: Optional[Callable[[float], None]] = None,
+                                  semaphore: Optional[asyncio.Semaphore] = None,
+                                  record: Optional[DownloadRecord] = None,
+                                  conversion_timeout: Optional[float] = None) -> Dict:
+        """
+        Download a fusion whose conversion was already requested. Semaphore bounds the work after conversion and
+        phase timings are added to record. The conversion is waited for conversion_timeout seconds at most.
+        Stages run as a small dependency graph: the preview fetch and the creation of destination folders only need
+        the request, so they run alongside conversion, transfer and local processing; the archive stages run in
+        sequence, each needing the output of the previous one. A zip is only readable once its central directory,
+        at the end of the archive, arrived, so extraction waits for the whole transfer.
+        """
+        if record is None:
+            record = DownloadRecord(fusion.name, fusion.url, dest_path)
+        cached_usdz_url = await self._place_cached(fusion, snapshot_group_id, dest_path)
+        if cached_usdz_url:
+            carb.log_info(f"{fusion.name} placed from converted asset cache")
+            record.cache_hit = True
+            return {"url": cached_usdz_url, "status": omni.client.Result.OK}
+
+        folders_future = asyncio.ensure_future(self._create_download_folders(dest_path))
+        preview_future = asyncio.ensure_future(self._fetch_preview(fusion, record))
+        try:
+            with record.phase(DownloadPhase.CONVERSION):
+                conversion_result = await self._conversion_poller.wait(
+                    fusion, snapshot_group_id, eta, on_progress_fn=on_progress_fn, timeout=conversion_timeout
+                )
+            if conversion_result.status is ConversionTaskStatus.FAILED:
+                return {"url": None, "status": omni.client.Result.ERROR}
+
+            if semaphore is None:
+                return await self._download_converted(
+                    fusion, snapshot_group_id, conversion_result, dest_path, on_progress_fn, on_prepared_fn, record,
+                    folders_future=folders_future, preview_future=preview_future
+                )
+            with record.phase(DownloadPhase.QUEUE):
+                await semaphore.acquire()
+            try:
+                return await self._download_converted(
+                    fusion, snapshot_group_id, conversion_result, dest_path, on_progress_fn, on_prepared_fn, record,
+                    folders_future=folders_future, preview_future=preview_future
+                )
+            finally:
+                semaphore.release()
+        finally:
+            for future in (folders_future, preview_future):
+                if not future.done():
+                    future.cancel()
+                elif not future.cancelled() and future.exception() is not None:
+                    carb.log_warn(f"Failed to prepare {fusion.name}: {future.exception()}")
+
+    async def _place_cached_fusion(self, fusion: AssetFusion, dest_path: str, record: DownloadRecord) -> Optional[Dict]:
+        """
+        Place the latest cached conversion of a fusion without asking the cloud for its snapshot group first. The
+        snapshot group is checked afterwards, an outdated conversion is dropped so the next download converts again.
+        Return:
+            Response Dict if placed from the converted asset cache. Else None.
+        """
+        loop = asyncio.get_event_loop()
+        snapshot_group_id = await loop.run_in_executor(None, self._converted_cache.find, fusion.asset.uid)
+        if snapshot_group_id is None:
+            return None
+        cached_usdz_url = await self._place_cached(fusion, snapshot_group_id, dest_path)
+        if not cached_usdz_url:
+            return None
+
+        carb.log_info(f"{fusion.name} placed from converted asset cache")
+        record.cache_hit = True
+        if fusion.asset.uid not in self._snapshot_checks:
+            self._snapshot_checks[fusion.asset.uid] = asyncio.ensure_future(
+                self._check_cached_snapshot(fusion, snapshot_group_id)
+            )
+        return {"url": cached_usdz_url, "status": omni.client.Result.OK}
+
+    async def _check_cached_snapshot(self, fusion: AssetFusion, snapshot_group_id: str) -> None:
+        try:
+            (latest_snapshot_group_id, _) = await self._request_model(fusion)
+        except Exception as e:
+            carb.log_warn(f"Failed to check the cached conversion of {fusion.name}: {e}")
+            return
+        finally:
+            self._snapshot_checks.pop(fusion.asset.uid, None)
+
+        if latest_snapshot_group_id != snapshot_group_id:
+            carb.log_info(f"Cached conversion of {fusion.name} is outdated, its next download converts it again")
+            await asyncio.get_event_loop().run_in_executor(
+                None, self._converted_cache.discard, fusion.asset.uid, snapshot_group_id
+            )
+
+    async def _place_cached(self, fusion: AssetFusion, snapshot_group_id, dest_path: str) -> Optional[str]:
+        """
+        Place a converted usdz and its thumbnail from the converted asset cache. Local destinations get hardlinks when
+        possible, remote ones copies through omni.client.
+        Return:
+            Url of the placed usdz if cached. Else None.
+        """
+        loop = asyncio.get_event_loop()
+        if not self._is_remote(dest_path):
+            usdz_path = await loop.run_in_executor(
+                None, self._converted_cache.place, fusion.asset.uid, snapshot_group_id, Path(dest_path)
+            )
+            return str(usdz_path) if usdz_path else None
+
+        cached = await loop.run_in_executor(None, self._converted_cache.get, fusion.asset.uid, snapshot_group_id)
+        if cached is None:
+            return None
+        (usdz_path, thumbnail_path) = cached
+        await self._create_download_folders(dest_path)
+        usdz_url = self._join_url(dest_path, usdz_path.name)
+        result = await omni.client.copy_async(str(usdz_path), usdz_url, behavior=omni.client.CopyBehavior.OVERWRITE)
+        if result != omni.client.Result.OK:
+            carb.log_warn(f"Failed to place cached {usdz_path.name} into {dest_path}: {result}")
+            return None
+        if thumbnail_path:
+            await omni.client.copy_async(
+                str(thumbnail_path),
+                self._join_url(self._get_thumbnail_folder(dest_path), f"{usdz_path.name}.png"),
+                behavior=omni.client.CopyBehavior.OVERWRITE,
+            )
+        return usdz_url
+
+    async def _create_download_folders(self, dest_path: str) -> None:
+        """Create the destination folder and its thumbnail folder"""
+        await omni.client.create_folder_async(dest_path)
+        await omni.client.create_folder_async(self._get_thumbnail_folder(dest_path))
+
+    async def _fetch_preview(self, fusion: AssetFusion, record: DownloadRecord) -> Optional[str]:
+        """Fetch the preview of a fusion into the thumbnail cache. Return: cached path, None if it failed."""
+        with record.phase(DownloadPhase.THUMBNAIL):
+            return await self._thumbnail_cache.fetch(fusion.asset.uid, self.url_with_token(fusion.thumbnail_url))
+
+    async def _download_converted(self, fusion: AssetFusion, snapshot_group_id, conversion_result: ConversionResult,
+                                  dest_path: str, on_progress_fn: Optional[Callable[[float], None]] = None,
+                                  on_prepared_fn: Optional[Callable[[float], None]] = None,
+                                  record: Optional[DownloadRecord] = None,
+                                  folders_future: Optional[asyncio.Future] = None,
+                                  preview_future: Optional[asyncio.Future] = None) -> Dict:
+        """
+        Transfer, extract, convert and package a converted fusion.
+        The package is staged next to its final place, in dest_path, so placing it is a rename and a partial package
+        is never visible under its final name. Remote destinations, like omniverse:// folders, cannot be staged in:
+        the package is staged locally and copied by omni.client, which streams it from disk.
+        Args:
+            folders_future (asyncio.Future): Creation of the destination folders, started by the caller.
+            preview_future (asyncio.Future): Preview fetch started by the caller, resolving to its cached path.
+        """
+        if record is None:
+            record = DownloadRecord(fusion.name, fusion.url, dest_path)
+        if folders_future is None:
+            folders_future = asyncio.ensure_future(self._create_download_folders(dest_path))
+        if preview_future is None:
+            preview_future = asyncio.ensure_future(self._fetch_preview(fusion, record))
+        loop = asyncio.get_event_loop()
         with tempfile.TemporaryDirectory() as tmp_dir:
             zip_file_path = Path(tmp_dir) / f"{fusion.name}.zip"
-            snapshot_group_id, eta = await self._request_model(fusion)
-            conversion_start_time = time()
-
-            while True:
-                if on_progress_fn:
-                    on_progress_fn(min((time() - conversion_start_time) / eta, 1))
-                conversion_result = await self._check_status(fusion, snapshot_group_id)
-                if conversion_result.status is ConversionTaskStatus.PROCESSED:
-                    if on_prepared_fn:
-                        on_prepared_fn()
-                    async with aiohttp.ClientSession() as session:
-                        content = bytearray()
-                        downloaded = 0
-                        async with session.get(conversion_result.download_url) as response:
-                            size = int(response.headers.get("content-length", 0))
-                            if size > 0:
-                                async for chunk in response.content.iter_chunked(1024 * 512):
-                                    content.extend(chunk)
-                                    downloaded += len(chunk)
-                                    if on_progress_fn:
-                                        on_progress_fn(float(downloaded) / size)
-                            else:
-                                if on_progress_fn:
-                                    on_progress_fn(0)
-                                content = await response.read()
-                                if on_progress_fn:
-                                    on_progress_fn(1)
-                    async with aiofiles.open(zip_file_path, "wb") as file:
-                        await file.write(content)
-                    break
-                elif conversion_result.status is ConversionTaskStatus.FAILED:
+            if on_prepared_fn:
+                on_prepared_fn()
+            with record.phase(DownloadPhase.TRANSFER) as timing:
+                try:
+                    timing.byte_count = await download_file(
+                        conversion_result.download_url,
+                        str(zip_file_path),
+                        on_progress_fn=on_progress_fn,
+                        connections=self._download_connections,
+                        segment_size=self._download_segment_size,
+                    )
+                except TransferError as e:
+                    carb.log_error(str(e))
                     return {"url": None, "status": omni.client.Result.ERROR}
 
             # unzip
             output_path = zip_file_path.parent / fusion.name
-            await self._extract_zip(zip_file_path, output_path)
+            with record.phase(DownloadPhase.EXTRACT) as timing:
+                await self._extract_zip(zip_file_path, output_path, on_progress_fn=on_progress_fn)
+                timing.byte_count = await loop.run_in_executor(None, self._get_folder_size, output_path)
 
             # convert model
             try:
@@ -208,46 +822,162 @@ class ArtecCloudAssetProvider(BaseAssetStore):
             converted_project_path = zip_file_path.parent / f"{obj_path.parent.name}-converted"
             usd_path = converted_project_path / f"{obj_path.stem}.usd"
             await omni.client.create_folder_async(str(converted_project_path))
-            if not await self.convert(obj_path, usd_path):
-                return {"url": None, "status": omni.client.Result.ERROR}
+            with record.phase(DownloadPhase.CONVERT):
+                if not await self.convert(obj_path, usd_path):
+                    return {"url": None, "status": omni.client.Result.ERROR}
 
             # prepare usdz
-            usdz_path = Path(dest_path) / f"{usd_path.name}z"
-            with zipfile.ZipFile(usdz_path, "w") as archive:
-                # usd file should be first in the USDZ package
-                archive.write(usd_path, arcname=usd_path.name)
-                for file_path in usd_path.parent.glob("**/*"):
-                    if file_path != usd_path:
-                        archive.write(file_path, arcname=file_path.relative_to(usd_path.parent))
-
-            await self._download_thumbnail(usdz_path, fusion.thumbnail_url)
-
-        return {"url": str(usdz_path), "status": omni.client.Result.OK}
-
-    async def _download_thumbnail(self, usd_path: Path, thumbnail_url: str):
-        thumbnail_out_dir_path = usd_path.parent / ".thumbs" / "256x256"
-        await omni.client.create_folder_async(str(thumbnail_out_dir_path))
-        thumbnail_out_path = thumbnail_out_dir_path / f"{Path(usd_path).name}.png"
+            usdz_name = f"{usd_path.name}z"
+            remote = self._is_remote(dest_path)
+            if remote:
+                staged_usdz_path = Path(tmp_dir) / usdz_name
+            else:
+                staged_usdz_path = Path(dest_path) / f".{usdz_name}.partial"
+            await folders_future
+            try:
+                with record.phase(DownloadPhase.PACKAGE) as timing:
+                    await self._package_usdz(usd_path, staged_usdz_path, on_progress_fn=on_progress_fn)
+                    timing.byte_count = staged_usdz_path.stat().st_size
+
+                if remote:
+                    usdz_url = self._join_url(dest_path, usdz_name)
+                    # The converted asset cache is filled from the staged package
+                    usdz_path = staged_usdz_path
+                    with record.phase(DownloadPhase.UPLOAD) as timing:
+                        result = await omni.client.copy_async(
+                            str(staged_usdz_path), usdz_url, behavior=omni.client.CopyBehavior.OVERWRITE
+                        )
+                        if result != omni.client.Result.OK:
+                            carb.log_error(f"Failed to upload {usdz_name} to {dest_path}: {result}")
+                            return {"url": None, "status": omni.client.Result.ERROR}
+                        timing.byte_count = staged_usdz_path.stat().st_size
+                else:
+                    usdz_path = Path(dest_path) / usdz_name
+                    os.replace(staged_usdz_path, usdz_path)
+                    usdz_url = str(usdz_path)
+            finally:
+                if not remote and staged_usdz_path.exists():
+                    staged_usdz_path.unlink()
+
+            with record.phase(DownloadPhase.THUMBNAIL):
+                cached_preview_path = await preview_future
+                thumbnail_url = await self._download_thumbnail(
+                    dest_path, usdz_name, fusion.asset.uid, fusion.thumbnail_url, cached_path=cached_preview_path
+                )
+            # The converted asset cache needs local files, a remote thumbnail is a copy of the cached preview
+            if remote:
+                thumbnail_path = Path(cached_preview_path) if cached_preview_path else None
+            else:
+                thumbnail_path = Path(thumbnail_url) if thumbnail_url else None
+            await loop.run_in_executor(
+                None, self._converted_cache.put, fusion.asset.uid, snapshot_group_id, usdz_path, thumbnail_path
+            )
+
+        return {"url": usdz_url, "status": omni.client.Result.OK}
+
+    @staticmethod
+    def _is_remote(url: str) -> bool:
+        """True if url is not a local file system path, like an omniverse:// folder"""
+        scheme = omni.client.break_url(url).scheme
+        # Windows drive letters look like one letter schemes
+        return bool(scheme) and scheme != "file" and len(scheme) > 1
+
+    @staticmethod
+    def _join_url(folder_url: str, *names: str) -> str:
+        """Join names to a local path or a url, without the path rules of Path which would mangle urls"""
+        return "/".join([folder_url.rstrip("/\\")] + list(names))
+
+    @classmethod
+    def _get_thumbnail_folder(cls, dest_path: str) -> str:
+        return cls._join_url(dest_path, ".thumbs", "256x256")
+
+    async def _download_thumbnail(self, dest_path: str, usdz_name: str, asset_id: str, thumbnail_url: str,
+                                  cached_path: Optional[str] = None) -> Optional[str]:
+        """
+        Place the thumbnail of a downloaded asset next to it. Written through omni.client, dest_path may be remote.
+        Args:
+            dest_path (str): Folder of the downloaded asset.
+            usdz_name (str): File name of the downloaded asset.
+            cached_path (str): Preview already fetched into the thumbnail cache. Fetched here if not given.
+        Return:
+            Url of the placed thumbnail, None if it could not be written.
+        """
+        thumbnail_folder = self._get_thumbnail_folder(dest_path)
+        await omni.client.create_folder_async(thumbnail_folder)
+        thumbnail_out_url = self._join_url(thumbnail_folder, f"{usdz_name}.png")
+        if cached_path is None:
+            cached_path = await self._thumbnail_cache.fetch(asset_id, self.url_with_token(thumbnail_url))
+        if cached_path:
+            result = await omni.client.copy_async(
+                cached_path, thumbnail_out_url, behavior=omni.client.CopyBehavior.OVERWRITE
+            )
+            if result == omni.client.Result.OK:
+                return thumbnail_out_url
         async with aiohttp.ClientSession() as session:
-            async with session.get(self.url_with_token(thumbnail_url)) as response:
-                async with aiofiles.open(thumbnail_out_path, "wb") as file:
-                    await file.write(await response.read())
+            (status, _, content) = await self._request_policy.get_bytes(session, self.url_with_token(thumbnail_url))
+        if status != 200:
+            carb.log_warn(f"Failed to fetch thumbnail of {usdz_name}: status {status}")
+            return None
+        result = await omni.client.write_file_async(thumbnail_out_url, content)
+        if result != omni.client.Result.OK:
+            carb.log_warn(f"Failed to write thumbnail {thumbnail_out_url}: {result}")
+            return None
+        return thumbnail_out_url
+
+    def get_cached_thumbnail(self, asset_id: str, thumbnail_url: str) -> Optional[str]:
+        """Local path of a cached preview, without any request"""
+        return self._thumbnail_cache.get_path(asset_id, thumbnail_url)
+
+    async def fetch_thumbnail(self, asset_id: str, thumbnail_url: str) -> Optional[str]:
+        """Local path of a preview, downloaded into or revalidated in the thumbnail cache"""
+        return await self._thumbnail_cache.fetch(asset_id, thumbnail_url)
+
+    @property
+    def conversion_scheduler(self) -> ConversionScheduler:
+        """Scheduler of local conversions, exposes queue depth and job timings"""
+        return self._conversion_scheduler
+
+    async def convert(self, input_asset_path: Path, output_asset_path: Path, priority: int = 0) -> bool:
+        job = await self._conversion_scheduler.convert(input_asset_path, output_asset_path, priority=priority)
+        return job.succeeded
 
     @staticmethod
-    async def convert(input_asset_path: Path, output_asset_path: Path) -> bool:
-        task_manager = converter.get_instance()
-        task = task_manager.create_converter_task(str(input_asset_path), str(output_asset_path), None)
-        success = await task.wait_until_finished()
-        if not success:
-            carb.log_error(f"Conversion failed. Reason: {task.get_error_message()}")
-            return False
-        return True
+    def _get_folder_size(path: Path) -> int:
+        return sum(file_path.stat().st_size for file_path in path.glob("**/*") if file_path.is_file())
 
     @staticmethod
-    async def _extract_zip(input_path, output_path):
+    async def _extract_zip(input_path, output_path, on_progress_fn: Optional[Callable[[float], None]] = None):
         await omni.client.create_folder_async(str(output_path))
-        with zipfile.ZipFile(input_path, "r") as zip_ref:
-            zip_ref.extractall(output_path)
+        await extract_zip(str(input_path), str(output_path), on_progress_fn=on_progress_fn)
+
+    @staticmethod
+    async def _package_usdz(usd_path: Path, usdz_path: Path, on_progress_fn: Optional[Callable[[float], None]] = None):
+        """Package converted usd and its textures into an aligned, uncompressed usdz, in a worker thread."""
+        loop = asyncio.get_event_loop()
+        cancel_event = threading.Event()
+        # usd file should be first in the USDZ package
+        file_paths = [usd_path] + [
+            file_path for file_path in usd_path.parent.glob("**/*") if file_path != usd_path and file_path.is_file()
+        ]
+
+        def __package():
+            with UsdzWriter(usdz_path) as writer:
+                for index, file_path in enumerate(file_paths):
+                    if cancel_event.is_set():
+                        return
+                    writer.add_file(file_path, arcname=file_path.relative_to(usd_path.parent).as_posix())
+                    if on_progress_fn:
+                        loop.call_soon_threadsafe(on_progress_fn, float(index + 1) / len(file_paths))
+
+        future = loop.run_in_executor(None, __package)
+        try:
+            await future
+        except asyncio.CancelledError:
+            cancel_event.set()
+            await asyncio.wait([future])
+            if usdz_path.exists():
+                usdz_path.unlink()
+            raise
 
     async def _check_status(self, fusion: AssetFusion, snapshot_group_id):
         params = {
@@ -256,15 +986,15 @@ class ArtecCloudAssetProvider(BaseAssetStore):
         }
         url = f"{'/'.join(fusion.url.split('/')[:-1])}/conversion_status"
         async with aiohttp.ClientSession() as session:
-            async with session.get(url=url, params=params) as response:
-                decoded_response = await response.json()
-        if response.status != 200:
+            (status, decoded_response) = await self._request_policy.get_json(session, url, params=params)
+        if status != 200:
             return ConversionResult(ConversionTaskStatus.FAILED, "")
         status = ConversionTaskStatus(int(decoded_response["project"]["conversion_status"]))
         return ConversionResult(status, decoded_response["project"]["download_url"])
 
     async def _request_model(self, fusion: AssetFusion):
         async with aiohttp.ClientSession() as session:
-            async with session.get(url=self.url_with_token(fusion.url)) as response:
-                results = await response.json()
+            (status, results) = await self._request_policy.get_json(session, self.url_with_token(fusion.url))
+        if status != 200:
+            raise RuntimeError(f"Conversion request of {fusion.name} failed with status {status}")
         return results["project"]["snapshot_group_id"], results["project"]["eta"]
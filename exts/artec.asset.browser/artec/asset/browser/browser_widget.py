@@ -52,6 +52,7 @@ class ArtecCloudBrowserWidget(BrowserWidget):
         self._load_categories()
         self._browser_model.on_refresh_provider_fn = self._on_refresh_provider
         self._browser_model.on_enable_provider_fn = self._on_enable_provider
+        self._browser_model.on_assets_changed_fn = lambda: self._detail_view.model._item_changed(None)
 
     def destroy(self):
         if self._load_future is not None:
@@ -113,9 +114,9 @@ class ArtecCloudBrowserWidget(BrowserWidget):
         if self._zoom_bar:
             self._zoom_bar.set_on_hovered_fn(self._on_zoombar_hovered)
 
-        auto_scroll = carb.settings.get_settings().get(SETTING_AUTO_SCROLL)
-        if auto_scroll:
-            self._detail_scrolling_frame.set_scroll_y_changed_fn(self._on_detail_scroll_y_changed)
+        self._auto_scroll = carb.settings.get_settings().get(SETTING_AUTO_SCROLL)
+        self._detail_kwargs["delegate"].set_scrolling_frame(self._detail_scrolling_frame)
+        self._detail_scrolling_frame.set_scroll_y_changed_fn(self._on_detail_scroll_y_changed)
 
     def _build_detail_panel(self):
         # Add search bar
@@ -197,6 +198,7 @@ class ArtecCloudBrowserWidget(BrowserWidget):
             self._load_assets(self.category_selection[0], __show_filter_results)
         else:
             # Force to refresh detail view for new filter words
+            self._detail_kwargs["delegate"].cancel_preconversions()
             self._detail_view.model._item_changed(None)
 
     def _trigger_sort_menu(self) -> None:
@@ -311,6 +313,8 @@ class ArtecCloudBrowserWidget(BrowserWidget):
         self, category_item: CategoryItem, callback: Callable[[None], None] = None, reset: bool = True
     ) -> None:
         if reset:
+            # Grid is rebuilt with other assets
+            self._detail_kwargs["delegate"].cancel_preconversions()
             self._begin_search()
             self._browser_model.reset_assets()
             self._detail_view.model._item_changed(None)
@@ -399,6 +403,9 @@ class ArtecCloudBrowserWidget(BrowserWidget):
             self._search_notification.visible = False
 
     def _on_detail_scroll_y_changed(self, y: float) -> None:
+        self._detail_kwargs["delegate"].cancel_preconversions(hidden_only=True)
+        if not self._auto_scroll:
+            return
         try:
             if self._more_details and y >= self._detail_scrolling_frame.scroll_y_max and self.category_selection:
                 # Require more assets
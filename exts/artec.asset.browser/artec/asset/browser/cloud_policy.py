@@ -0,0 +1,310 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import random
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import aiohttp
+import carb
+
+# Responses telling the client to slow down
+OVERLOAD_STATUSES = (429, 503)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend which keeps failing."""
+    pass
+
+
+class TokenBucket:
+    """
+    Limit the rate of calls, allowing short bursts.
+    Args:
+        rate (float): Calls allowed per second on average.
+        capacity (int): Maximum number of calls made at once after a quiet period.
+        clock (Callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = monotonic):
+        self._rate = max(rate, 0.001)
+        self._capacity = max(1, capacity)
+        self._clock = clock
+        self._tokens = float(self._capacity)
+        self._updated_at = clock()
+
+    async def acquire(self) -> None:
+        while True:
+            now = self._clock()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class AimdLimiter:
+    """
+    Concurrency limit adapting to the backend: grows by one per limit's worth of successful calls (additive
+    increase) and is halved whenever the backend is overloaded (multiplicative decrease).
+    Use as an async context manager around each call.
+    Args:
+        max_limit (int): Highest concurrency.
+        min_limit (int): Lowest concurrency.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, decrease: float = 0.5):
+        self._max_limit = max(1, max_limit)
+        self._min_limit = max(1, min(min_limit, self._max_limit))
+        self._decrease = decrease
+        self._limit = float(self._max_limit)
+        self._in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def on_success(self) -> None:
+        self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+
+    def on_overload(self) -> None:
+        self._limit = max(self._min_limit, self._limit * self._decrease)
+
+    async def __aenter__(self) -> "AimdLimiter":
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Stop calling a backend after failure_threshold consecutive failures. After reset_timeout a single trial call is
+    let through, closing the circuit again if it succeeds.
+    Args:
+        failure_threshold (int): Consecutive failures opening the circuit.
+        reset_timeout (float): Seconds before a trial call is allowed.
+        clock (Callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = monotonic):
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        # Start of the trial call while the circuit is open, a trial which never reports is given up after reset_timeout
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        """
+        Raises:
+            CircuitOpenError if the call must not be made.
+        """
+        if self._opened_at is None:
+            return
+        now = self._clock()
+        trial_running = self._trial_started_at is not None and now - self._trial_started_at < self._reset_timeout
+        if trial_running or now - self._opened_at < self._reset_timeout:
+            raise CircuitOpenError(f"Cloud unavailable after {self._failures} failures, not retrying yet")
+        self._trial_started_at = now
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            carb.log_info("Cloud available again")
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_started_at is not None or (
+            self._opened_at is None and self._failures >= self._failure_threshold
+        ):
+            if self._opened_at is None:
+                carb.log_warn(f"Cloud failed {self._failures} times in a row, failing fast for {self._reset_timeout}s")
+            self._opened_at = self._clock()
+        self._trial_started_at = None
+
+
+class CloudRequestPolicy:
+    """
+    Client side policy shared by all calls to a backend: rate limiting, adaptive concurrency, retries of idempotent
+    calls with jittered exponential backoff and a circuit breaker.
+    Args:
+        rate (float): Calls per second on average.
+        burst (int): Calls allowed at once after a quiet period.
+        max_concurrency (int): Highest number of calls in flight.
+        max_retries (int): Retries of an idempotent call after a transient failure.
+        retry_delay (float): Base delay between retries in seconds.
+        max_retry_delay (float): Longest delay between retries in seconds.
+        failure_threshold (int): Consecutive failures opening the circuit.
+        reset_timeout (float): Seconds the circuit stays open.
+        timeout (float): Timeout of one call in seconds.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 20,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,
+        max_retry_delay: float = 10.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        self._bucket = TokenBucket(rate, burst)
+        self._limiter = AimdLimiter(max_concurrency)
+        self._breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._max_retries = max(0, max_retries)
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+
+    @property
+    def circuit_open(self) -> bool:
+        return self._breaker.open
+
+    @property
+    def concurrency_limit(self) -> int:
+        return self._limiter.limit
+
+    async def get_json(
+        self, session: aiohttp.ClientSession, url: str, params: Optional[Dict] = None
+    ) -> Tuple[int, Any]:
+        """GET is idempotent, transient failures are retried."""
+        return await self.request_json(session, "GET", url, params=params, retry=True)
+
+    async def get_bytes(
+        self, session: aiohttp.ClientSession, url: str, headers: Optional[Dict] = None
+    ) -> Tuple[int, Dict, bytes]:
+        """
+        GET a binary body, like a preview image. Transient failures are retried.
+        Args:
+            session (aiohttp.ClientSession): Session to use.
+            url (str): Url to call.
+            headers (Dict): Request headers, like conditional ones.
+        Return:
+            (status, response headers, body).
+        Raises:
+            CircuitOpenError, aiohttp.ClientError, asyncio.TimeoutError
+        """
+        return await self._request(session, "GET", url, None, headers, True, self._read_bytes)
+
+    async def request_json(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        retry: bool = False,
+    ) -> Tuple[int, Any]:
+        """
+        Call the backend under the policy.
+        Args:
+            session (aiohttp.ClientSession): Session to use.
+            method (str): HTTP method.
+            url (str): Url to call.
+            params (Dict): Query parameters.
+            retry (bool): Retry transient failures, only for idempotent calls.
+        Return:
+            (status, decoded JSON body or None). Status of the last attempt if retries are exhausted.
+        Raises:
+            CircuitOpenError, aiohttp.ClientError, asyncio.TimeoutError
+        """
+        (status, _, body) = await self._request(session, method, url, params, None, retry, self._read_json)
+        return (status, body)
+
+    async def _request(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        params: Optional[Dict],
+        headers: Optional[Dict],
+        retry: bool,
+        read_fn: Callable[[aiohttp.ClientResponse], Awaitable[Any]],
+    ) -> Tuple[int, Dict, Any]:
+        attempt = 0
+        while True:
+            self._breaker.check()
+            await self._bucket.acquire()
+            retry_after = None
+            try:
+                async with self._limiter:
+                    async with session.request(
+                        method, url, params=params, headers=headers, timeout=self._timeout
+                    ) as response:
+                        status = response.status
+                        response_headers = dict(response.headers)
+                        retry_after = self._get_retry_after(response.headers)
+                        body = await read_fn(response)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._breaker.record_failure()
+                self._limiter.on_overload()
+                if not self._may_retry(retry, attempt):
+                    raise
+                error = str(e) or type(e).__name__
+            else:
+                if status in OVERLOAD_STATUSES:
+                    self._limiter.on_overload()
+                if status >= 500:
+                    self._breaker.record_failure()
+                else:
+                    self._breaker.record_success()
+                    if status not in OVERLOAD_STATUSES:
+                        self._limiter.on_success()
+                if (status < 500 and status != 429) or not self._may_retry(retry, attempt):
+                    return (status, response_headers, body)
+                error = f"status {status}"
+
+            # Full jitter spreads retries of concurrent callers
+            delay = random.uniform(0, min(self._max_retry_delay, self._retry_delay * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self._max_retry_delay))
+            attempt += 1
+            carb.log_warn(f"{method} {url.split('?')[0]} failed ({error}), retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _read_json(response: aiohttp.ClientResponse) -> Any:
+        try:
+            return await response.json(content_type=None)
+        except ValueError:
+            return None
+
+    @staticmethod
+    async def _read_bytes(response: aiohttp.ClientResponse) -> bytes:
+        return await response.read()
+
+    def _may_retry(self, retry: bool, attempt: int) -> bool:
+        # Once the circuit opened, a retry would fail fast anyway
+        return retry and attempt < self._max_retries and not self._breaker.open
+
+    @staticmethod
+    def _get_retry_after(headers) -> Optional[float]:
+        try:
+            return float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
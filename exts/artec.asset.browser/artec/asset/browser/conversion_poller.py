@@ -0,0 +1,234 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import random
+from dataclasses import dataclass, field
+from enum import Enum
+from time import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import carb
+
+# How often progress callbacks are refreshed while waiting for the next status check
+PROGRESS_INTERVAL = 0.5
+
+
+class ConversionTaskStatus(Enum):
+    ENQUEUED = 1
+    IN_PROGRESS = 2
+    PROCESSED = 3
+    FAILED = -1
+
+
+@dataclass
+class ConversionResult:
+    status: ConversionTaskStatus
+    download_url: str
+
+
+@dataclass
+class _PollEntry:
+    fusion: object
+    snapshot_group_id: str
+    eta: float
+    started_at: float
+    next_check_at: float
+    interval: float
+    # Status checks failed in a row
+    error_count: int = 0
+    futures: List[asyncio.Future] = field(default_factory=list)
+    # Futures of background waiters, which stop waiting once all the other waiters left
+    background_futures: Set[asyncio.Future] = field(default_factory=set)
+    # Whether a waiter which is not in the background joined
+    joined: bool = False
+    progress_fns: List[Callable[[float], None]] = field(default_factory=list)
+
+
+class ConversionPoller:
+    """
+    Waits for server side conversions to finish.
+    All in-flight conversions share one scheduled loop which checks every due conversion in a single batch.
+    The first check is immediate, the next one is scheduled at the returned eta and after that the interval
+    grows exponentially (with jitter) up to max_interval.
+    A conversion whose status check fails max_errors times in a row fails its waiters with the last error.
+    Background waiters, like pre-conversions, keep a conversion polled on their own until another waiter joins.
+    Once all the other waiters left, background waiters are cancelled and the conversion is no longer polled.
+    Args:
+        check_status_fn (Callable): Coroutine function (fusion, snapshot_group_id) returning a ConversionResult.
+        min_interval (float): Shortest delay between two checks of the same conversion, in seconds.
+        max_interval (float): Longest delay between two checks of the same conversion, in seconds.
+        backoff (float): Multiplier applied to the interval after each unfinished check past the eta.
+        jitter (float): Relative random spread applied to every delay.
+        max_errors (int): Status checks failing in a row before the waiters fail.
+    """
+
+    def __init__(
+        self,
+        check_status_fn: Callable[[object, str], Awaitable[ConversionResult]],
+        min_interval: float = 1.0,
+        max_interval: float = 15.0,
+        backoff: float = 2.0,
+        jitter: float = 0.2,
+        max_errors: int = 3,
+    ):
+        self._check_status_fn = check_status_fn
+        self._min_interval = max(min_interval, 0.1)
+        self._max_interval = max(max_interval, self._min_interval)
+        self._backoff = max(backoff, 1.0)
+        self._jitter = min(max(jitter, 0.0), 0.9)
+        self._max_errors = max(1, max_errors)
+        self._entries: Dict[Tuple[str, str], _PollEntry] = {}
+        self._loop_future: Optional[asyncio.Future] = None
+
+    def destroy(self):
+        if self._loop_future is not None and not self._loop_future.done():
+            self._loop_future.cancel()
+        self._loop_future = None
+        for entry in self._entries.values():
+            for future in entry.futures:
+                if not future.done():
+                    future.cancel()
+        self._entries = {}
+
+    @property
+    def pending_count(self) -> int:
+        """Number of conversions currently polled."""
+        return len(self._entries)
+
+    async def wait(
+        self,
+        fusion,
+        snapshot_group_id: str,
+        eta: float,
+        on_progress_fn: Optional[Callable[[float], None]] = None,
+        timeout: Optional[float] = None,
+        background: bool = False,
+    ) -> ConversionResult:
+        """
+        Wait until the conversion of a fusion snapshot is processed or failed.
+        Several waiters of the same snapshot share the same status checks.
+        Args:
+            fusion (AssetFusion): Fusion being converted.
+            snapshot_group_id (str): Snapshot group returned when conversion was requested.
+            eta (float): Estimated conversion time in seconds returned when conversion was requested.
+            on_progress_fn (Callable): Called with the estimated conversion progress in [0, 1].
+            timeout (float): Seconds to wait at most. None to wait until the conversion ends.
+            background (bool): Wait in the background, cancelled once all the other waiters that joined left.
+        Return:
+            Final ConversionResult.
+        Raises:
+            asyncio.TimeoutError if the conversion did not end within timeout.
+            asyncio.CancelledError if waiting in the background and the other waiters left.
+            The error of the last status check if max_errors checks failed in a row.
+        """
+        key = (fusion.url, str(snapshot_group_id))
+        entry = self._entries.get(key)
+        if entry is None:
+            now = time()
+            entry = _PollEntry(
+                fusion=fusion,
+                snapshot_group_id=snapshot_group_id,
+                eta=max(float(eta or 0), 0.0),
+                started_at=now,
+                next_check_at=now,
+                interval=self._min_interval,
+            )
+            self._entries[key] = entry
+
+        future = asyncio.get_event_loop().create_future()
+        entry.futures.append(future)
+        if background:
+            entry.background_futures.add(future)
+        else:
+            entry.joined = True
+        if on_progress_fn:
+            entry.progress_fns.append(on_progress_fn)
+
+        if self._loop_future is None or self._loop_future.done():
+            self._loop_future = asyncio.ensure_future(self._poll_loop())
+
+        try:
+            # A timed out waiter cancels its future, the conversion is forgotten once nobody waits for it
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if on_progress_fn in entry.progress_fns:
+                entry.progress_fns.remove(on_progress_fn)
+
+    async def _poll_loop(self):
+        while self._entries:
+            now = time()
+            due = []
+            for key, entry in list(self._entries.items()):
+                # Forget conversions nobody is waiting for anymore
+                entry.futures = [future for future in entry.futures if not future.done()]
+                if entry.joined and all(future in entry.background_futures for future in entry.futures):
+                    # The waiters which joined left, e.g. a cancelled download, the background ones do not need it
+                    for future in entry.futures:
+                        future.cancel()
+                    entry.futures = []
+                if not entry.futures:
+                    self._entries.pop(key)
+                    continue
+                self._report_progress(entry, now)
+                if entry.next_check_at <= now:
+                    due.append((key, entry))
+
+            if due:
+                results = await asyncio.gather(
+                    *[self._check_status_fn(entry.fusion, entry.snapshot_group_id) for _, entry in due],
+                    return_exceptions=True,
+                )
+                for (key, entry), result in zip(due, results):
+                    self._on_status(key, entry, result)
+
+            if not self._entries:
+                break
+            next_check_at = min(entry.next_check_at for entry in self._entries.values())
+            await asyncio.sleep(min(max(next_check_at - time(), 0), PROGRESS_INTERVAL))
+
+    def _on_status(self, key: Tuple[str, str], entry: _PollEntry, result: ConversionResult) -> None:
+        if isinstance(result, BaseException):
+            entry.error_count += 1
+            carb.log_warn(
+                f"Failed to check conversion status of {entry.fusion.name} "
+                f"({entry.error_count}/{self._max_errors}): {result}"
+            )
+            if entry.error_count >= self._max_errors:
+                self._entries.pop(key, None)
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_exception(result)
+                return
+        elif result.status in (ConversionTaskStatus.PROCESSED, ConversionTaskStatus.FAILED):
+            self._entries.pop(key, None)
+            for future in entry.futures:
+                if not future.done():
+                    future.set_result(result)
+            return
+        else:
+            entry.error_count = 0
+
+        now = time()
+        remaining_eta = entry.started_at + entry.eta - now
+        if remaining_eta > self._min_interval:
+            # Server expects the conversion to take longer, no need to ask before it is due
+            delay = remaining_eta
+        else:
+            delay = entry.interval
+            entry.interval = min(entry.interval * self._backoff, self._max_interval)
+        delay *= random.uniform(1 - self._jitter, 1 + self._jitter)
+        entry.next_check_at = now + max(delay, self._min_interval)
+
+    @staticmethod
+    def _report_progress(entry: _PollEntry, now: float) -> None:
+        if not entry.progress_fns:
+            return
+        progress = min((now - entry.started_at) / entry.eta, 1) if entry.eta > 0 else 1
+        for progress_fn in entry.progress_fns:
+            progress_fn(progress)
@@ -0,0 +1,286 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import itertools
+import shlex
+import subprocess
+import sys
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from time import time
+from typing import Deque, List, Optional
+
+import carb
+import carb.tokens
+import omni.kit.asset_converter as converter
+
+CONVERT_SCRIPT_PATH = Path(__file__).parent.joinpath("scripts", "convert_asset.py")
+# Number of finished jobs kept for inspection
+HISTORY_SIZE = 50
+# Seconds a cancelled conversion process is given to exit before it is killed
+TERMINATE_TIMEOUT = 5.0
+
+
+class ConversionBackend(Enum):
+    # omni.kit.asset_converter tasks run inside the Kit process
+    IN_PROCESS = "inProcess"
+    # Every conversion runs in its own headless Kit process
+    PROCESS = "process"
+
+
+class ConversionJobStatus(Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+    CANCELLED = "Cancelled"
+
+
+@dataclass(eq=False)
+class ConversionJob:
+    input_path: Path
+    output_path: Path
+    priority: int = 0
+    status: ConversionJobStatus = ConversionJobStatus.QUEUED
+    error: str = ""
+    submitted_at: float = field(default_factory=time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == ConversionJobStatus.SUCCEEDED
+
+    @property
+    def wait_time(self) -> Optional[float]:
+        """Seconds spent in the queue"""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_time(self) -> Optional[float]:
+        """Seconds spent converting"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class ConversionScheduler:
+    """
+    Runs OBJ to USD conversions with a bounded number of workers.
+    Jobs are started highest priority first, in submission order for equal priorities. Conversions run either
+    in-process with omni.kit.asset_converter or, to keep heavy scans away from the UI, each in a headless Kit process.
+    Args:
+        max_workers (int): Maximum number of conversions running at the same time.
+        backend (ConversionBackend): Where conversions run.
+        kit_path (str): Kit executable used by the process backend. Defaults to the running Kit.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        backend: ConversionBackend = ConversionBackend.IN_PROCESS,
+        kit_path: str = "",
+    ):
+        self._max_workers = max(1, max_workers)
+        self._backend = backend
+        self._kit_path = kit_path or self._get_default_kit_path()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Future] = []
+        self._sequence = itertools.count()
+        self._queued: List[ConversionJob] = []
+        self._running: List[ConversionJob] = []
+        self._history: Deque[ConversionJob] = deque(maxlen=HISTORY_SIZE)
+
+    def destroy(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        if self._queue is not None:
+            # Callers waiting for queued jobs get cancelled, running ones are by their worker
+            while not self._queue.empty():
+                (_, _, job, done_future) = self._queue.get_nowait()
+                job.status = ConversionJobStatus.CANCELLED
+                if not done_future.done():
+                    done_future.cancel()
+        self._queue = None
+        self._queued = []
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of conversions waiting for a worker"""
+        return len(self._queued)
+
+    @property
+    def running_jobs(self) -> List[ConversionJob]:
+        return list(self._running)
+
+    @property
+    def finished_jobs(self) -> List[ConversionJob]:
+        """Most recent finished conversions, oldest first"""
+        return list(self._history)
+
+    async def convert(self, input_path: Path, output_path: Path, priority: int = 0) -> ConversionJob:
+        """
+        Queue a conversion and wait for it to finish.
+        Args:
+            input_path (Path): Asset to convert.
+            output_path (Path): USD file to write.
+            priority (int): Conversions with higher priority start first.
+        Return:
+            The finished job, check its status for the result.
+        """
+        job = ConversionJob(Path(input_path), Path(output_path), priority=priority)
+        done_future = asyncio.get_event_loop().create_future()
+        self._put(job, done_future)
+        try:
+            await asyncio.shield(done_future)
+        except asyncio.CancelledError:
+            # Caller does not need the result any more, dropped from the queue or stopped by its worker
+            job.status = ConversionJobStatus.CANCELLED
+            if job in self._queued:
+                self._queued.remove(job)
+            if not done_future.done():
+                done_future.cancel()
+            raise
+        return job
+
+    def _put(self, job: ConversionJob, done_future: asyncio.Future) -> None:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self._max_workers:
+            self._workers.append(asyncio.ensure_future(self._worker()))
+        self._queued.append(job)
+        self._queue.put_nowait((-job.priority, next(self._sequence), job, done_future))
+
+    async def _worker(self) -> None:
+        while True:
+            (_, _, job, done_future) = await self._queue.get()
+            if job in self._queued:
+                self._queued.remove(job)
+            if done_future.done():
+                # Cancelled while queued
+                self._finish(job)
+                continue
+
+            job.status = ConversionJobStatus.RUNNING
+            job.started_at = time()
+            self._running.append(job)
+            run_future = asyncio.ensure_future(self._run(job))
+            done_future.add_done_callback(lambda f, run_future=run_future: f.cancelled() and run_future.cancel())
+            try:
+                await asyncio.wait([run_future])
+                if run_future.cancelled():
+                    job.status = ConversionJobStatus.CANCELLED
+                elif run_future.exception() is not None:
+                    job.status = ConversionJobStatus.FAILED
+                    job.error = str(run_future.exception())
+                elif run_future.result():
+                    job.status = ConversionJobStatus.SUCCEEDED
+                else:
+                    job.status = ConversionJobStatus.FAILED
+            except asyncio.CancelledError:
+                # Worker itself is cancelled
+                job.status = ConversionJobStatus.CANCELLED
+                run_future.cancel()
+                raise
+            finally:
+                self._running.remove(job)
+                self._finish(job)
+                if not done_future.done():
+                    done_future.set_result(job)
+
+            if job.status == ConversionJobStatus.FAILED:
+                carb.log_error(f"Conversion of {job.input_path} failed. Reason: {job.error}")
+            else:
+                carb.log_info(
+                    f"Conversion of {job.input_path} {job.status.value.lower()}: waited {job.wait_time:.1f}s, "
+                    f"ran {job.run_time:.1f}s, {self.queue_depth} queued"
+                )
+
+    def _finish(self, job: ConversionJob) -> None:
+        job.finished_at = time()
+        self._history.append(job)
+
+    async def _run(self, job: ConversionJob) -> bool:
+        if self._backend == ConversionBackend.PROCESS:
+            return await self._run_in_process(job)
+        return await self._run_in_kit(job)
+
+    @staticmethod
+    async def _run_in_kit(job: ConversionJob) -> bool:
+        task_manager = converter.get_instance()
+        task = task_manager.create_converter_task(str(job.input_path), str(job.output_path), None)
+        try:
+            success = await task.wait_until_finished()
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if not success:
+            job.error = task.get_error_message()
+        return success
+
+    async def _run_in_process(self, job: ConversionJob) -> bool:
+        command = [
+            self._kit_path,
+            "--no-window",
+            "--enable",
+            "omni.kit.asset_converter",
+            "--exec",
+            self._join_arguments([str(CONVERT_SCRIPT_PATH), str(job.input_path), str(job.output_path)]),
+        ]
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+        except Exception:
+            job.error = traceback.format_exc()
+            return False
+        try:
+            (_, stderr) = await process.communicate()
+        except asyncio.CancelledError:
+            await self._terminate(process)
+            raise
+
+        if process.returncode != 0 or not job.output_path.exists():
+            lines = stderr.decode("utf-8", errors="replace").strip().splitlines()
+            job.error = lines[-1] if lines else f"Kit exited with code {process.returncode}"
+            return False
+        return True
+
+    @staticmethod
+    async def _terminate(process: asyncio.subprocess.Process) -> None:
+        """Stop a conversion process, killed if it does not exit within TERMINATE_TIMEOUT"""
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), TERMINATE_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+        except ProcessLookupError:
+            # Exited meanwhile
+            pass
+
+    @staticmethod
+    def _join_arguments(arguments: List[str]) -> str:
+        """Quote a command line passed as a single argument, following the rules of the platform"""
+        if sys.platform == "win32":
+            return subprocess.list2cmdline(arguments)
+        return " ".join(shlex.quote(argument) for argument in arguments)
+
+    @staticmethod
+    def _get_default_kit_path() -> str:
+        kit_folder = carb.tokens.get_tokens_interface().resolve("${kit}")
+        return str(Path(kit_folder) / ("kit.exe" if sys.platform == "win32" else "kit"))
@@ -0,0 +1,208 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from time import time
+from typing import Dict, Optional, Tuple
+
+import carb
+
+from .json_index import load_json_index, save_json_index
+
+INDEX_FILE = "index.json"
+THUMBNAIL_FILE = "thumbnail.png"
+
+
+class ConvertedAssetCache:
+    """
+    Local cache of converted usdz packages, keyed by fusion id and snapshot group id.
+    Each entry lives in its own folder named after the hash of its key. Only the latest snapshot group of a fusion is
+    kept. Least recently used entries are evicted once the cache grows over max_size. Hits are placed into destination folders as hardlinks when possible,
+    falling back to copies.
+    Methods touching files are blocking, run them in an executor.
+    Args:
+        cache_root (str): Folder of the cache.
+        max_size (int): Maximum total size of cached files in bytes.
+    """
+
+    def __init__(self, cache_root: str, max_size: int):
+        self._cache_root = Path(cache_root)
+        self._index_file = self._cache_root / INDEX_FILE
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        # Key => lock serializing writes to the folder of the entry
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, Dict] = {}
+
+        self._load_index()
+
+    @staticmethod
+    def get_key(fusion_id: str, snapshot_group_id: str) -> str:
+        return hashlib.sha1(f"{fusion_id}/{snapshot_group_id}".encode("utf-8")).hexdigest()
+
+    def find(self, fusion_id: str) -> Optional[str]:
+        """
+        Look up the snapshot group cached for a fusion, to use the cache before asking the cloud for it.
+        Args:
+            fusion_id (str): Fusion identifier.
+        Return:
+            Snapshot group id of the cached usdz if any. Else None.
+        """
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if entry["fusion_id"] == fusion_id]
+        if not entries:
+            return None
+        return max(entries, key=lambda entry: entry["last_used"])["snapshot_group_id"]
+
+    def discard(self, fusion_id: str, snapshot_group_id: str) -> None:
+        """Remove a cached usdz, like one converted from an outdated snapshot group"""
+        key = self.get_key(fusion_id, snapshot_group_id)
+        with self._get_key_lock(key):
+            self._remove(key)
+        self._save_index()
+
+    def get(self, fusion_id: str, snapshot_group_id: str) -> Optional[Tuple[Path, Optional[Path]]]:
+        """
+        Look up a cached usdz, to place it where place() cannot, like a remote destination.
+        Args:
+            fusion_id (str): Fusion identifier.
+            snapshot_group_id (str): Snapshot group of the converted fusion.
+        Return:
+            (Path of the cached usdz, path of its thumbnail or None) if cached. Else None.
+        """
+        key = self.get_key(fusion_id, snapshot_group_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["last_used"] = time()
+
+        entry_path = self._cache_root / key
+        usdz_path = entry_path / entry["name"]
+        if not usdz_path.exists():
+            self._remove(key)
+            return None
+        thumbnail_path = entry_path / THUMBNAIL_FILE
+        self._save_index()
+        return (usdz_path, thumbnail_path if thumbnail_path.exists() else None)
+
+    def place(self, fusion_id: str, snapshot_group_id: str, dest_path: Path) -> Optional[Path]:
+        """
+        Place a cached usdz and its thumbnail into a local folder.
+        Args:
+            fusion_id (str): Fusion identifier.
+            snapshot_group_id (str): Snapshot group of the converted fusion.
+            dest_path (Path): Destination folder.
+        Return:
+            Path of the placed usdz if cached. Else None.
+        """
+        cached = self.get(fusion_id, snapshot_group_id)
+        if cached is None:
+            return None
+        (usdz_path, thumbnail_path) = cached
+
+        dest_usdz_path = dest_path / usdz_path.name
+        try:
+            dest_path.mkdir(parents=True, exist_ok=True)
+            self._link_or_copy(usdz_path, dest_usdz_path)
+            if thumbnail_path:
+                dest_thumbnail_dir_path = dest_path / ".thumbs" / "256x256"
+                dest_thumbnail_dir_path.mkdir(parents=True, exist_ok=True)
+                self._link_or_copy(thumbnail_path, dest_thumbnail_dir_path / f"{usdz_path.name}.png")
+        except OSError as e:
+            carb.log_warn(f"Failed to place cached {usdz_path.name} into {dest_path}: {e}")
+            return None
+        return dest_usdz_path
+
+    def put(self, fusion_id: str, snapshot_group_id: str, usdz_path: Path, thumbnail_path: Optional[Path] = None):
+        """
+        Add a converted usdz, and optionally its thumbnail, to the cache. Other snapshot groups of the fusion are
+        removed. Concurrent puts of the same entry run one after the other.
+        Args:
+            fusion_id (str): Fusion identifier.
+            snapshot_group_id (str): Snapshot group of the converted fusion.
+            usdz_path (Path): Converted usdz.
+            thumbnail_path (Path): Thumbnail of the usdz.
+        """
+        key = self.get_key(fusion_id, snapshot_group_id)
+        entry_path = self._cache_root / key
+        with self._get_key_lock(key):
+            try:
+                entry_path.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(usdz_path, entry_path / usdz_path.name)
+                size = (entry_path / usdz_path.name).stat().st_size
+                if thumbnail_path and thumbnail_path.exists():
+                    shutil.copy2(thumbnail_path, entry_path / THUMBNAIL_FILE)
+                    size += thumbnail_path.stat().st_size
+            except OSError as e:
+                carb.log_warn(f"Failed to cache {usdz_path}: {e}")
+                with self._lock:
+                    self._entries.pop(key, None)
+                shutil.rmtree(entry_path, ignore_errors=True)
+                return
+
+            with self._lock:
+                for (other_key, entry) in list(self._entries.items()):
+                    if entry["fusion_id"] == fusion_id and other_key != key:
+                        # Converted from an outdated snapshot group
+                        self._remove_locked(other_key)
+                self._entries[key] = {
+                    "fusion_id": fusion_id,
+                    "snapshot_group_id": snapshot_group_id,
+                    "name": usdz_path.name,
+                    "size": size,
+                    "last_used": time(),
+                }
+                self._evict_locked(keep=key)
+        self._save_index()
+
+    def _get_key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _evict_locked(self, keep: str) -> None:
+        """Remove least recently used entries until the cache fits max_size, with the lock held"""
+        total_size = sum(entry["size"] for entry in self._entries.values())
+        candidates = sorted(
+            (key for key in self._entries if key != keep), key=lambda key: self._entries[key]["last_used"]
+        )
+        for key in candidates:
+            if total_size <= self._max_size:
+                break
+            total_size -= self._entries[key]["size"]
+            self._remove_locked(key)
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            self._remove_locked(key)
+
+    def _remove_locked(self, key: str) -> None:
+        self._entries.pop(key, None)
+        shutil.rmtree(self._cache_root / key, ignore_errors=True)
+
+    @staticmethod
+    def _link_or_copy(source: Path, dest: Path) -> None:
+        if dest.exists():
+            dest.unlink()
+        try:
+            os.link(source, dest)
+        except OSError:
+            # Different file systems or no hardlink support
+            shutil.copy2(source, dest)
+
+    def _save_index(self):
+        with self._lock:
+            entries = dict(self._entries)
+        save_json_index(self._index_file, entries, indent=4)
+
+    def _load_index(self):
+        self._entries = load_json_index(self._index_file) or {}
@@ -21,12 +21,13 @@ from .hover_window import HoverWindow
 from .auth_dialog import AuthDialog
 from .download_progress_bar import DownloadProgressBar
 from .download_helper import DownloadHelper
+from .download_manager import DownloadJob, DownloadStatus, get_download_manager
 from .style import ICON_PATH
 
 import os
 import asyncio
 from pathlib import Path
-from typing import Optional, Dict, Tuple, Callable
+from typing import Awaitable, Optional, Dict, List, Tuple, Callable
 from functools import partial
 import webbrowser
 
@@ -34,6 +35,8 @@ CURRENT_PATH = Path(__file__).parent
 ICON_PATH = CURRENT_PATH.parent.parent.parent.joinpath("icons")
 
 SETTING_HOVER_WINDOW = "/exts/artec.asset.browser/hoverWindow"
+SETTING_PRECONVERT_MODE = "/exts/artec.asset.browser/preconvertMode"
+SETTING_PRECONVERT_DWELL = "/exts/artec.asset.browser/preconvertDwell"
 SETTING_MY_ASSET_FOLDERS = "/persistent/exts/omni.kit.browser.asset_provider.local/folders"
 SETTING_MY_ASSET_FOLDER_CHANGED = "/exts/omni.kit.browser.asset_provider.local/folderChanged"
 
@@ -58,6 +61,7 @@ class AssetDetailDelegate(DetailDelegate):
         self._context_menu: Optional[ui.Menu] = None
         self._action_item: Optional[AssetDetailItem] = None
         self._action_fusion: Optional[AssetFusion] = None
+        self._action_fusions: List[AssetFusion] = []
         self._vendor_container: Dict[AssetDetailItem, ui.ZStack] = {}
         self._hover_center_container: Dict[AssetDetailItem, ui.VStack] = {}
         self._hover_center_label: Dict[AssetDetailItem, ui.Label] = {}
@@ -94,9 +98,26 @@ class AssetDetailDelegate(DetailDelegate):
                 on_drop_fn=self._on_drop,
             )
 
+        # Pre-convert cloud fusions hovered or visible long enough, see ArtecCloudAssetProvider.preconvert
+        self._preconvert_mode = self._settings.get(SETTING_PRECONVERT_MODE) or "off"
+        self._preconvert_dwell = self._settings.get(SETTING_PRECONVERT_DWELL) or 0
+        self._preconvert_tasks: Dict[str, asyncio.Future] = {}
+        # Thumbnails of the items waiting for their dwell, to check they are still in view
+        self._preconvert_widgets: Dict[str, ui.Widget] = {}
+        self._scrolling_frame: Optional[ui.ScrollingFrame] = None
+
         self._download_helper = DownloadHelper()
+        self._download_manager = get_download_manager()
+        self._download_sub = None
+        if self._download_manager:
+            self._download_sub = self._download_manager.subscribe(self._on_download_job_changed)
 
     def destroy(self):
+        if self._download_sub is not None:
+            self._download_manager.unsubscribe(self._download_sub)
+            self._download_sub = None
+        self.cancel_preconversions()
+        self._scrolling_frame = None
         self._drop_helper = None
         if self._pick_folder_dialog is not None:
             self._pick_folder_dialog.destroy()
@@ -198,18 +219,24 @@ class AssetDetailDelegate(DetailDelegate):
             if item.asset_type == AssetType.EXTERNAL_LINK:
                 webbrowser.open(item.asset_model["product_url"])
             elif item.asset_type == AssetType.DOWNLOAD:
-                fusion = AssetFusion(item, item.asset_model['name'],
-                                     item.asset_model['download_url'],
-                                     item.asset_model["thumbnail"])
-                self.download_fusion(fusion)
+                self.download_fusion(self._create_fusion(item))
             elif item.asset_type == AssetType.NORMAL:
                 return super().on_double_click(item)
         else:
             if self._on_request_more_fn:
                 self._on_request_more_fn()
 
+    @staticmethod
+    def _create_fusion(item: AssetDetailItem) -> AssetFusion:
+        return AssetFusion(item, item.asset_model['name'],
+                           item.asset_model['download_url'],
+                           item.asset_model["thumbnail"])
+
     def download_fusion(self, fusion: AssetFusion) -> None:
-        if fusion in self._download_progress_bar and self._download_progress_bar[fusion].visible:
+        if self._download_manager and any(
+            fusion.url in (job_fusion.url for job_fusion in job.fusions)
+            for job in self._download_manager.active_jobs
+        ):
             # Already downloading, do nothing
             return
         self._download_fusion_asset(fusion)
@@ -219,8 +246,11 @@ class AssetDetailDelegate(DetailDelegate):
         self._action_item = item
         if isinstance(item, AssetDetailItem):
             show_web = item.asset_model.get("product_url", "") != ""
+            project_fusions = self._model.get_project_fusions(item)
+            show_download_project = len(project_fusions) > 1
+            download_job = self._get_download_job(item)
 
-            if show_web:
+            if show_web or show_download_project or download_job:
                 self._context_menu = ui.Menu("Asset browser context menu")
                 with self._context_menu:
                     if show_web:
@@ -228,8 +258,33 @@ class AssetDetailDelegate(DetailDelegate):
                             "Open in Web Browser",
                             triggered_fn=partial(webbrowser.open, item.asset_model["product_url"]),
                         )
+                    if show_download_project:
+                        ui.MenuItem(
+                            f"Download All Project Fusions ({len(project_fusions)})",
+                            triggered_fn=partial(self.download_fusions, project_fusions),
+                        )
+                    if download_job:
+                        self._build_download_job_menu(download_job)
                 self._context_menu.show()
 
+    def _build_download_job_menu(self, job: DownloadJob) -> None:
+        if job.status == DownloadStatus.PAUSED:
+            ui.MenuItem("Resume Download", triggered_fn=partial(self._download_manager.resume, job))
+        else:
+            ui.MenuItem("Pause Download", triggered_fn=partial(self._download_manager.pause, job))
+        ui.MenuItem("Cancel Download", triggered_fn=partial(self._download_manager.cancel, job))
+
+    def download_fusions(self, fusions: List[AssetFusion]) -> None:
+        """Download several fusions into one folder as a single job"""
+        if self._download_manager:
+            downloading_urls = set()
+            for job in self._download_manager.active_jobs:
+                downloading_urls.update(fusion.url for fusion in job.fusions)
+            fusions = [fusion for fusion in fusions if fusion.url not in downloading_urls]
+        if not fusions:
+            return
+        self._select_download_folder(fusions)
+
     def build_thumbnail(self, item: AssetDetailItem, container: ui.Widget = None) -> Optional[ui.Image]:
         if not container:
             container = ui.ZStack()
@@ -239,8 +294,9 @@ class AssetDetailDelegate(DetailDelegate):
                 item.url = self._draggable_urls[item.uid]
                 item.asset_type = AssetType.NORMAL
 
+        thumbnail_fetch = self._get_thumbnail_fetch(item)
         with container:
-            thumbnail = self.get_thumbnail(item)
+            thumbnail = self.get_thumbnail(item) if thumbnail_fetch is None or item.thumbnail_cached else ""
             image = ui.Image(
                 thumbnail or "",
                 fill_policy=ui.FillPolicy.PRESERVE_ASPECT_FIT
@@ -248,6 +304,8 @@ class AssetDetailDelegate(DetailDelegate):
                 else ui.FillPolicy.PRESERVE_ASPECT_CROP,
                 style_type_name_override="GridView.Image",
             )
+            if thumbnail_fetch is not None:
+                asyncio.ensure_future(self._set_fetched_thumbnail(item, image, thumbnail_fetch))
             if isinstance(item, MoreDetailItem):
                 self.more_item_image = image
 
@@ -261,12 +319,50 @@ class AssetDetailDelegate(DetailDelegate):
             # For displaying download progress over the thumbnail
             self._download_progress_bar[item] = DownloadProgressBar()
 
+            if self._preconvert_mode == "visible":
+                self._schedule_preconversion(item, image)
+
             # Selection rectangle
             ui.Rectangle(style_type_name_override="GridView.Item.Selection")
 
         return image
 
+    def _get_thumbnail_fetch(self, item: DetailItem) -> Optional[Awaitable[Optional[str]]]:
+        """Switch cloud previews to their cached copy, return the fetch (or revalidation) of the preview if any"""
+        if not isinstance(item, AssetDetailItem) or item.asset_model["vendor"] != self._model.artec_cloud_provider_id:
+            return None
+        preview_url = item.asset_model["thumbnail"]
+        if not preview_url or not preview_url.startswith("http"):
+            return None
+        store = self._model.artec_cloud_provider()
+        if store is None:
+            return None
+        cached_path = store.get_cached_thumbnail(item.uid, preview_url)
+        if cached_path:
+            item.thumbnail = cached_path
+            item.thumbnail_cached = True
+        return store.fetch_thumbnail(item.uid, preview_url)
+
+    async def _set_fetched_thumbnail(
+        self, item: AssetDetailItem, image: ui.Image, thumbnail_fetch: Awaitable[Optional[str]]
+    ) -> None:
+        thumbnail = await thumbnail_fetch
+        if thumbnail is None:
+            # Let the image load the preview by itself
+            thumbnail = item.asset_model["thumbnail"]
+        else:
+            item.thumbnail_cached = True
+        if thumbnail != image.source_url:
+            item.thumbnail = thumbnail
+            image.source_url = thumbnail
+
     def on_hover(self, item: DetailItem, hovered: bool) -> None:
+        if self._preconvert_mode == "hover":
+            if hovered:
+                self._schedule_preconversion(item)
+            else:
+                self._cancel_preconversion(item)
+
         if not self._enable_hovered:
             return
 
@@ -299,6 +395,60 @@ class AssetDetailDelegate(DetailDelegate):
                     ASSET_PROVIDER_ICON_SIZE * self._asset_type_image_multiple
                 )
 
+    def set_scrolling_frame(self, scrolling_frame: ui.ScrollingFrame) -> None:
+        """Set the frame the detail items scroll in, items out of its view are not pre-converted"""
+        self._scrolling_frame = scrolling_frame
+
+    def cancel_preconversions(self, hidden_only: bool = False) -> None:
+        """
+        Cancel pre-conversions still waiting for their dwell.
+        Args:
+            hidden_only (bool): Only cancel those of items scrolled out of view.
+        """
+        for uid in list(self._preconvert_tasks):
+            if hidden_only and self._is_in_view(self._preconvert_widgets.get(uid)):
+                continue
+            self._preconvert_tasks.pop(uid).cancel()
+            self._preconvert_widgets.pop(uid, None)
+
+    def _is_in_view(self, widget: Optional[ui.Widget]) -> bool:
+        frame = self._scrolling_frame
+        if widget is None or frame is None:
+            return True
+        try:
+            top = widget.screen_position_y
+            bottom = top + widget.computed_height
+            return bottom > frame.screen_position_y and top < frame.screen_position_y + frame.computed_height
+        except AttributeError:
+            # Kit without screen positions
+            return True
+
+    def _schedule_preconversion(self, item: DetailItem, widget: Optional[ui.Widget] = None) -> None:
+        if not isinstance(item, AssetDetailItem) or item.asset_type != AssetType.DOWNLOAD:
+            return
+        if item.asset_model["vendor"] != self._model.artec_cloud_provider_id or item.uid in self._preconvert_tasks:
+            return
+        store = self._model.artec_cloud_provider()
+        if store is None or not store.authorized():
+            return
+        self._preconvert_tasks[item.uid] = asyncio.ensure_future(self._preconvert_after_dwell(item, store))
+        if widget is not None:
+            self._preconvert_widgets[item.uid] = widget
+
+    def _cancel_preconversion(self, item: DetailItem) -> None:
+        uid = getattr(item, "uid", None)
+        self._preconvert_widgets.pop(uid, None)
+        task = self._preconvert_tasks.pop(uid, None)
+        if task:
+            task.cancel()
+
+    async def _preconvert_after_dwell(self, item: AssetDetailItem, store) -> None:
+        await asyncio.sleep(self._preconvert_dwell)
+        self._preconvert_tasks.pop(item.uid, None)
+        if not self._is_in_view(self._preconvert_widgets.pop(item.uid, None)):
+            return
+        store.preconvert(self._create_fusion(item))
+
     def _build_label(self, item: AssetDetailItem, container: ui.Widget = None) -> ui.Widget:
         """
         Display label per detail item
@@ -441,8 +591,13 @@ class AssetDetailDelegate(DetailDelegate):
         self.select_fusion_download_folder(fusion)
 
     def select_fusion_download_folder(self, fusion: AssetFusion):
-        self._action_item = fusion.asset
-        self._action_fusion = fusion
+        self._select_download_folder([fusion])
+
+    def _select_download_folder(self, fusions: List[AssetFusion]) -> None:
+        # Fusions are recorded before the dialog shows, it may apply at once
+        self._action_item = fusions[0].asset
+        self._action_fusion = fusions[0]
+        self._action_fusions = fusions
         if self._pick_folder_dialog is None:
             self._pick_folder_dialog = self._create_filepicker(
                 "Select Directory to Download Asset", click_apply_fn=self._on_fusion_folder_picked, dir_only=True
@@ -487,42 +642,51 @@ class AssetDetailDelegate(DetailDelegate):
         return dialog
 
     def _on_fusion_folder_picked(self, url: Optional[str]) -> None:
-        fusion = self._action_fusion
-        if url is not None:
+        fusions = self._action_fusions
+        if url is not None and fusions:
             self._pick_folder_dialog.set_current_directory(url)
-            asyncio.ensure_future(
-                self._model.download_fusion_async(
-                    fusion,
-                    fusion.asset.asset_model,
-                    url,
-                    callback=partial(self._on_fusion_asset_downloaded, fusion.asset),
-                    on_progress_fn=partial(self._on_fusion_download_progress, fusion.asset),
-                    on_prepared_fn=lambda: self._on_fusion_asset_prepared(fusion.asset)
-                )
-            )
-
-        if self._download_progress_bar.get(fusion.asset):
-            self._download_progress_bar[fusion.asset].visible = True
+            if self._download_manager:
+                self._download_manager.enqueue_many(fusions, url)
+
+    def _get_download_job(self, item: AssetDetailItem) -> Optional[DownloadJob]:
+        """Unfinished download job of the item, if any"""
+        if not self._download_manager:
+            return None
+        for job in self._download_manager.active_jobs:
+            if any(fusion.asset.uid == item.uid for fusion in job.fusions):
+                return job
+        return None
 
-        if fusion.asset in self._hover_center_label:
-            self._hover_label[fusion.asset].text = "Preparing"
-        if fusion.asset in self._hover_label:
-            self._hover_center_label[fusion.asset].text = "Preparing"
+    def _get_download_items(self, job: DownloadJob) -> List[AssetDetailItem]:
+        # Items are rebuilt with the view, match them by fusion identifier
+        uids = {fusion.asset.uid for fusion in job.fusions}
+        return [item for item in self._download_progress_bar if getattr(item, "uid", None) in uids]
+
+    def _on_download_job_changed(self, job: DownloadJob) -> None:
+        if job.status == DownloadStatus.COMPLETED:
+            self._add_to_my_assets(job.result["url"])
+
+        for item in self._get_download_items(job):
+            if job.status in (DownloadStatus.QUEUED, DownloadStatus.RUNNING):
+                if not self._download_progress_bar[item].visible:
+                    self._download_progress_bar[item].visible = True
+                self._download_progress_bar[item].progress = job.progress
+                self._set_download_tips(item, "Downloading" if job.prepared else "Preparing")
+            elif job.status == DownloadStatus.PAUSED:
+                self._set_download_tips(item, "Paused")
+            else:
+                self._on_fusion_asset_downloaded(item, job.result or {})
 
-    def _on_fusion_asset_prepared(self, item: AssetDetailItem):
-        if item in self._hover_center_label:
-            self._hover_label[item].text = "Downloading"
+    def _set_download_tips(self, item: AssetDetailItem, text: str) -> None:
         if item in self._hover_label:
-            self._hover_center_label[item].text = "Downloading"
-
-    def _on_fusion_download_progress(self, item: AssetDetailItem, progress: float) -> None:
-        if item in self._download_progress_bar:
-            self._download_progress_bar[item].progress = progress
+            self._hover_label[item].text = text
+        if item in self._hover_center_label:
+            self._hover_center_label[item].text = text
 
     def _on_fusion_asset_downloaded(self, item: AssetDetailItem, results: Dict):
-        self._add_to_my_assets(results["url"])
         if self._download_progress_bar.get(item):
             self._download_progress_bar[item].visible = False
+        self._set_download_tips(item, ASSET_TIPS[AssetType.DOWNLOAD])
 
         if results.get("status") != omni.client.Result.OK:
             return
@@ -537,11 +701,6 @@ class AssetDetailDelegate(DetailDelegate):
         if url:
             asyncio.ensure_future(delayed_item_changed(self._model, item))
 
-        if item in self._hover_center_label:
-            self._hover_label[item].text = ASSET_TIPS[AssetType.DOWNLOAD]
-        if item in self._hover_label:
-            self._hover_center_label[item].text = ASSET_TIPS[AssetType.DOWNLOAD]
-
     async def _download_thumbnail(self, item: AssetDetailItem, dest_url: str):
         """Copies the thumbnail for the given asset to the .thumbs subdir."""
         if not (item and dest_url):
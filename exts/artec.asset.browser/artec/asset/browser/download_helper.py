@@ -70,6 +70,16 @@ class DownloadHelper:
         
         return None
             
+    def get_recorded_url(self, asset: AssetModel) -> Optional[str]:
+        """
+        Query the url an asset was recorded as downloaded to, without checking that it still exists.
+        Args:
+            asset (AssetModel): Asset model to query
+        Return:
+            Recorded url if any. Else None.
+        """
+        return self._download_stats.get(asset["vendor"], {}).get(asset["identifier"])
+
     def save_download_asset(self, asset: AssetModel, url: str) -> None:
         """
         Save asset local downloaded url
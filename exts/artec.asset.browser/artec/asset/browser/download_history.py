@@ -0,0 +1,212 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import itertools
+import statistics
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from time import time
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+import carb
+
+
+class DownloadStatus(Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    PAUSED = "Paused"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+    CANCELLED = "Cancelled"
+
+
+class DownloadPhase:
+    # Waiting in a download queue or for a download slot
+    QUEUE = "queue"
+    # Server conversion request
+    REQUEST = "request"
+    # Waiting for the server conversion
+    CONVERSION = "conversion"
+    TRANSFER = "transfer"
+    EXTRACT = "extract"
+    # Local OBJ to USD conversion
+    CONVERT = "convert"
+    PACKAGE = "package"
+    # Copy of the package to a remote destination
+    UPLOAD = "upload"
+    THUMBNAIL = "thumbnail"
+
+
+# Phases of a download, in pipeline order
+PHASES = (
+    DownloadPhase.QUEUE,
+    DownloadPhase.REQUEST,
+    DownloadPhase.CONVERSION,
+    DownloadPhase.TRANSFER,
+    DownloadPhase.EXTRACT,
+    DownloadPhase.CONVERT,
+    DownloadPhase.PACKAGE,
+    DownloadPhase.UPLOAD,
+    DownloadPhase.THUMBNAIL,
+)
+
+
+@dataclass
+class PhaseTiming:
+    # Seconds from the start of the download
+    started_at: float = 0.0
+    duration: float = 0.0
+    # Bytes handled by the phase: transferred, extracted, packaged or uploaded
+    byte_count: int = 0
+
+
+@dataclass
+class DownloadRecord:
+    """Timings of one fusion download"""
+    name: str
+    url: str
+    dest_url: str
+    started_at: float = field(default_factory=time)
+    finished_at: Optional[float] = None
+    status: Optional[DownloadStatus] = None
+    # Placed from the converted asset cache, no other phase ran
+    cache_hit: bool = False
+    phases: Dict[str, PhaseTiming] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time()) - self.started_at
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseTiming]:
+        """Time a phase. A phase entered several times accumulates its durations."""
+        started_at = time()
+        timing = self.phases.setdefault(name, PhaseTiming(started_at=started_at - self.started_at))
+        try:
+            yield timing
+        finally:
+            timing.duration += time() - started_at
+
+    def add_phase(self, name: str, duration: float, byte_count: int = 0) -> None:
+        """Record a phase which was not timed by phase(), like time queued before the download started."""
+        timing = self.phases.setdefault(name, PhaseTiming(started_at=-duration))
+        timing.duration += duration
+        timing.byte_count += byte_count
+
+    def finish(self, status: DownloadStatus) -> None:
+        self.finished_at = time()
+        self.status = status
+
+    def get_summary(self) -> str:
+        parts = []
+        for name in PHASES:
+            timing = self.phases.get(name)
+            if timing is None:
+                continue
+            part = f"{name} {timing.duration:.2f}s"
+            if timing.byte_count:
+                part += f" {timing.byte_count / 1024 / 1024:.1f}MB"
+            parts.append(part)
+        source = "converted asset cache" if self.cache_hit else ", ".join(parts)
+        status = self.status.value if self.status else "Running"
+        return f"{self.name}: {status} in {self.duration:.2f}s ({source})"
+
+
+class DownloadHistory:
+    """
+    Rolling history of the latest downloads with their phase timings.
+    Args:
+        max_records (int): Number of downloads kept.
+    """
+
+    def __init__(self, max_records: int = 100):
+        self._records: Deque[DownloadRecord] = deque(maxlen=max(1, max_records))
+        self._subscribers: Dict[int, Callable[[DownloadRecord], None]] = {}
+        self._subscriber_ids = itertools.count()
+
+    def destroy(self):
+        self._subscribers = {}
+
+    @property
+    def records(self) -> List[DownloadRecord]:
+        """Recorded downloads, oldest first"""
+        return list(self._records)
+
+    def add(self, record: DownloadRecord) -> None:
+        self._records.append(record)
+        carb.log_info(f"Download {record.get_summary()}")
+        for on_record_fn in list(self._subscribers.values()):
+            try:
+                on_record_fn(record)
+            except Exception:
+                carb.log_error(traceback.format_exc())
+
+    def clear(self) -> None:
+        self._records.clear()
+
+    def subscribe(self, on_record_fn: Callable[[DownloadRecord], None]) -> int:
+        """
+        Subscribe to recorded downloads.
+        Args:
+            on_record_fn (Callable): Called with every finished download record.
+        Return:
+            Subscription id, to be passed to unsubscribe.
+        """
+        subscription_id = next(self._subscriber_ids)
+        self._subscribers[subscription_id] = on_record_fn
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> None:
+        self._subscribers.pop(subscription_id, None)
+
+    def get_phase_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregate phase timings of the recorded downloads, cache hits excluded.
+        Return:
+            Phase name => {"count", "median", "max", "total", "bytes"}, in pipeline order.
+        """
+        stats = {}
+        records = [record for record in self._records if not record.cache_hit]
+        for name in PHASES:
+            timings = [record.phases[name] for record in records if name in record.phases]
+            if not timings:
+                continue
+            durations = [timing.duration for timing in timings]
+            stats[name] = {
+                "count": len(durations),
+                "median": statistics.median(durations),
+                "max": max(durations),
+                "total": sum(durations),
+                "bytes": sum(timing.byte_count for timing in timings),
+            }
+        return stats
+
+    def get_summary(self) -> str:
+        records = self.records
+        if not records:
+            return "No downloads recorded"
+        cache_hits = sum(1 for record in records if record.cache_hit)
+        lines = [f"{len(records)} downloads, {cache_hits} from the converted asset cache"]
+        stats = self.get_phase_stats()
+        all_total = sum(phase_stats["total"] for phase_stats in stats.values()) or 1
+        for name, phase_stats in stats.items():
+            line = (
+                f"  {name:<11} median {phase_stats['median']:7.2f}s  max {phase_stats['max']:7.2f}s  "
+                f"{phase_stats['total'] / all_total:4.0%} of time"
+            )
+            if phase_stats["bytes"]:
+                # Throughput over the phase time, bytes are only counted by transfer, extract, package and upload
+                line += f"  {phase_stats['bytes'] / max(phase_stats['total'], 1e-6) / 1024 / 1024:.1f}MB/s"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def log_summary(self) -> None:
+        carb.log_info(f"Download history:\n{self.get_summary()}")
@@ -0,0 +1,297 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import inspect
+import itertools
+import traceback
+from dataclasses import dataclass, field
+from time import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import carb
+import omni.client
+from artec.services.browser.asset import get_instance as get_asset_services
+
+from .download_history import DownloadStatus
+from .models.asset_fusion import AssetFusion
+
+FINISHED_STATUSES = (DownloadStatus.COMPLETED, DownloadStatus.FAILED, DownloadStatus.CANCELLED)
+
+
+@dataclass(eq=False)
+class DownloadJob:
+    fusion: AssetFusion
+    dest_url: str
+    priority: int = 0
+    status: DownloadStatus = DownloadStatus.QUEUED
+    progress: float = 0.0
+    prepared: bool = False
+    result: Optional[Dict] = None
+    created_at: float = field(default_factory=time)
+    # Last time the job was queued, when created or resumed
+    queued_at: float = field(default_factory=time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # All fusions of the job. Batch jobs download several fusions into dest_url, fusion is then the first of them
+    fusions: Tuple[AssetFusion, ...] = ()
+
+    def __post_init__(self):
+        if not self.fusions:
+            self.fusions = (self.fusion,)
+
+    @property
+    def vendor(self) -> str:
+        return self.fusion.asset.asset_model["vendor"]
+
+    @property
+    def is_batch(self) -> bool:
+        return len(self.fusions) > 1
+
+    @property
+    def name(self) -> str:
+        return f"{len(self.fusions)} fusions" if self.is_batch else self.fusion.name
+
+    @property
+    def key(self) -> Tuple:
+        if self.is_batch:
+            return (self.vendor, tuple(fusion.url for fusion in self.fusions), self.dest_url)
+        return (self.vendor, self.fusion.url, self.dest_url)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+
+class DownloadManager:
+    """
+    Queue of fusion downloads shared by every browser window.
+    Jobs are run by a bounded pool of workers, highest priority first and in submission order for equal priorities.
+    Identical requests (same vendor, fusion and destination) are merged into one job. Jobs could be paused, resumed
+    and cancelled, and subscribers are notified whenever a job changes.
+    Args:
+        max_concurrent (int): Maximum number of downloads running at the same time.
+    """
+
+    def __init__(self, max_concurrent: int = 2):
+        self._max_concurrent = max(1, max_concurrent)
+        self._jobs: List[DownloadJob] = []
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Future] = []
+        self._running: Dict[DownloadJob, asyncio.Future] = {}
+        self._sequence = itertools.count()
+        self._subscribers: Dict[int, Callable[[DownloadJob], None]] = {}
+        self._subscriber_ids = itertools.count()
+        self._destroyed = False
+
+    def destroy(self):
+        self._destroyed = True
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        for job in list(self._running):
+            self.cancel(job)
+        self._subscribers = {}
+
+    @property
+    def jobs(self) -> List[DownloadJob]:
+        """All jobs known by the manager, in submission order."""
+        return list(self._jobs)
+
+    @property
+    def active_jobs(self) -> List[DownloadJob]:
+        return [job for job in self._jobs if not job.finished]
+
+    def subscribe(self, on_job_changed_fn: Callable[[DownloadJob], None]) -> int:
+        """
+        Subscribe to job changes.
+        Args:
+            on_job_changed_fn (Callable): Called with the job whenever its status or progress changes.
+        Return:
+            Subscription id, to be passed to unsubscribe.
+        """
+        subscription_id = next(self._subscriber_ids)
+        self._subscribers[subscription_id] = on_job_changed_fn
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> None:
+        self._subscribers.pop(subscription_id, None)
+
+    def enqueue(self, fusion: AssetFusion, dest_url: str, priority: int = 0) -> DownloadJob:
+        """
+        Request a fusion download.
+        Args:
+            fusion (AssetFusion): Fusion to download.
+            dest_url (str): Destination folder.
+            priority (int): Jobs with higher priority start first.
+        Return:
+            The new job, or the unfinished job already downloading the same fusion to the same folder.
+        """
+        return self._enqueue(DownloadJob(fusion, dest_url, priority=priority))
+
+    def enqueue_many(self, fusions: List[AssetFusion], dest_url: str, priority: int = 0) -> DownloadJob:
+        """
+        Request the download of several fusions of the same vendor into one folder, as a single job.
+        Args:
+            fusions (List[AssetFusion]): Fusions to download.
+            dest_url (str): Destination folder.
+            priority (int): Jobs with higher priority start first.
+        Return:
+            The new job, or the unfinished job already downloading the same fusions to the same folder.
+        """
+        if len(fusions) == 1:
+            return self.enqueue(fusions[0], dest_url, priority=priority)
+        return self._enqueue(DownloadJob(fusions[0], dest_url, priority=priority, fusions=tuple(fusions)))
+
+    def _enqueue(self, job: DownloadJob) -> DownloadJob:
+        priority = job.priority
+        for existing_job in self.active_jobs:
+            if existing_job.key == job.key:
+                if priority > existing_job.priority and existing_job.status == DownloadStatus.QUEUED:
+                    existing_job.priority = priority
+                    self._put(existing_job)
+                return existing_job
+
+        self._jobs.append(job)
+        self._put(job)
+        self._notify(job)
+        return job
+
+    def pause(self, job: DownloadJob) -> None:
+        """Pause a queued or running job. A running job is stopped and starts over when resumed."""
+        if job.status == DownloadStatus.QUEUED:
+            self._set_status(job, DownloadStatus.PAUSED)
+        elif job.status == DownloadStatus.RUNNING:
+            self._set_status(job, DownloadStatus.PAUSED)
+            self._running[job].cancel()
+
+    def resume(self, job: DownloadJob) -> None:
+        if job.status == DownloadStatus.PAUSED:
+            job.progress = 0.0
+            job.prepared = False
+            job.queued_at = time()
+            self._set_status(job, DownloadStatus.QUEUED)
+            self._put(job)
+
+    def cancel(self, job: DownloadJob) -> None:
+        if job.finished:
+            return
+        running = self._running.get(job)
+        job.finished_at = time()
+        self._set_status(job, DownloadStatus.CANCELLED)
+        if running:
+            running.cancel()
+
+    def clear_finished(self) -> None:
+        """Forget finished jobs."""
+        self._jobs = self.active_jobs
+
+    def _put(self, job: DownloadJob) -> None:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self._max_concurrent:
+            self._workers.append(asyncio.ensure_future(self._worker()))
+        # Entries of jobs which were paused, cancelled or re-prioritized are skipped when popped
+        self._queue.put_nowait((-job.priority, next(self._sequence), job.priority, job))
+
+    async def _worker(self) -> None:
+        while True:
+            (_, _, priority, job) = await self._queue.get()
+            if job.status != DownloadStatus.QUEUED or priority != job.priority:
+                continue
+            download_future = asyncio.ensure_future(self._run(job))
+            self._running[job] = download_future
+            try:
+                await download_future
+            except asyncio.CancelledError:
+                # Cancelling the worker cancels the awaited download too, which then looks like a paused job
+                if self._destroyed or not download_future.cancelled():
+                    # Worker itself is cancelled
+                    download_future.cancel()
+                    raise
+            finally:
+                self._running.pop(job, None)
+
+    async def _run(self, job: DownloadJob) -> None:
+        job.started_at = time()
+        self._set_status(job, DownloadStatus.RUNNING)
+
+        def __on_progress(progress: float) -> None:
+            job.progress = progress
+            self._notify(job)
+
+        def __on_prepared() -> None:
+            job.prepared = True
+            self._notify(job)
+
+        asset_services = get_asset_services()
+        store = asset_services.get_store(job.vendor) if asset_services else None
+        if store is None:
+            job.result = {"url": None, "status": omni.client.Result.ERROR}
+        else:
+            try:
+                if job.is_batch:
+                    download_fn = store.download_many
+                    target = list(job.fusions)
+                else:
+                    download_fn = store.download
+                    target = job.fusion
+                job.result = await download_fn(
+                    target,
+                    job.dest_url,
+                    on_progress_fn=__on_progress,
+                    timeout=600,
+                    **self._get_supported_kwargs(
+                        download_fn, on_prepared_fn=__on_prepared, queued_at=job.queued_at
+                    ),
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                carb.log_error(f"Failed to download {job.name}: {traceback.format_exc()}")
+                job.result = {"url": None, "status": omni.client.Result.ERROR}
+
+        job.finished_at = time()
+        if job.result.get("status") == omni.client.Result.OK:
+            self._set_status(job, DownloadStatus.COMPLETED)
+        else:
+            carb.log_warn(f"Failed to download {job.name} from {job.vendor}.")
+            self._set_status(job, DownloadStatus.FAILED)
+
+    @staticmethod
+    def _get_supported_kwargs(download_fn: Callable, **kwargs) -> Dict:
+        """Keep the optional arguments a store download method accepts, stores only share on_progress_fn and timeout"""
+        parameters = inspect.signature(download_fn).parameters
+        if any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+            return kwargs
+        return {name: value for name, value in kwargs.items() if name in parameters}
+
+    def _set_status(self, job: DownloadJob, status: DownloadStatus) -> None:
+        job.status = status
+        self._notify(job)
+
+    def _notify(self, job: DownloadJob) -> None:
+        for on_job_changed_fn in list(self._subscribers.values()):
+            try:
+                on_job_changed_fn(job)
+            except Exception:
+                carb.log_error(traceback.format_exc())
+
+
+_download_manager: Optional[DownloadManager] = None
+
+
+def get_download_manager() -> Optional[DownloadManager]:
+    """Return the download manager of the running extension."""
+    return _download_manager
+
+
+def set_download_manager(download_manager: Optional[DownloadManager]) -> None:
+    global _download_manager
+    _download_manager = download_manager
@@ -8,21 +8,30 @@
 #
 # Forked from AssetStore class AssetStoreExtension
 
+import carb.settings
 import omni.ext
 import omni.kit.ui
 
 from .window import ArtecCloudWindow, ARTEC_CLOUD_WINDOW_NAME
 from .artec_cloud import ArtecCloudAssetProvider
+from .download_manager import DownloadManager, set_download_manager
 from artec.services.browser.asset import get_instance as get_asset_services
 from artec.services.browser.asset.store.local.local import LocalFolderAssetProvider
 
 ARTEC_CLOUD_BROWSER_MENU_PATH = "Window/Browsers/" + ARTEC_CLOUD_WINDOW_NAME
+SETTING_MAX_CONCURRENT_DOWNLOADS = "/exts/artec.asset.browser/maxConcurrentDownloads"
 _extension_instance = None
 
 
 class ArtecAssetBrowserExtension(omni.ext.IExt):
     def on_startup(self, ext_id):
         self._window = None
+        # Downloads outlive the browser window
+        self._download_manager = DownloadManager(
+            carb.settings.get_settings().get_as_int(SETTING_MAX_CONCURRENT_DOWNLOADS)
+        )
+        set_download_manager(self._download_manager)
+
         self._menu = omni.kit.ui.get_editor_menu().add_item(
             ARTEC_CLOUD_BROWSER_MENU_PATH, self._on_click, toggle=True, value=True
         )
@@ -42,6 +51,10 @@ class ArtecAssetBrowserExtension(omni.ext.IExt):
         _extension_instance
 
     def on_shutdown(self):
+        set_download_manager(None)
+        self._download_manager.destroy()
+        self._download_manager = None
+
         self._asset_service.unregister_store(self._asset_provider)
         self._asset_service.unregister_store(self._asset_provider_local)
         self._asset_provider = None
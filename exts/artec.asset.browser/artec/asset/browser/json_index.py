@@ -0,0 +1,55 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+import carb
+
+
+def save_json_index(index_file: Path, data: Any, indent: Optional[int] = None) -> bool:
+    """
+    Write the index of a local cache, creating its folder. Failures are logged, the cache keeps working in memory.
+    Args:
+        index_file (Path): JSON file to write.
+        data (Any): JSON serializable content.
+        indent (int): Indentation of the file, None for a compact one.
+    Return:
+        True if the file is written.
+    """
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(index_file, "w") as json_file:
+            json.dump(data, json_file, indent=indent)
+        return True
+    except PermissionError:
+        carb.log_warn(f"Cannot write to {index_file}: permission denied!")
+    except Exception as exc:
+        carb.log_warn(f"Unknown failure to write to {index_file}: {exc}")
+    return False
+
+
+def load_json_index(index_file: Path) -> Optional[Any]:
+    """
+    Read the index of a local cache.
+    Args:
+        index_file (Path): JSON file to read.
+    Return:
+        Content of the file, None if it does not exist or cannot be read.
+    """
+    try:
+        with open(index_file, "r") as json_file:
+            return json.load(json_file)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        carb.log_error(f"Cannot read {index_file}: permission denied!")
+    except Exception as exc:
+        carb.log_error(f"Unknown failure to read {index_file}: {exc}")
+    return None
@@ -9,6 +9,8 @@
 # Forked from AssetStore AssetType, AssetDetailItem, MoreDetailItem, SearchingDetailItem
 
 import re
+from typing import Optional
+
 import omni.client
 from artec.services.browser.asset import AssetModel
 from omni.kit.browser.core import DetailItem
@@ -41,18 +43,62 @@ ASSET_TIPS = {
 
 class AssetDetailItem(DetailItem):
     def __init__(self, asset_model: AssetModel):
-        self._local_url = DownloadHelper().get_download_url(asset_model)
+        # Url recorded by the download helper, the local url is only checked again when it changes
+        self._recorded_url: Optional[str] = None
+        self._local_url = self._get_local_url(asset_model)
         super().__init__(
             asset_model["name"],
             self._local_url if self._local_url else asset_model["download_url"],
             thumbnail=asset_model["thumbnail"]
         )
         self.uid = asset_model["identifier"]
+        # Whether thumbnail is a local copy from the preview cache
+        self.thumbnail_cached = False
         self.user = asset_model["user"]
         self.asset_model = asset_model
 
         self._get_type()
 
+    def update(self, asset_model: AssetModel) -> bool:
+        """
+        Patch the item with a newer model of the same asset, keeping what the browser set on it if still valid.
+        Args:
+            asset_model (AssetModel): Model with the same vendor and identifier.
+        Return:
+            True if the item changed.
+        """
+        recorded_url = DownloadHelper().get_recorded_url(asset_model)
+        if asset_model == self.asset_model and recorded_url == self._recorded_url:
+            return False
+
+        previous_model = self.asset_model
+        previous_local_url = self._local_url
+        self.asset_model = asset_model
+        self._local_url = self._get_local_url(asset_model)
+        self.user = asset_model["user"]
+        if asset_model["name"] != previous_model["name"]:
+            self.name = asset_model["name"]
+            if hasattr(self, "name_model"):
+                self.name_model.set_value(self.name)
+        if asset_model["thumbnail"] != previous_model["thumbnail"]:
+            self.thumbnail = asset_model["thumbnail"]
+            self.thumbnail_cached = False
+        if (
+            self._local_url != previous_local_url
+            or asset_model["download_url"] != previous_model["download_url"]
+            or asset_model["product_url"] != previous_model["product_url"]
+        ):
+            self.url = self._local_url if self._local_url else asset_model["download_url"]
+            self._get_type()
+        return True
+
+    def _get_local_url(self, asset_model: AssetModel) -> Optional[str]:
+        download_helper = DownloadHelper()
+        local_url = download_helper.get_download_url(asset_model)
+        # Read after the check, which drops downloads that no longer exist from the records
+        self._recorded_url = download_helper.get_recorded_url(asset_model)
+        return local_url
+
     @property
     def tips(self) -> str:
         return ASSET_TIPS[self.asset_type]
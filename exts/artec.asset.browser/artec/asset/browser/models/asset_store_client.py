@@ -77,6 +77,35 @@ class AssetStoreClient:
 
         return (assets, to_continue)
 
+    async def _search_merged_async(
+        self,
+        category: Optional[str],
+        search_words: Optional[List[str]] = None,
+        sort=["name", "asc"],
+        page_size=100,
+        providers=None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[AssetModel], Optional[str]]:
+        """
+        Search providers as one listing, ordered across providers.
+        Args:
+            cursor (str): Cursor returned with the previous page, None for the first page.
+        Return:
+            One page of assets and the cursor of the next page, None when there are no more assets.
+        """
+        search_args = {
+            "page": {"size": page_size},
+            "keywords": search_words,
+            "sort": sort,
+            "vendors": providers,
+            "cursor": cursor,
+        }
+        if category:
+            search_args["filter"] = {"categories": [category]}
+
+        result = await self._client.artec_assets.search.merged.post(**search_args)
+        return (result["assets"], result["cursor"])
+
     async def _stop(self):
         await self._client.stop_async()
         self._client = None
@@ -16,24 +16,25 @@ import carb.dictionary
 import carb.settings
 import omni.usd
 import omni.kit.app
-import omni.client
 
 from omni.kit.browser.core import AbstractBrowserModel, CollectionItem, CategoryItem, DetailItem
-from typing import Dict, List, Optional, Union, Callable
-from artec.services.browser.asset import AssetModel, ProviderModel, BaseAssetStore
+from typing import Dict, List, Optional, Set, Tuple, Union, Callable
+from artec.services.browser.asset import AssetModel, ProviderModel, BaseAssetStore, get_sort_key
 from artec.services.browser.asset import get_instance as get_asset_services
 from pxr import Tf
 
 from .asset_store_client import AssetStoreClient
-from .asset_detail_item import AssetDetailItem, MoreDetailItem, SearchingDetailItem
+from .asset_detail_item import AssetDetailItem, AssetType, MoreDetailItem, SearchingDetailItem
 from .main_navigation_item import MainNavigationItem
 from .asset_fusion import AssetFusion
 from .common_categories import COMMON_CATEGORIES
+from ..search_cache import SearchRefresh
 
 SETTING_ROOT = "/exts/artec.asset.browser/"
 SETTING_PROVIDER_ROOT = SETTING_ROOT + "provider"
 SETTING_PAGE_SIZE = SETTING_ROOT + "pageSize"
 SETTING_SINGLE_PROVIDER = SETTING_ROOT + "singleProvider"
+SETTING_MERGED_SEARCH = SETTING_ROOT + "mergedSearch"
 CATEGORY_ANY = "All projects"
 
 
@@ -58,12 +59,15 @@ class AssetStoreModel(AbstractBrowserModel):
         # Category item <=> Detail items of this category item (without children category item)
         self._cached_detail_items: Dict[MainNavigationItem, List[DetailItem]] = {}
 
+        # (vendor, identifier) <=> Detail item of a listed asset, patched in place when its asset changes
+        self._asset_detail_items: Dict[Tuple[str, str], AssetDetailItem] = {}
+
         # Store
         store_url = carb.settings.get_settings().get(SETTING_PROVIDER_ROOT)
         self._store_client = AssetStoreClient(store_url)
 
         # Sort of detail items, default by name with ascending
-        self._sort_args = {"key": lambda item: item["name"], "reverse": False}
+        self._sort_args = {"key": lambda item: get_sort_key(item["name"]), "reverse": False}
 
         self.search_words: Optional[List[str]] = None
         self.search_provider: Optional[str] = None
@@ -71,13 +75,23 @@ class AssetStoreModel(AbstractBrowserModel):
 
         # Searched asset models
         self._assets: Optional[List[AssetModel]] = None
+        # (vendor, identifier) of listed assets and of the cloud projects they were unpacked from
+        self._asset_keys: Set[Tuple[str, str]] = set()
+        # Product url <=> Listed cloud project, fusions are sorted by the project they were unpacked from
+        self._cloud_projects: Dict[str, Dict] = {}
         self._categories: Optional[Dict] = None
         self.providers: Dict[str, ProviderModel] = {}
         self._refresh_provider_sub: Dict[str, omni.kit.app.SettingChangeSubscription] = {}
         self._enable_provider_sub: Dict[str, omni.kit.app.SettingChangeSubscription] = {}
         self.on_refresh_provider_fn: Callable[[str], None] = None
         self.on_enable_provider_fn: Callable[[str], None] = None
+        # Called when assets change outside of list_assets_async, by a background refresh of cached cloud results
+        self.on_assets_changed_fn: Callable[[], None] = None
+        self._search_refresh_sub: Optional[int] = None
+        self._cloud_search: Optional[Tuple[str, str, Tuple[str, str]]] = None
         self._page_number = 1
+        # Cursor of the next page of a merged search over several providers
+        self._merge_cursor: Optional[str] = None
         self._more_assets = False
         self._searching = False
 
@@ -88,6 +102,11 @@ class AssetStoreModel(AbstractBrowserModel):
             self._refresh_provider_sub[provider] = None
         for provider in self._refresh_provider_sub:
             self._refresh_provider_sub[provider] = None
+        if self._search_refresh_sub is not None:
+            cloud_provider = self.artec_cloud_provider()
+            if cloud_provider:
+                cloud_provider.unsubscribe_search_refresh(self._search_refresh_sub)
+            self._search_refresh_sub = None
         self._store_client.destroy()
 
     def get_store(self, vendor: str) -> BaseAssetStore:
@@ -165,8 +184,20 @@ class AssetStoreModel(AbstractBrowserModel):
         detail_items = []
 
         if self._assets:
+            asset_detail_items = {}
             for asset in self._assets:
-                detail_items.append(self._create_detail_item(asset))
+                key = self._get_asset_key(asset)
+                detail_item = self._asset_detail_items.get(key)
+                if detail_item is None:
+                    detail_item = self._create_detail_item(asset)
+                else:
+                    detail_item.update(asset)
+                asset_detail_items[key] = detail_item
+                detail_items.append(detail_item)
+            # Drop items of assets no longer listed
+            self._asset_detail_items = asset_detail_items
+        else:
+            self._asset_detail_items = {}
 
         if self._more_assets:
             detail_items.append(MoreDetailItem())
@@ -211,7 +242,7 @@ class AssetStoreModel(AbstractBrowserModel):
             sort_fn = lambda item: item["published_at"]
         else:
             # Default, always sort by name
-            sort_fn = lambda item: item["name"]
+            sort_fn = lambda item: get_sort_key(item["name"])
         self._sort_args = {"key": sort_fn, "reverse": sort_order == "Descending"}
 
     def get_sort_args(self) -> Dict:
@@ -269,7 +300,10 @@ class AssetStoreModel(AbstractBrowserModel):
 
     def reset_assets(self):
         self._assets = []
+        self._asset_keys = set()
+        self._cloud_projects = {}
         self._page_number = 1
+        self._merge_cursor = None
         self._more_assets = False
 
     async def list_assets_async(
@@ -282,6 +316,7 @@ class AssetStoreModel(AbstractBrowserModel):
 
         page_size = carb.settings.get_settings().get(SETTING_PAGE_SIZE)
         single_provider = carb.settings.get_settings().get(SETTING_SINGLE_PROVIDER)
+        merged_search = carb.settings.get_settings().get(SETTING_MERGED_SEARCH)
 
         if category_item.providers:
             # If category is private, alwasy search for matched provider but do not care provider filter
@@ -300,7 +335,11 @@ class AssetStoreModel(AbstractBrowserModel):
         else:
             providers = list(self.providers.keys())
 
-        if single_provider:
+        if merged_search and len(providers) > 1:
+            self._more_assets = await self._list_assets_merged_async(
+                category_item.url, page_size, providers, callback
+            )
+        elif single_provider:
             self._searching = True
             queries: Dict[str, asyncio.Future] = {}
             for provider in providers:
@@ -331,10 +370,37 @@ class AssetStoreModel(AbstractBrowserModel):
         self._page_number += 1
         return self._more_assets
 
+    async def _list_assets_merged_async(self, category_url, page_size, providers, callback) -> bool:
+        """Add the next page of all providers, merged in sort order by the asset service"""
+        if self._page_number > 1 and self._merge_cursor is None:
+            # Every provider is exhausted
+            return False
+        carb.log_info(
+            f"Merged search of providers: {providers} with category: {category_url}, keywords: {self.search_words}, page: {self._page_number}"
+        )
+        self._track_cloud_search(category_url, providers)
+
+        (assets, self._merge_cursor) = await self._store_client._search_merged_async(
+            category_url,
+            search_words=self.search_words,
+            sort=self._search_sort_args,
+            page_size=page_size,
+            providers=providers,
+            cursor=self._merge_cursor,
+        )
+        if assets:
+            # Already in sort order across providers
+            self._add_assets(assets, sort=False)
+        if callback:
+            callback()
+
+        return self._merge_cursor is not None
+
     async def _list_assets_by_vendor_async(self, category_url, page_size, providers, callback, single_step=False):
         carb.log_info(
             f"Searching providers: {providers} with category: {category_url}, keywords: {self.search_words}, page: {self._page_number}"
         )
+        self._track_cloud_search(category_url, providers)
 
         (assets, more_assets) = await self._store_client._list_async(
             category_url,
@@ -345,29 +411,7 @@ class AssetStoreModel(AbstractBrowserModel):
             providers=providers,
         )
         if assets:
-            # Filter duplicated results
-            new_assets = []
-            for asset in assets:
-                if asset not in self._assets + new_assets:
-                    new_assets.append(asset)
-
-            # Sort new results
-            new_assets.sort(**self._sort_args)
-
-            # Add as a sub-categories to cloud projects category
-            self._add_assets_to_cloud_projects_category(new_assets)
-
-            # Unpack cloud projects
-            assets_to_add = []
-            for asset in new_assets:
-                if asset.get("vendor") == self.artec_cloud_provider_id:
-                    assets_to_add.extend(self._extract_fusions_from_artec_cloud_project(asset))
-                else:
-                    assets_to_add.append(asset)
-
-            self._assets.extend(assets_to_add)
-
-            carb.log_info(f"  {len(assets)} projects returned, {len(assets_to_add)} assets added, total {len(self._assets)}")
+            self._add_assets(assets)
 
             if not single_step and more_assets:
                 self._more_assets = True
@@ -380,6 +424,147 @@ class AssetStoreModel(AbstractBrowserModel):
 
         return more_assets
 
+    def _track_cloud_search(self, category_url: Optional[str], providers: List[str]) -> None:
+        """Remember the cloud search being listed, to apply background refreshes of its cached results"""
+        if self.artec_cloud_provider_id in providers:
+            self._subscribe_search_refresh()
+            self._cloud_search = (
+                category_url or "",
+                " ".join(self.search_words) if self.search_words else "",
+                tuple(self._search_sort_args),
+            )
+
+    def _add_assets(self, assets: List[AssetModel], sort: bool = True) -> None:
+        # Filter duplicated results
+        new_assets = []
+        for asset in assets:
+            key = self._get_asset_key(asset)
+            if key not in self._asset_keys:
+                self._asset_keys.add(key)
+                new_assets.append(asset)
+
+        if sort:
+            # Sort new results
+            new_assets.sort(**self._sort_args)
+
+        # Add as a sub-categories to cloud projects category
+        self._add_assets_to_cloud_projects_category(new_assets)
+
+        # Unpack cloud projects
+        assets_to_add = []
+        for asset in new_assets:
+            if asset.get("vendor") == self.artec_cloud_provider_id:
+                self._cloud_projects[asset.get("product_url")] = asset
+                assets_to_add.extend(self._extract_fusions_from_artec_cloud_project(asset))
+            else:
+                assets_to_add.append(asset)
+
+        self._assets.extend(assets_to_add)
+        self._asset_keys.update(self._get_asset_key(asset) for asset in assets_to_add)
+
+        carb.log_info(f"  {len(assets)} projects returned, {len(assets_to_add)} assets added, total {len(self._assets)}")
+
+    def _subscribe_search_refresh(self) -> None:
+        if self._search_refresh_sub is not None:
+            return
+        cloud_provider = self.artec_cloud_provider()
+        if cloud_provider:
+            self._search_refresh_sub = cloud_provider.subscribe_search_refresh(self._on_search_refreshed)
+
+    def _on_search_refreshed(self, refresh: SearchRefresh) -> None:
+        """Apply the difference between cached and refreshed cloud results to the listed assets"""
+        if self._assets is None or self._cloud_search != (refresh.category, refresh.term, tuple(refresh.sort)):
+            # Results of another search
+            return
+
+        # New url signatures only, shown items are patched without rebuilding the grid
+        for project in refresh.resigned:
+            self._resign_cloud_project(project.dict())
+
+        outdated_projects = refresh.removed + refresh.changed
+        if outdated_projects:
+            outdated_urls = {project.product_url for project in outdated_projects}
+            assets = []
+            for asset in self._assets:
+                if asset.get("vendor") == self.artec_cloud_provider_id and asset.get("product_url") in outdated_urls:
+                    self._asset_keys.discard(self._get_asset_key(asset))
+                else:
+                    assets.append(asset)
+            self._assets = assets
+            for project in outdated_projects:
+                self._asset_keys.discard((project.vendor, project.identifier))
+                self._cloud_projects.pop(project.product_url, None)
+
+        # Changed projects may be renamed, they are merged back like added ones. Pages of a running search add
+        # projects the complete results list again
+        new_projects = [
+            project.dict()
+            for project in refresh.added + refresh.changed
+            if (project.vendor, project.identifier) not in self._asset_keys
+        ]
+        for project in new_projects:
+            self._merge_cloud_project(project)
+        self._add_assets_to_cloud_projects_category(new_projects)
+
+        if new_projects or refresh.removed:
+            if self.on_assets_changed_fn:
+                self.on_assets_changed_fn()
+
+    def _resign_cloud_project(self, project: Dict) -> None:
+        """Replace the urls of the listed fusions of a project, in place and on their detail items"""
+        product_url = project["product_url"]
+        if product_url not in self._cloud_projects:
+            return
+        self._cloud_projects[product_url] = project
+
+        fusion_assets = {
+            self._get_asset_key(fusion_asset): fusion_asset
+            for fusion_asset in self._extract_fusions_from_artec_cloud_project(project)
+        }
+        for index, asset in enumerate(self._assets):
+            key = self._get_asset_key(asset)
+            if key not in fusion_assets or asset.get("product_url") != product_url:
+                continue
+            self._assets[index] = fusion_assets[key]
+            detail_item = self._asset_detail_items.get(key)
+            if detail_item is not None:
+                detail_item.update(fusion_assets[key])
+
+    def _merge_cloud_project(self, project: Dict) -> None:
+        """Insert the fusions of a cloud project before the first listed asset sorted after it"""
+        sort_fn = self._sort_args["key"]
+        reverse = self._sort_args["reverse"]
+        project_key = sort_fn(project)
+
+        position = len(self._assets)
+        for index, asset in enumerate(self._assets):
+            if asset.get("vendor") == self.artec_cloud_provider_id:
+                # Fusions have no sort fields of their own
+                asset = self._cloud_projects.get(asset.get("product_url"))
+                if asset is None:
+                    continue
+            if self._sorts_before(project_key, sort_fn(asset), reverse):
+                position = index
+                break
+
+        self._cloud_projects[project["product_url"]] = project
+        self._asset_keys.add(self._get_asset_key(project))
+        fusion_assets = self._extract_fusions_from_artec_cloud_project(project)
+        self._assets[position:position] = fusion_assets
+        self._asset_keys.update(self._get_asset_key(fusion_asset) for fusion_asset in fusion_assets)
+
+    @staticmethod
+    def _sorts_before(key, other_key, reverse: bool) -> bool:
+        try:
+            return other_key < key if reverse else key < other_key
+        except TypeError:
+            # Providers disagree on the type of the field, e.g. timestamps and dates
+            return str(other_key) < str(key) if reverse else str(key) < str(other_key)
+
+    @staticmethod
+    def _get_asset_key(asset: Dict) -> Tuple[str, str]:
+        return (asset.get("vendor", ""), asset.get("identifier", ""))
+
     def _add_assets_to_cloud_projects_category(self, assets):
         for asset in assets:
             if asset.get("vendor") != self.artec_cloud_provider_id:
@@ -421,6 +606,26 @@ class AssetStoreModel(AbstractBrowserModel):
             )
         return fusion_assets
 
+    def get_project_fusions(self, item: AssetDetailItem) -> List[AssetFusion]:
+        """Get fusions of the cloud project the item belongs to which are not downloaded yet"""
+        vendor = item.asset_model["vendor"]
+        product_url = item.asset_model.get("product_url", "")
+        if vendor != self.artec_cloud_provider_id or not product_url:
+            return []
+
+        fusions = []
+        # Items of the listed assets, kept by get_detail_items
+        for fusion_item in self._asset_detail_items.values():
+            asset = fusion_item.asset_model
+            if asset["vendor"] != vendor or asset.get("product_url") != product_url:
+                continue
+            if fusion_item.asset_type != AssetType.DOWNLOAD:
+                continue
+            fusions.append(
+                AssetFusion(fusion_item, asset["name"], asset["download_url"], asset["thumbnail"])
+            )
+        return fusions
+
     async def list_categories_async(self):
         self._categories = await self._store_client.list_categories_async()
 
@@ -457,39 +662,3 @@ class AssetStoreModel(AbstractBrowserModel):
         await asset_store.authenticate(username, password)
         if callback:
             callback()
-
-    async def download_fusion_async(
-        self,
-        fusion: AssetFusion,
-        asset: Dict,
-        dest_url: str,
-        callback: Callable[[Dict], None] = None,
-        on_progress_fn: Callable[[float], None] = None,
-        on_prepared_fn: Optional[Callable[[float], None]] = None
-    ):
-        asset_store = self.get_store(asset.get("vendor"))
-        if not asset_store:
-            return
-
-        asset_model = AssetModel(
-            identifier=asset.get("identifier", ""),
-            name=asset.get("name", ""),
-            version=asset.get("version", ""),
-            published_at=asset.get("publishedAt", ""),
-            categories=asset.get("categories", []),
-            tags=asset.get("tags", []),
-            vendor=asset.get("vendor", ""),
-            download_url=asset.get("download_url", ""),
-            product_url=asset.get("product_url", ""),
-            price=asset.get("price", 0.0),
-            thumbnail=asset.get("thumbnail", ""),
-            user=asset.get("user", ""),
-            fusions=asset.get("fusions", ""),
-        )
-        results = await asset_store.download(fusion, dest_url, on_progress_fn=on_progress_fn,
-                                             timeout=600, on_prepared_fn=on_prepared_fn)
-        if results.get("status") != omni.client.Result.OK:
-            carb.log_warn(f"Failed to download asset from {asset.get('vendor')}.")
-            return
-        if callback:
-            callback(results)
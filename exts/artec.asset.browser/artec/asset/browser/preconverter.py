@@ -0,0 +1,136 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Tuple
+
+import carb
+
+from .conversion_poller import ConversionPoller
+
+
+@dataclass
+class _Preconversion:
+    fusion: object
+    # Resolves to (snapshot_group_id, eta) once the server accepted the conversion request, None until a request
+    # slot is free
+    request_future: Optional[asyncio.Future] = None
+    # Resolves to the final ConversionResult
+    poll_future: Optional[asyncio.Future] = None
+
+
+class Preconverter:
+    """
+    Requests server side conversions of fusions before they are downloaded.
+    Requested conversions are tracked with the conversion poller, so a download started later finds the archive
+    ready, or at least already converting. Only the most recent max_tracked fusions are tracked, and at most
+    max_requests conversion requests are sent at once, the most recent fusions first.
+    Args:
+        request_model_fn (Callable): Coroutine function (fusion) returning (snapshot_group_id, eta).
+        conversion_poller (ConversionPoller): Poller tracking requested conversions.
+        max_tracked (int): Maximum number of tracked fusions.
+        max_requests (int): Maximum number of conversion requests in flight, discarded ones included.
+    """
+
+    def __init__(
+        self,
+        request_model_fn: Callable[[object], Awaitable[Tuple[str, float]]],
+        conversion_poller: ConversionPoller,
+        max_tracked: int = 20,
+        max_requests: int = 4,
+    ):
+        self._request_model_fn = request_model_fn
+        self._conversion_poller = conversion_poller
+        self._max_tracked = max(1, max_tracked)
+        self._max_requests = max(1, max_requests)
+        self._preconversions: "OrderedDict[str, _Preconversion]" = OrderedDict()
+        self._requests_in_flight = 0
+
+    def destroy(self):
+        for url in list(self._preconversions):
+            self._discard(url)
+
+    def request(self, fusion) -> None:
+        """Request the conversion of a fusion in the background, unless it is already tracked."""
+        if fusion.url in self._preconversions:
+            self._preconversions.move_to_end(fusion.url)
+        else:
+            self._preconversions[fusion.url] = _Preconversion(fusion)
+            while len(self._preconversions) > self._max_tracked:
+                self._discard(next(iter(self._preconversions)))
+        self._send_requests()
+
+    async def take(self, fusion) -> Optional[Tuple[str, float]]:
+        """
+        Stop tracking a fusion and get its conversion request.
+        Polling started by the pre-conversion goes on and is shared with the download waiting for the same snapshot.
+        It waits in the background, so it stops with the download if that is cancelled.
+        Args:
+            fusion (AssetFusion): Fusion about to be downloaded.
+        Return:
+            (snapshot_group_id, eta) if its conversion was requested successfully. Else None.
+        """
+        preconversion = self._preconversions.pop(fusion.url, None)
+        if preconversion is None or preconversion.request_future is None:
+            return None
+        try:
+            # Shielded so a cancelled download does not cancel the request itself
+            return await asyncio.shield(preconversion.request_future)
+        except asyncio.CancelledError:
+            if preconversion.request_future.cancelled():
+                return None
+            raise
+        except Exception:
+            return None
+
+    def _send_requests(self) -> None:
+        """Send the requests of the most recent fusions waiting for a request slot"""
+        for preconversion in reversed(list(self._preconversions.values())):
+            if self._requests_in_flight >= self._max_requests:
+                return
+            if preconversion.request_future is not None:
+                continue
+            fusion = preconversion.fusion
+            self._requests_in_flight += 1
+            preconversion.request_future = asyncio.ensure_future(self._request_model_fn(fusion))
+            preconversion.request_future.add_done_callback(lambda f, fusion=fusion: self._on_requested(fusion, f))
+            carb.log_info(f"Pre-converting {fusion.name}")
+
+    def _on_requested(self, fusion, request_future: asyncio.Future) -> None:
+        self._requests_in_flight -= 1
+        self._send_requests()
+        preconversion = self._preconversions.get(fusion.url)
+        if preconversion is None or preconversion.request_future is not request_future:
+            # Taken or discarded meanwhile
+            return
+        if request_future.cancelled():
+            return
+        if request_future.exception() is not None:
+            carb.log_warn(f"Failed to pre-convert {fusion.name}: {request_future.exception()}")
+            self._preconversions.pop(fusion.url, None)
+            return
+        (snapshot_group_id, eta) = request_future.result()
+        preconversion.poll_future = asyncio.ensure_future(
+            self._conversion_poller.wait(fusion, snapshot_group_id, eta, background=True)
+        )
+        preconversion.poll_future.add_done_callback(lambda f: self._on_polled(fusion, f))
+
+    @staticmethod
+    def _on_polled(fusion, poll_future: asyncio.Future) -> None:
+        if not poll_future.cancelled() and poll_future.exception() is not None:
+            carb.log_warn(f"Failed to follow the pre-conversion of {fusion.name}: {poll_future.exception()}")
+
+    def _discard(self, url: str) -> None:
+        preconversion = self._preconversions.pop(url, None)
+        if preconversion is None:
+            return
+        if preconversion.poll_future is not None:
+            preconversion.poll_future.cancel()
+        # A sent request is left running: once sent, the server converts anyway. It keeps its request slot until done
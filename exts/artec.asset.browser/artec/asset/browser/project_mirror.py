@@ -0,0 +1,266 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import hashlib
+import math
+from pathlib import Path
+from time import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import carb
+from artec.services.browser.asset import get_sort_key
+
+from .json_index import load_json_index, save_json_index
+from .search_cache import strip_url_queries
+
+# Listing order used to synchronize, newest projects come first
+SYNC_SORT = ("created_at", "desc")
+
+
+class CloudProjectMirror:
+    """
+    Local copy of the metadata of a user's cloud projects, answering searches without any request.
+    Synchronization is incremental: pages of the listing sorted by creation date are fetched, newest first, until a
+    page brings nothing new. A full synchronization, which also detects removed projects, runs when the project count
+    does not match the cloud one or every full_sync_interval. The mirror is persisted per user, so a new session
+    answers at once.
+    Presigned urls older than url_max_age are only fetched again for the projects about to be shown, see resign().
+    Projects are handled as AssetModel dicts, without auth tokens.
+    Args:
+        mirror_root (str): Folder of the persisted mirrors.
+        fetch_page_fn (Callable): Coroutine function (page, sort) returning (projects, meta) of one listing page.
+        fetch_all_fn (Callable): Coroutine function (sort) returning all projects of the listing.
+        fetch_project_fn (Callable): Coroutine function (slug) returning the project of a slug, None if not found.
+        sync_interval (float): Seconds after which the mirror is synchronized again.
+        full_sync_interval (float): Seconds after which synchronization is a full one.
+        url_max_age (float): Seconds after which the presigned urls of a project are fetched again.
+        page_size (int): Projects per page of the listing.
+        clock (Callable): Returns the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        mirror_root: str,
+        fetch_page_fn: Callable[[int, Tuple[str, str]], Awaitable[Tuple[List[Dict], Dict]]],
+        fetch_all_fn: Callable[[Tuple[str, str]], Awaitable[List[Dict]]],
+        fetch_project_fn: Callable[[str], Awaitable[Optional[Dict]]],
+        sync_interval: float = 60.0,
+        full_sync_interval: float = 3600.0,
+        url_max_age: float = 600.0,
+        page_size: int = 20,
+        clock: Callable[[], float] = time,
+    ):
+        self._mirror_root = Path(mirror_root)
+        self._fetch_page_fn = fetch_page_fn
+        self._fetch_all_fn = fetch_all_fn
+        self._fetch_project_fn = fetch_project_fn
+        self._sync_interval = sync_interval
+        self._full_sync_interval = full_sync_interval
+        self._url_max_age = url_max_age
+        self._page_size = max(page_size, 1)
+        self._clock = clock
+        self._username: Optional[str] = None
+        self._projects: Dict[str, Dict] = {}
+        # Identifier => time the urls of the project were fetched
+        self._signed_at: Dict[str, float] = {}
+        self._synced_at = 0.0
+        self._full_synced_at = 0.0
+        self._sync_future: Optional[asyncio.Future] = None
+
+    def destroy(self):
+        if self._sync_future is not None and not self._sync_future.done():
+            self._sync_future.cancel()
+        self._sync_future = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the mirror was synchronized at least once, in this session or a previous one"""
+        return self._full_synced_at > 0
+
+    @property
+    def sync_due(self) -> bool:
+        return self._clock() - self._synced_at > self._sync_interval
+
+    def set_user(self, username: str) -> None:
+        """Switch to the mirror of a user, loading the persisted one if any"""
+        if username == self._username:
+            return
+        self.destroy()
+        self._username = username
+        self._projects = {}
+        self._signed_at = {}
+        self._synced_at = 0.0
+        self._full_synced_at = 0.0
+        self._load()
+
+    def query(self, category: str = "", term: str = "", sort: Tuple[str, str] = ("", "")) -> List[Dict]:
+        """
+        Search mirrored projects.
+        Args:
+            category (str): Slug of a project or a category, all projects if empty.
+            term (str): Keywords which must all appear in the project name or in one of its fusion names.
+            sort (Tuple[str, str]): Sort field ("name" or "created_at") and direction ("asc" or "desc").
+        Return:
+            Matching projects.
+        """
+        projects = list(self._projects.values())
+        if category:
+            projects = [
+                project
+                for project in projects
+                if self._get_slug(project) == category
+                or category in project.get("categories", [])
+            ]
+        if term:
+            words = term.lower().split()
+            projects = [project for project in projects if all(word in self._get_text(project) for word in words)]
+
+        (sort_field, sort_direction) = sort
+        if sort_field == "created_at":
+            projects.sort(key=lambda project: project.get("published_at") or "", reverse=sort_direction == "desc")
+        else:
+            projects.sort(key=lambda project: get_sort_key(project.get("name") or ""), reverse=sort_direction == "desc")
+        return projects
+
+    def urls_expired(self, projects: Iterable[Dict]) -> bool:
+        """Whether presigned urls of one of the given mirrored projects are older than url_max_age"""
+        now = self._clock()
+        return any(self._url_expired(project["identifier"], now) for project in projects)
+
+    async def resign(self, identifiers: Iterable[str]) -> int:
+        """
+        Fetch again the presigned urls of the given projects which expired, project by project, or with a full
+        synchronization when listing every project takes fewer requests.
+        Args:
+            identifiers (Iterable[str]): Projects about to be shown.
+        Return:
+            Number of projects fetched again.
+        Raises:
+            Errors of the fetch functions. Projects fetched before the error are kept.
+        """
+        now = self._clock()
+        expired = [
+            self._projects[identifier]
+            for identifier in set(identifiers)
+            if identifier in self._projects and self._url_expired(identifier, now)
+        ]
+        if not expired:
+            return 0
+
+        if len(expired) > math.ceil(len(self._projects) / self._page_size):
+            await self._full_sync()
+        else:
+            projects = await asyncio.gather(
+                *[self._fetch_project_fn(self._get_slug(project)) for project in expired]
+            )
+            now = self._clock()
+            for project in projects:
+                # Urls and anything else, changes show in the next query
+                if project is not None and project["identifier"] in self._projects:
+                    self._projects[project["identifier"]] = project
+                    self._signed_at[project["identifier"]] = now
+
+        await asyncio.get_event_loop().run_in_executor(None, self._save)
+        return len(expired)
+
+    async def sync(self) -> bool:
+        """
+        Synchronize the mirror with the cloud. Concurrent calls share the same synchronization.
+        Return:
+            True if projects were added, removed or changed. Changes of presigned urls alone are applied silently.
+        Raises:
+            Errors of the fetch functions. Projects fetched before the error are kept.
+        """
+        if self._sync_future is None or self._sync_future.done():
+            self._sync_future = asyncio.ensure_future(self._sync())
+        return await asyncio.shield(self._sync_future)
+
+    async def _sync(self) -> bool:
+        if not self.ready or self._clock() - self._full_synced_at > self._full_sync_interval:
+            changed = await self._full_sync()
+        else:
+            (changed, total_count) = await self._incremental_sync()
+            if total_count is not None and total_count != len(self._projects):
+                # Some projects were removed, or changed too far down the listing
+                carb.log_info(f"Cloud has {total_count} projects, mirror {len(self._projects)}: full sync")
+                changed = await self._full_sync() or changed
+
+        self._synced_at = self._clock()
+        await asyncio.get_event_loop().run_in_executor(None, self._save)
+        return changed
+
+    async def _full_sync(self) -> bool:
+        projects = await self._fetch_all_fn(SYNC_SORT)
+        fresh = {project["identifier"]: project for project in projects}
+        changed = strip_url_queries(fresh) != strip_url_queries(self._projects)
+        self._projects = fresh
+        self._full_synced_at = self._clock()
+        self._signed_at = dict.fromkeys(fresh, self._full_synced_at)
+        return changed
+
+    async def _incremental_sync(self) -> Tuple[bool, Optional[int]]:
+        changed = False
+        total_count = None
+        page = 1
+        while True:
+            (projects, meta) = await self._fetch_page_fn(page, SYNC_SORT)
+            total_count = meta.get("total_count", total_count)
+            now = self._clock()
+            page_changed = False
+            for project in projects:
+                known = self._projects.get(project["identifier"])
+                if known is None or strip_url_queries(known) != strip_url_queries(project):
+                    page_changed = True
+                # Fresh urls replace the previous ones either way
+                self._projects[project["identifier"]] = project
+                self._signed_at[project["identifier"]] = now
+            changed = changed or page_changed
+            per_page = meta.get("per_page") or len(projects)
+            if not page_changed or not projects or total_count is None or page * per_page >= total_count:
+                break
+            page += 1
+        return (changed, total_count)
+
+    def _url_expired(self, identifier: str, now: float) -> bool:
+        return now - self._signed_at.get(identifier, 0.0) > self._url_max_age
+
+    @staticmethod
+    def _get_slug(project: Dict) -> str:
+        return project.get("product_url", "").rstrip("/").split("/")[-1]
+
+    @staticmethod
+    def _get_text(project: Dict) -> str:
+        names = [project.get("name") or ""] + [fusion.get("name") or "" for fusion in project.get("fusions") or []]
+        return " ".join(names).lower()
+
+    def _get_mirror_file(self) -> Path:
+        return self._mirror_root / f"{hashlib.sha1(self._username.encode('utf-8')).hexdigest()}.json"
+
+    def _save(self):
+        data = {
+            "projects": list(self._projects.values()),
+            "synced_at": self._synced_at,
+            "full_synced_at": self._full_synced_at,
+            "signed_at": self._signed_at,
+        }
+        save_json_index(self._get_mirror_file(), data)
+
+    def _load(self):
+        data = load_json_index(self._get_mirror_file())
+        if not isinstance(data, dict):
+            return
+        self._projects = {project["identifier"]: project for project in data.get("projects", [])}
+        self._full_synced_at = data.get("full_synced_at", 0.0)
+        self._signed_at = {
+            identifier: signed_at
+            for (identifier, signed_at) in data.get("signed_at", {}).items()
+            if identifier in self._projects
+        }
+        # Synchronize again in this session
+        self._synced_at = 0.0
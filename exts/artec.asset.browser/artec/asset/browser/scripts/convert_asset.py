@@ -0,0 +1,42 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+#
+# Converts one asset to USD in a headless Kit process, started by ConversionScheduler:
+#   kit --no-window --enable omni.kit.asset_converter --exec "convert_asset.py <input> <output>"
+# Kit exits with code 0 on success, errors are written to stderr.
+
+import asyncio
+import sys
+
+import omni.kit.app
+import omni.kit.asset_converter as converter
+
+
+async def convert(input_path: str, output_path: str) -> int:
+    task = converter.get_instance().create_converter_task(input_path, output_path, None)
+    success = await task.wait_until_finished()
+    if not success:
+        sys.stderr.write(f"{task.get_error_message()}\n")
+        return 1
+    return 0
+
+
+async def main(argv) -> None:
+    return_code = 2
+    try:
+        if len(argv) != 3:
+            sys.stderr.write("Usage: convert_asset.py <input> <output>\n")
+        else:
+            return_code = await convert(argv[1], argv[2])
+    except Exception as e:
+        sys.stderr.write(f"{e}\n")
+        return_code = 1
+    omni.kit.app.get_app().post_quit(return_code)
+
+
+asyncio.ensure_future(main(sys.argv))
@@ -0,0 +1,107 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import carb
+from artec.services.browser.asset import AssetModel
+
+from .json_index import load_json_index, save_json_index
+
+
+@dataclass
+class SearchRefresh:
+    """
+    Difference between cached results of a search and the results of its background refresh, or a page of a search
+    still running as added results
+    """
+    category: str
+    term: str
+    sort: Tuple[str, str]
+    added: List[AssetModel] = field(default_factory=list)
+    removed: List[AssetModel] = field(default_factory=list)
+    changed: List[AssetModel] = field(default_factory=list)
+    # Same results with new url signatures, to be patched in place
+    resigned: List[AssetModel] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.resigned)
+
+
+def strip_url_queries(value):
+    """Copy of a search result without url queries, signatures of presigned urls change with every response"""
+    if isinstance(value, dict):
+        return {key: strip_url_queries(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [strip_url_queries(item) for item in value]
+    if isinstance(value, str) and value.startswith("http"):
+        return urlparse(value)._replace(query="").geturl()
+    return value
+
+
+class SearchResultCache:
+    """
+    Persisted results of the latest searches, to show something while a fresh search is running.
+    Entries are keyed by the search parameters and only the max_entries most recently used searches are kept.
+    save() is blocking, run it in an executor.
+    Args:
+        cache_file (str): JSON file of the cache.
+        max_entries (int): Maximum number of cached searches.
+    """
+
+    def __init__(self, cache_file: str, max_entries: int = 50):
+        self._cache_file = Path(cache_file)
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+
+        self._load()
+
+    @staticmethod
+    def get_key(*params) -> str:
+        return hashlib.sha1(json.dumps(params).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[List[Dict], float]]:
+        """
+        Get cached results.
+        Args:
+            key (str): Key of the search, see get_key.
+        Return:
+            (results, time they were stored) if cached. Else None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["last_used"] = time()
+            return (list(entry["results"]), entry["updated_at"])
+
+    def put(self, key: str, results: List[Dict]) -> None:
+        now = time()
+        with self._lock:
+            self._entries[key] = {"results": results, "updated_at": now, "last_used": now}
+            if len(self._entries) > self._max_entries:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])
+                for old_key in oldest[: len(self._entries) - self._max_entries]:
+                    self._entries.pop(old_key)
+
+    def save(self) -> None:
+        with self._lock:
+            entries = dict(self._entries)
+        save_json_index(self._cache_file, entries)
+
+    def _load(self):
+        self._entries = load_json_index(self._cache_file) or {}
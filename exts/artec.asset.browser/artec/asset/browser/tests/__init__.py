@@ -1 +1,13 @@
-from .test_hello_world import *
\ No newline at end of file
+from .test_hello_world import *
+from .test_search_benchmark import *
+from .test_download_benchmark import *
+from .test_conversion_poller import *
+from .test_download_manager import *
+from .test_conversion_scheduler import *
+from .test_cloud_policy import *
+from .test_asset_store_model import *
+from .test_project_mirror import *
+from .test_converted_cache import *
+from .test_usdz_writer import *
+from .test_thumbnail_cache import *
+from .test_download_history import *
@@ -0,0 +1,303 @@
+import asyncio
+import random
+import struct
+import tempfile
+import zipfile
+import zlib
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import time
+from typing import Deque, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from artec.services.browser.asset import get_sort_key
+
+API_PATH = "/api/omni/1.0"
+AUTH_TOKEN = "mock-auth-token"
+
+
+class MockArtecCloud:
+    """
+    Local stand-in for the Artec Cloud API used by ArtecCloudAssetProvider: sessions, projects.json, fusion and
+    conversion_status endpoints, converted archives and previews. Served by aiohttp on localhost.
+    Archives hold a generated OBJ scan (grid mesh, material and noise textures), built once per server.
+    Args:
+        project_count (int): Number of projects of the mock user.
+        fusions_per_project (int): Number of fusions of each project.
+        max_per_page (int): Largest page size the server accepts, larger per_page requests are capped.
+        latency (float): Seconds each response is delayed.
+        latency_jitter (float): Random extra delay of each response, up to this many seconds.
+        conversion_time (float): Seconds a requested conversion takes.
+        vertex_count (int): Number of vertices of the scan in archives.
+        texture_count (int): Number of textures of the scan in archives.
+        texture_resolution (int): Width and height of the textures in pixels.
+    """
+
+    def __init__(
+        self,
+        project_count: int = 100,
+        fusions_per_project: int = 2,
+        max_per_page: int = 100,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        conversion_time: float = 0.0,
+        vertex_count: int = 10000,
+        texture_count: int = 1,
+        texture_resolution: int = 256,
+    ):
+        self.project_count = project_count
+        self.fusions_per_project = fusions_per_project
+        self.max_per_page = max(1, max_per_page)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.conversion_time = conversion_time
+        self.vertex_count = max(4, vertex_count)
+        self.texture_count = texture_count
+        self.texture_resolution = max(1, texture_resolution)
+        # Requests served per route name
+        self.request_counts: Counter = Counter()
+        # Responses (status, headers) given to the next requests instead of handling them, to inject failures
+        self.failures: Deque[Tuple[int, Dict[str, str]]] = deque()
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._conversions: Dict[str, float] = {}
+        self._projects: List[Dict] = []
+        self._runner: Optional[web.AppRunner] = None
+        self._tmp_dir: Optional[tempfile.TemporaryDirectory] = None
+        self._archive_path: Optional[Path] = None
+        self.base_url = ""
+
+    async def start(self) -> str:
+        """Start serving on a free local port. Return: base url of the server."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post(f"{API_PATH}/sessions", self._on_session, name="sessions")
+        app.router.add_get(f"{API_PATH}/projects.json", self._on_projects, name="projects")
+        app.router.add_get(
+            f"{API_PATH}/projects/{{slug}}/fusions/conversion_status",
+            self._on_conversion_status,
+            name="conversion_status",
+        )
+        app.router.add_get(f"{API_PATH}/projects/{{slug}}/fusions/{{fusion_id}}", self._on_fusion, name="fusion")
+        app.router.add_get("/downloads/{snapshot_group_id}.zip", self._on_download, name="download")
+        app.router.add_get("/previews/{name}", self._on_preview, name="preview")
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        self._projects = [self._create_project(index) for index in range(self.project_count)]
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+            self._archive_path = None
+
+    @property
+    def settings(self) -> Dict[str, str]:
+        """Provider settings, relative to /exts/artec.asset.browser/, pointing to this server"""
+        return {
+            "modelsUrl": f"{self.base_url}{API_PATH}/projects",
+            "cloudSearchUrl": f"{self.base_url}{API_PATH}/projects.json",
+            "authorizeUrl": f"{self.base_url}{API_PATH}/sessions",
+        }
+
+    @property
+    def projects(self) -> List[Dict]:
+        """Projects as listed by projects.json"""
+        return self._projects
+
+    def reset_stats(self):
+        self.request_counts.clear()
+        self.max_in_flight = 0
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            delay = self.latency + random.uniform(0, self.latency_jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if request.match_info.route.name:
+                self.request_counts[request.match_info.route.name] += 1
+            if self.failures:
+                (status, headers) = self.failures.popleft()
+                return web.json_response({"error": "injected failure"}, status=status, headers=headers)
+            # Archives are served from presigned urls, previews are public
+            public = request.match_info.route.name in ("sessions", "download", "preview")
+            if not public and request.query.get("auth_token") != AUTH_TOKEN:
+                return web.json_response({"error": "unauthorized"}, status=401)
+            return await handler(request)
+        finally:
+            self._in_flight -= 1
+
+    def _create_project(self, index: int) -> Dict:
+        slug = f"project-{index:05d}"
+        project_url = f"{self.base_url}{API_PATH}/projects/{slug}"
+        return {
+            "id": slug,
+            "name": f"Project {index:05d}",
+            "created_at": (datetime(2023, 1, 1) + timedelta(hours=index)).isoformat(),
+            "categories": [],
+            "download_url": "",
+            "viewer_url": f"{self.base_url}/viewer/projects/{slug}",
+            "preview_presigned_url": f"{self.base_url}/previews/{slug}.png?signature={index}",
+            "user": "mock",
+            "fusions": [
+                {
+                    "fusion_id": f"{slug}-fusion-{fusion_index}",
+                    "name": f"Fusion {fusion_index} of project {index:05d}",
+                    "download_url": f"{project_url}/fusions/{fusion_index}",
+                    "preview_url": f"{self.base_url}/previews/{slug}-{fusion_index}.png",
+                }
+                for fusion_index in range(self.fusions_per_project)
+            ],
+        }
+
+    async def _on_session(self, request: web.Request) -> web.Response:
+        if not request.query.get("user[email]") or not request.query.get("user[password]"):
+            return web.json_response({"error": "invalid credentials"}, status=401)
+        return web.json_response({"auth_token": AUTH_TOKEN})
+
+    async def _on_projects(self, request: web.Request) -> web.Response:
+        query = request.query
+        projects = self._projects
+        if query.get("slug"):
+            projects = [project for project in projects if project["id"] == query["slug"]]
+        if query.get("term"):
+            words = query["term"].lower().split()
+            projects = [project for project in projects if all(word in project["name"].lower() for word in words)]
+        sort_field = query.get("sort_field") or "name"
+        if sort_field in ("name", "created_at"):
+            projects = sorted(projects, key=lambda project: get_sort_key(project[sort_field]),
+                              reverse=query.get("sort_direction") == "desc")
+
+        per_page = min(int(query.get("per_page") or self.max_per_page), self.max_per_page)
+        page = max(1, int(query.get("page") or 1))
+        start = (page - 1) * per_page
+        return web.json_response(
+            {
+                "projects": projects[start:start + per_page],
+                "meta": {"total_count": len(projects), "current_page": page, "per_page": per_page},
+            }
+        )
+
+    async def _on_fusion(self, request: web.Request) -> web.Response:
+        snapshot_group_id = f"{request.match_info['slug']}-{request.match_info['fusion_id']}"
+        self._conversions.setdefault(snapshot_group_id, time())
+        return web.json_response(
+            {"project": {"snapshot_group_id": snapshot_group_id, "eta": self.conversion_time}}
+        )
+
+    async def _on_conversion_status(self, request: web.Request) -> web.Response:
+        snapshot_group_id = request.query.get("snapshot_group_id", "")
+        requested_at = self._conversions.get(snapshot_group_id)
+        if requested_at is None:
+            return web.json_response({"error": "unknown snapshot group"}, status=404)
+        processed = time() - requested_at >= self.conversion_time
+        return web.json_response(
+            {
+                "project": {
+                    "conversion_status": 3 if processed else 2,
+                    "download_url": f"{self.base_url}/downloads/{snapshot_group_id}.zip" if processed else "",
+                }
+            }
+        )
+
+    async def _on_download(self, request: web.Request) -> web.StreamResponse:
+        if request.match_info["snapshot_group_id"] not in self._conversions:
+            return web.json_response({"error": "unknown snapshot group"}, status=404)
+        return web.FileResponse(await self.prepare_archive())
+
+    async def _on_preview(self, request: web.Request) -> web.Response:
+        # Previews never change, their name is their version
+        etag = f'"{request.match_info["name"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=create_png(64, 64), content_type="image/png", headers={"ETag": etag})
+
+    async def prepare_archive(self) -> Path:
+        """Generate the served archive now rather than on first download. Return: path of the archive."""
+        if self._archive_path is None:
+            self._archive_path = await asyncio.get_event_loop().run_in_executor(None, self._write_archive)
+        return self._archive_path
+
+    def get_archive_size(self) -> int:
+        """Size of the generated archive in bytes, 0 until prepared"""
+        return self._archive_path.stat().st_size if self._archive_path else 0
+
+    def _write_archive(self) -> Path:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        archive_path = Path(self._tmp_dir.name) / "scan.zip"
+        with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("scan/scan.obj", create_obj(self.vertex_count, "scan.mtl", max(1, self.texture_count)))
+            archive.writestr("scan/scan.mtl", create_mtl(self.texture_count))
+            for index in range(self.texture_count):
+                # Noise does not compress, like real scan textures
+                archive.writestr(
+                    f"scan/textures/texture_{index}.png",
+                    create_png(self.texture_resolution, self.texture_resolution, noise=True),
+                    compress_type=zipfile.ZIP_STORED,
+                )
+        return archive_path
+
+
+def create_obj(vertex_count: int, mtl_name: str, material_count: int = 1) -> str:
+    """Square grid mesh with texture coordinates, about vertex_count vertices, rows split between materials"""
+    side = max(2, int(vertex_count ** 0.5))
+    lines = [f"mtllib {mtl_name}"]
+    for row in range(side):
+        for column in range(side):
+            lines.append(f"v {column / side:.6f} {random.random() * 0.01:.6f} {row / side:.6f}")
+    for row in range(side):
+        for column in range(side):
+            lines.append(f"vt {column / (side - 1):.6f} {row / (side - 1):.6f}")
+    material = None
+    for row in range(side - 1):
+        if row * material_count // (side - 1) != material:
+            material = row * material_count // (side - 1)
+            lines.append(f"usemtl material_{material}")
+        for column in range(side - 1):
+            a = row * side + column + 1
+            b = a + 1
+            c = a + side
+            d = c + 1
+            lines.append(f"f {a}/{a} {b}/{b} {d}/{d}")
+            lines.append(f"f {a}/{a} {d}/{d} {c}/{c}")
+    return "\n".join(lines) + "\n"
+
+
+def create_mtl(texture_count: int) -> str:
+    lines = []
+    for index in range(max(1, texture_count)):
+        lines += [f"newmtl material_{index}", "Ka 1 1 1", "Kd 1 1 1"]
+        if index < texture_count:
+            lines.append(f"map_Kd textures/texture_{index}.png")
+    return "\n".join(lines) + "\n"
+
+
+def create_png(width: int, height: int, noise: bool = False) -> bytes:
+    """RGB PNG image, gray or random noise"""
+    row_size = width * 3
+    if noise:
+        pixels = random.getrandbits(8 * row_size * height).to_bytes(row_size * height, "little")
+    else:
+        pixels = bytes([128]) * (row_size * height)
+    raw = b"".join(b"\x00" + pixels[row * row_size:(row + 1) * row_size] for row in range(height))
+
+    def __chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + __chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + __chunk(b"IDAT", zlib.compress(raw, 1))
+        + __chunk(b"IEND", b"")
+    )
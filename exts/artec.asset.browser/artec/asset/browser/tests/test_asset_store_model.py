@@ -0,0 +1,264 @@
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import omni.kit.test
+from artec.services.browser.asset import AssetModel
+from omni.kit.browser.core import CategoryItem
+
+from ..download_helper import DownloadHelper
+from ..models.asset_detail_item import AssetDetailItem, AssetType
+from ..models.asset_store_model import AssetStoreModel
+from ..models.main_navigation_item import MainNavigationItem
+from ..search_cache import SearchRefresh
+
+VENDOR = "ArtecCloud"
+
+
+def _project(name: str, fusions: int = 1, signature: int = 0, title: str = None) -> AssetModel:
+    return AssetModel(
+        identifier=f"project-{name}",
+        name=title or name,
+        version="",
+        published_at="",
+        categories=[],
+        tags=[],
+        vendor=VENDOR,
+        download_url="",
+        product_url=f"https://cloud.artec3d.com/projects/{name}",
+        price=0.0,
+        thumbnail=f"https://previews.artec3d.com/{name}.png?signature={signature}",
+        user="user",
+        fusions=[
+            {
+                "fusion_id": f"{name}-{index}",
+                "name": f"{title or name} {index}",
+                "download_url": f"https://cloud.artec3d.com/fusions/{name}-{index}/download",
+                "preview_url": f"https://previews.artec3d.com/{name}-{index}.png?signature={signature}",
+            }
+            for index in range(fusions)
+        ],
+    )
+
+
+def _asset(vendor: str, name: str) -> AssetModel:
+    return AssetModel(
+        identifier=name,
+        name=name,
+        version="",
+        published_at="",
+        categories=[],
+        tags=[],
+        vendor=vendor,
+        download_url=f"https://{vendor.lower()}.com/{name}.usdz",
+        product_url=f"https://{vendor.lower()}.com/{name}",
+        price=0.0,
+        thumbnail="",
+        user="user",
+        fusions=[],
+    )
+
+
+class TestAssetStoreModel(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._model = AssetStoreModel()
+        # Urls as listed, without the token of a signed in store
+        self._model.get_store = lambda vendor: None
+        self._model.cloud_projects_category_item = MainNavigationItem("cloud projects", None, VENDOR)
+        self._model._dummy_category_item = CategoryItem("")
+        self._model.reset_assets()
+        self._model._track_cloud_search(None, [VENDOR])
+        self._rebuilds = 0
+
+        def __on_assets_changed():
+            self._rebuilds += 1
+
+        self._model.on_assets_changed_fn = __on_assets_changed
+
+    async def tearDown(self):
+        self._model.destroy()
+
+    def _list(self, projects: List[AssetModel]) -> Dict[str, AssetDetailItem]:
+        self._model._add_assets([project.dict() for project in projects])
+        return self._detail_items()
+
+    def _detail_items(self) -> Dict[str, AssetDetailItem]:
+        items = self._model.get_detail_items(self._model.cloud_projects_category_item)
+        return {item.uid: item for item in items if isinstance(item, AssetDetailItem)}
+
+    def _refresh(self, **kwargs) -> None:
+        self._model._on_search_refreshed(SearchRefresh("", "", ("name", "asc"), **kwargs))
+
+    def _listed_names(self) -> List[str]:
+        return [asset["name"] for asset in self._model._assets]
+
+    async def test_resigned_urls_are_patched_in_place(self):
+        items = self._list([_project("alpha"), _project("bravo", fusions=2)])
+        items["bravo-1"].thumbnail_cached = True
+
+        self._refresh(resigned=[_project("bravo", fusions=2, signature=1)])
+
+        self.assertEqual(self._rebuilds, 0)
+        self.assertEqual(self._listed_names(), ["alpha 0", "bravo 0", "bravo 1"])
+        self.assertEqual(items["bravo-1"].thumbnail, "https://previews.artec3d.com/bravo-1.png?signature=1")
+        self.assertFalse(items["bravo-1"].thumbnail_cached)
+        self.assertEqual(items["alpha-0"].thumbnail, "https://previews.artec3d.com/alpha-0.png?signature=0")
+        for uid, item in self._detail_items().items():
+            self.assertIs(item, items[uid])
+
+    async def test_added_projects_are_merged_in_sort_order(self):
+        items = self._list([_project("alpha"), _project("delta", fusions=2)])
+
+        self._refresh(added=[_project("echo"), _project("charlie")])
+
+        self.assertEqual(self._rebuilds, 1)
+        self.assertEqual(self._listed_names(), ["alpha 0", "charlie 0", "delta 0", "delta 1", "echo 0"])
+        refreshed_items = self._detail_items()
+        self.assertIs(refreshed_items["delta-1"], items["delta-1"])
+        self.assertIn((VENDOR, "project-charlie"), self._model._asset_keys)
+
+    async def test_added_projects_are_merged_in_descending_order(self):
+        self._model.change_sort_args("Name", "Descending")
+        self._model._track_cloud_search(None, [VENDOR])
+        self._model._add_assets([_project(name).dict() for name in ("alpha", "delta")])
+
+        self._model._on_search_refreshed(SearchRefresh("", "", ("name", "desc"), added=[_project("charlie")]))
+
+        self.assertEqual(self._listed_names(), ["delta 0", "charlie 0", "alpha 0"])
+
+    async def test_changed_and_removed_projects(self):
+        items = self._list([_project("alpha"), _project("bravo"), _project("charlie")])
+
+        self._refresh(
+            changed=[_project("bravo", fusions=2, title="zulu")],
+            removed=[_project("alpha")],
+        )
+
+        self.assertEqual(self._rebuilds, 1)
+        self.assertEqual(self._listed_names(), ["charlie 0", "zulu 0", "zulu 1"])
+        refreshed_items = self._detail_items()
+        # Same fusion, renamed with its project
+        self.assertIs(refreshed_items["bravo-0"], items["bravo-0"])
+        self.assertEqual(refreshed_items["bravo-0"].name, "zulu 0")
+        self.assertNotIn((VENDOR, "project-alpha"), self._model._asset_keys)
+        self.assertNotIn((VENDOR, "alpha-0"), self._model._asset_keys)
+
+        # Removed projects are listed again when a later page returns them
+        self._model._add_assets([_project("alpha").dict()])
+        self.assertIn("alpha 0", self._listed_names())
+
+    async def test_pages_are_listed_before_results(self):
+        self._refresh(added=[_project("charlie"), _project("alpha")])
+        self.assertEqual(self._listed_names(), ["alpha 0", "charlie 0"])
+        items = self._detail_items()
+
+        self._refresh(added=[_project("bravo")])
+        self._list([_project("alpha"), _project("bravo"), _project("charlie")])
+
+        self.assertEqual(self._rebuilds, 2)
+        self.assertEqual(self._listed_names(), ["alpha 0", "bravo 0", "charlie 0"])
+        self.assertIs(self._detail_items()["alpha-0"], items["alpha-0"])
+
+    async def test_refresh_of_another_search_is_ignored(self):
+        self._list([_project("alpha")])
+
+        self._model._on_search_refreshed(SearchRefresh("slug", "", ("name", "asc"), removed=[_project("alpha")]))
+
+        self.assertEqual(self._rebuilds, 0)
+        self.assertEqual(self._listed_names(), ["alpha 0"])
+
+    async def test_overlapping_pages_of_two_providers(self):
+        self._model._add_assets([asset.dict() for asset in (_asset("Other", "anchor"), _project("alpha"))])
+        self._model._add_assets(
+            [
+                asset.dict()
+                for asset in (_asset("Other", "anchor"), _asset("Other", "bolt"), _project("alpha"), _project("bravo"))
+            ]
+        )
+        # Same identifier from another provider is another asset
+        self._model._add_assets([_asset("Third", "anchor").dict()])
+
+        self.assertEqual(self._listed_names(), ["alpha 0", "anchor", "bolt", "bravo 0", "anchor"])
+        self.assertEqual(
+            [child.name for child in self._model.cloud_projects_category_item.children], ["alpha", "bravo"]
+        )
+
+        # A new search lists everything again
+        self._model.reset_assets()
+        self._model._add_assets([_asset("Other", "anchor").dict(), _project("alpha").dict()])
+        self.assertEqual(self._listed_names(), ["alpha 0", "anchor"])
+
+    async def test_items_are_kept_across_searches(self):
+        items = self._list([_project("alpha"), _project("bravo")])
+
+        self._model.reset_assets()
+        refreshed_items = self._list([_project("bravo", title="zulu"), _project("charlie")])
+
+        self.assertIs(refreshed_items["bravo-0"], items["bravo-0"])
+        self.assertEqual(refreshed_items["bravo-0"].name, "zulu 0")
+        # Items of assets no longer listed are dropped
+        self._model.reset_assets()
+        self.assertIsNot(self._list([_project("alpha")])["alpha-0"], items["alpha-0"])
+
+
+class TestAssetDetailItem(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        # Downloads recorded by the tests are kept away from the ones of the user
+        self._download_helper = DownloadHelper()
+        self._download_stats = self._download_helper._download_stats
+        self._download_result_file = self._download_helper._download_result_file
+        self._download_helper._download_stats = {}
+        self._download_helper._download_result_file = str(Path(self._tmp_dir.name) / "downloads.json")
+        self._asset = _asset("Other", "anchor").dict()
+        self._item = AssetDetailItem(self._asset)
+
+    async def tearDown(self):
+        self._download_helper._download_stats = self._download_stats
+        self._download_helper._download_result_file = self._download_result_file
+        self._tmp_dir.cleanup()
+
+    def _download(self, name: str) -> str:
+        usdz_path = Path(self._tmp_dir.name) / name
+        usdz_path.write_bytes(b"usdz")
+        self._download_helper.save_download_asset(self._asset, str(usdz_path))
+        return str(usdz_path)
+
+    async def test_same_model_keeps_item(self):
+        self._item.thumbnail = "/cache/anchor.png"
+        self._item.thumbnail_cached = True
+
+        self.assertFalse(self._item.update(dict(self._asset)))
+
+        self.assertEqual(self._item.thumbnail, "/cache/anchor.png")
+        self.assertTrue(self._item.thumbnail_cached)
+
+    async def test_changed_fields(self):
+        self._item.thumbnail_cached = True
+        self.assertEqual(self._item.asset_type, AssetType.DOWNLOAD)
+
+        changed = dict(
+            self._asset, name="renamed", thumbnail="https://other.com/anchor.png", user="other", download_url=""
+        )
+
+        self.assertTrue(self._item.update(changed))
+        self.assertEqual(self._item.name, "renamed")
+        self.assertEqual(self._item.thumbnail, "https://other.com/anchor.png")
+        self.assertFalse(self._item.thumbnail_cached)
+        self.assertEqual(self._item.user, "other")
+        self.assertIs(self._item.asset_model, changed)
+        # Nothing to download left, the product page is opened instead
+        self.assertEqual(self._item.asset_type, AssetType.EXTERNAL_LINK)
+
+    async def test_local_url_is_refreshed(self):
+        local_url = self._download("anchor.usdz")
+
+        self.assertTrue(self._item.update(dict(self._asset)))
+        self.assertEqual(self._item.url, local_url)
+        self.assertEqual(self._item.asset_type, AssetType.NORMAL)
+        self.assertFalse(self._item.update(dict(self._asset)))
+
+        # Downloaded again elsewhere
+        local_url = self._download("anchor copy.usdz")
+        self.assertTrue(self._item.update(dict(self._asset)))
+        self.assertEqual(self._item.url, local_url)
@@ -0,0 +1,266 @@
+import asyncio
+from time import monotonic
+from typing import Dict, Tuple
+
+import aiohttp
+import omni.kit.test
+
+from ..cloud_policy import AimdLimiter, CircuitBreaker, CircuitOpenError, CloudRequestPolicy, TokenBucket
+from .mock_cloud import API_PATH, AUTH_TOKEN, MockArtecCloud
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTokenBucket(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._clock = _Clock()
+        self._bucket = TokenBucket(rate=2.0, capacity=3, clock=self._clock)
+
+    async def _acquired(self) -> bool:
+        try:
+            await asyncio.wait_for(self._bucket.acquire(), 0.05)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def test_burst(self):
+        for _ in range(3):
+            self.assertTrue(await self._acquired())
+        self.assertFalse(await self._acquired())
+
+    async def test_refill(self):
+        for _ in range(3):
+            await self._bucket.acquire()
+
+        # One token every 1 / rate seconds
+        self._clock.now += 0.5
+        self.assertTrue(await self._acquired())
+        self.assertFalse(await self._acquired())
+
+    async def test_refill_is_capped(self):
+        for _ in range(3):
+            await self._bucket.acquire()
+
+        self._clock.now += 60
+        for _ in range(3):
+            self.assertTrue(await self._acquired())
+        self.assertFalse(await self._acquired())
+
+
+class TestAimdLimiter(omni.kit.test.AsyncTestCase):
+    async def test_decrease(self):
+        limiter = AimdLimiter(max_limit=8, min_limit=2)
+
+        limiter.on_overload()
+        self.assertEqual(limiter.limit, 4)
+        limiter.on_overload()
+        limiter.on_overload()
+        self.assertEqual(limiter.limit, 2)
+
+    async def test_increase(self):
+        limiter = AimdLimiter(max_limit=8)
+        for _ in range(3):
+            limiter.on_overload()
+        self.assertEqual(limiter.limit, 1)
+
+        # Grows by about one per limit's worth of successes
+        limiter.on_success()
+        self.assertEqual(limiter.limit, 2)
+        limiter.on_success()
+        limiter.on_success()
+        self.assertEqual(limiter.limit, 2)
+        limiter.on_success()
+        self.assertEqual(limiter.limit, 3)
+
+        for _ in range(100):
+            limiter.on_success()
+        self.assertEqual(limiter.limit, 8)
+
+    async def test_limits_calls_in_flight(self):
+        limiter = AimdLimiter(max_limit=2)
+        release = asyncio.Event()
+        in_flight = []
+
+        async def __call():
+            async with limiter:
+                in_flight.append(None)
+                await release.wait()
+
+        calls = [asyncio.ensure_future(__call()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(in_flight), 2)
+
+        release.set()
+        await asyncio.gather(*calls)
+        self.assertEqual(len(in_flight), 3)
+
+
+class TestCircuitBreaker(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._clock = _Clock()
+        self._breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=self._clock)
+
+    def _open(self) -> None:
+        self._breaker.record_failure()
+        self._breaker.record_failure()
+        self.assertTrue(self._breaker.open)
+
+    async def test_opens_after_consecutive_failures(self):
+        self._breaker.record_failure()
+        self._breaker.record_success()
+        self._breaker.record_failure()
+        self._breaker.check()
+        self.assertFalse(self._breaker.open)
+
+        self._breaker.record_failure()
+
+        self.assertTrue(self._breaker.open)
+        with self.assertRaises(CircuitOpenError):
+            self._breaker.check()
+
+    async def test_half_open_trial_closes(self):
+        self._open()
+        self._clock.now += 10
+
+        # A single trial call is let through
+        self._breaker.check()
+        with self.assertRaises(CircuitOpenError):
+            self._breaker.check()
+
+        self._breaker.record_success()
+        self.assertFalse(self._breaker.open)
+        self._breaker.check()
+
+    async def test_half_open_trial_reopens(self):
+        self._open()
+        self._clock.now += 10
+        self._breaker.check()
+
+        self._breaker.record_failure()
+
+        self.assertTrue(self._breaker.open)
+        self._clock.now += 5
+        with self.assertRaises(CircuitOpenError):
+            self._breaker.check()
+        self._clock.now += 5
+        self._breaker.check()
+
+    async def test_silent_trial_is_given_up(self):
+        self._open()
+        self._clock.now += 10
+        self._breaker.check()
+
+        # Trial never reports, another one is allowed after reset_timeout
+        self._clock.now += 10
+        self._breaker.check()
+
+
+class TestCloudRequestPolicy(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._cloud = MockArtecCloud(project_count=1)
+        await self._cloud.start()
+        self._session = aiohttp.ClientSession()
+
+    async def tearDown(self):
+        await self._session.close()
+        await self._cloud.stop()
+
+    @staticmethod
+    def _policy(**kwargs) -> CloudRequestPolicy:
+        options = dict(rate=1000.0, burst=1000, retry_delay=0.01, max_retry_delay=0.05)
+        options.update(kwargs)
+        return CloudRequestPolicy(**options)
+
+    async def _get_projects(self, policy: CloudRequestPolicy) -> Tuple[int, Dict]:
+        url = f"{self._cloud.base_url}{API_PATH}/projects.json"
+        return await policy.get_json(self._session, url, params={"auth_token": AUTH_TOKEN})
+
+    async def test_server_errors_are_retried(self):
+        self._cloud.failures.extend([(500, {}), (502, {})])
+
+        (status, body) = await self._get_projects(self._policy())
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body["projects"]), 1)
+        self.assertEqual(self._cloud.request_counts["projects"], 3)
+
+    async def test_retries_are_limited(self):
+        self._cloud.failures.extend([(503, {})] * 3)
+
+        (status, _) = await self._get_projects(self._policy(max_retries=2))
+
+        self.assertEqual(status, 503)
+        self.assertEqual(self._cloud.request_counts["projects"], 3)
+
+    async def test_client_errors_are_not_retried(self):
+        self._cloud.failures.append((404, {}))
+
+        (status, _) = await self._get_projects(self._policy())
+
+        self.assertEqual(status, 404)
+        self.assertEqual(self._cloud.request_counts["projects"], 1)
+
+    async def test_retry_after_is_honoured(self):
+        self._cloud.failures.append((429, {"Retry-After": "0.3"}))
+        policy = self._policy(max_retry_delay=1.0)
+        started_at = monotonic()
+
+        (status, _) = await self._get_projects(policy)
+
+        self.assertEqual(status, 200)
+        self.assertGreaterEqual(monotonic() - started_at, 0.3)
+        # Concurrency was halved by the overload
+        self.assertLess(policy.concurrency_limit, 8)
+
+    async def test_post_is_not_retried(self):
+        self._cloud.failures.append((503, {}))
+
+        (status, _) = await self._policy().request_json(
+            self._session, "POST", f"{self._cloud.base_url}{API_PATH}/sessions", params={"user[email]": "mock"}
+        )
+
+        self.assertEqual(status, 503)
+        self.assertEqual(self._cloud.request_counts["sessions"], 1)
+
+    async def test_circuit_opens_and_half_opens(self):
+        policy = self._policy(max_retries=0, failure_threshold=2, reset_timeout=0.2)
+        self._cloud.failures.extend([(500, {})] * 3)
+        for _ in range(2):
+            (status, _) = await self._get_projects(policy)
+            self.assertEqual(status, 500)
+
+        self.assertTrue(policy.circuit_open)
+        with self.assertRaises(CircuitOpenError):
+            await self._get_projects(policy)
+        self.assertEqual(self._cloud.request_counts["projects"], 2)
+
+        # A failed trial opens the circuit again
+        await asyncio.sleep(0.25)
+        (status, _) = await self._get_projects(policy)
+        self.assertEqual(status, 500)
+        with self.assertRaises(CircuitOpenError):
+            await self._get_projects(policy)
+
+        # A successful one closes it
+        await asyncio.sleep(0.25)
+        (status, _) = await self._get_projects(policy)
+        self.assertEqual(status, 200)
+        self.assertFalse(policy.circuit_open)
+        self.assertEqual(self._cloud.request_counts["projects"], 4)
+
+    async def test_get_bytes(self):
+        self._cloud.failures.append((500, {}))
+
+        url = f"{self._cloud.base_url}/previews/a.png"
+        (status, headers, body) = await self._policy().get_bytes(self._session, url)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "image/png")
+        self.assertTrue(body.startswith(b"\x89PNG"))
+        self.assertEqual(self._cloud.request_counts["preview"], 2)
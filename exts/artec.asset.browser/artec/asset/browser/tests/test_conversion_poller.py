@@ -0,0 +1,91 @@
+import asyncio
+from typing import List
+
+import omni.kit.test
+
+from ..conversion_poller import ConversionPoller, ConversionResult, ConversionTaskStatus
+
+
+class _Fusion:
+    def __init__(self, name: str):
+        self.name = name
+        self.url = f"https://cloud.artec3d.com/fusions/{name}"
+
+
+class TestConversionPoller(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._statuses: List[object] = []
+        self._checks = 0
+        self._poller = ConversionPoller(self._check_status, min_interval=0.1, max_interval=0.1, jitter=0.0)
+
+    async def tearDown(self):
+        self._poller.destroy()
+
+    async def _check_status(self, fusion: _Fusion, snapshot_group_id: str) -> ConversionResult:
+        self._checks += 1
+        status = self._statuses.pop(0) if self._statuses else ConversionTaskStatus.IN_PROGRESS
+        if isinstance(status, Exception):
+            raise status
+        return ConversionResult(status, f"{fusion.url}/{snapshot_group_id}.zip")
+
+    async def test_processed(self):
+        self._statuses = [ConversionTaskStatus.ENQUEUED, ConversionTaskStatus.PROCESSED]
+
+        result = await self._poller.wait(_Fusion("scan"), "1", eta=0)
+
+        self.assertEqual(result.status, ConversionTaskStatus.PROCESSED)
+        self.assertEqual(self._checks, 2)
+
+    async def test_transient_errors_are_retried(self):
+        self._statuses = [RuntimeError("502"), RuntimeError("502"), ConversionTaskStatus.PROCESSED]
+
+        result = await self._poller.wait(_Fusion("scan"), "1", eta=0)
+
+        self.assertEqual(result.status, ConversionTaskStatus.PROCESSED)
+
+    async def test_persistent_errors_fail_waiters(self):
+        self._statuses = [RuntimeError("401 Unauthorized")] * 10
+        fusion = _Fusion("scan")
+
+        results = await asyncio.gather(
+            self._poller.wait(fusion, "1", eta=0), self._poller.wait(fusion, "1", eta=0), return_exceptions=True
+        )
+
+        for result in results:
+            self.assertIsInstance(result, RuntimeError)
+        # Both waiters shared the checks, given up after max_errors
+        self.assertEqual(self._checks, 3)
+        self.assertEqual(self._poller.pending_count, 0)
+
+    async def test_timeout(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            await self._poller.wait(_Fusion("scan"), "1", eta=0, timeout=0.3)
+        await asyncio.sleep(0.2)
+
+        # Nobody waits for the conversion anymore, it is no longer polled
+        self.assertEqual(self._poller.pending_count, 0)
+
+    async def test_background_waiter_polls_alone(self):
+        self._statuses = [ConversionTaskStatus.ENQUEUED, ConversionTaskStatus.PROCESSED]
+
+        result = await self._poller.wait(_Fusion("scan"), "1", eta=0, background=True)
+
+        self.assertEqual(result.status, ConversionTaskStatus.PROCESSED)
+
+    async def test_background_waiter_leaves_with_last_waiter(self):
+        fusion = _Fusion("scan")
+        background = asyncio.ensure_future(self._poller.wait(fusion, "1", eta=0, background=True))
+        await asyncio.sleep(0.15)
+        download = asyncio.ensure_future(self._poller.wait(fusion, "1", eta=0))
+        await asyncio.sleep(0.15)
+        self.assertFalse(background.done())
+
+        # A cancelled download leaves nobody interested in the conversion
+        download.cancel()
+        await asyncio.sleep(0.6)
+
+        self.assertTrue(background.cancelled())
+        self.assertEqual(self._poller.pending_count, 0)
+        checks = self._checks
+        await asyncio.sleep(0.2)
+        self.assertEqual(self._checks, checks)
@@ -0,0 +1,128 @@
+import asyncio
+import shlex
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import omni.kit.test
+
+from ..conversion_scheduler import ConversionBackend, ConversionJobStatus, ConversionScheduler
+from .mock_cloud import create_mtl, create_obj
+
+
+class TestConversionScheduler(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._tmp_path = Path(self._tmp_dir.name)
+        self._scheduler = None
+
+    async def tearDown(self):
+        if self._scheduler is not None:
+            self._scheduler.destroy()
+        self._tmp_dir.cleanup()
+
+    def _write_scan(self, name: str) -> Path:
+        obj_path = self._tmp_path / f"{name}.obj"
+        obj_path.write_text(create_obj(100, f"{name}.mtl"))
+        (self._tmp_path / f"{name}.mtl").write_text(create_mtl(0))
+        return obj_path
+
+    async def test_in_process(self):
+        self._scheduler = ConversionScheduler(max_workers=2, backend=ConversionBackend.IN_PROCESS)
+        obj_path = self._write_scan("scan")
+        usd_path = self._tmp_path / "scan.usd"
+
+        job = await self._scheduler.convert(obj_path, usd_path)
+
+        self.assertEqual(job.status, ConversionJobStatus.SUCCEEDED)
+        self.assertTrue(usd_path.exists())
+        self.assertIsNotNone(job.wait_time)
+        self.assertIsNotNone(job.run_time)
+        self.assertEqual(self._scheduler.finished_jobs, [job])
+        self.assertEqual(self._scheduler.queue_depth, 0)
+
+    async def test_in_process_failure(self):
+        self._scheduler = ConversionScheduler(backend=ConversionBackend.IN_PROCESS)
+
+        job = await self._scheduler.convert(self._tmp_path / "missing.obj", self._tmp_path / "missing.usd")
+
+        self.assertEqual(job.status, ConversionJobStatus.FAILED)
+        self.assertFalse((self._tmp_path / "missing.usd").exists())
+
+    async def test_priority(self):
+        self._scheduler = ConversionScheduler(max_workers=1, backend=ConversionBackend.IN_PROCESS)
+        paths = [(self._write_scan(name), self._tmp_path / f"{name}.usd") for name in ("first", "low", "high")]
+
+        first = asyncio.ensure_future(self._scheduler.convert(*paths[0]))
+        while not self._scheduler.running_jobs:
+            await asyncio.sleep(0)
+        low = asyncio.ensure_future(self._scheduler.convert(*paths[1]))
+        high = asyncio.ensure_future(self._scheduler.convert(*paths[2], priority=1))
+        await asyncio.sleep(0)
+        self.assertEqual(self._scheduler.queue_depth, 2)
+
+        jobs = await asyncio.gather(first, low, high)
+
+        self.assertTrue(all(job.succeeded for job in jobs))
+        self.assertEqual([job.input_path.stem for job in self._scheduler.finished_jobs], ["first", "high", "low"])
+
+    async def test_destroy_cancels_queued(self):
+        self._scheduler = ConversionScheduler(max_workers=1, backend=ConversionBackend.IN_PROCESS)
+        paths = [(self._write_scan(name), self._tmp_path / f"{name}.usd") for name in ("running", "queued")]
+        running = asyncio.ensure_future(self._scheduler.convert(*paths[0]))
+        while not self._scheduler.running_jobs:
+            await asyncio.sleep(0)
+        queued = asyncio.ensure_future(self._scheduler.convert(*paths[1]))
+        await asyncio.sleep(0)
+
+        self._scheduler.destroy()
+
+        self.assertEqual((await running).status, ConversionJobStatus.CANCELLED)
+        with self.assertRaises(asyncio.CancelledError):
+            await queued
+
+    def _write_kit(self, script: str) -> str:
+        """Stand-in for the Kit executable of the process backend"""
+        kit_path = self._tmp_path / "kit"
+        kit_path.write_text(f"#!/bin/sh\n{script}\n")
+        kit_path.chmod(0o755)
+        return str(kit_path)
+
+    @unittest.skipIf(sys.platform == "win32", "POSIX shell script")
+    async def test_process_failure(self):
+        kit_path = self._write_kit("echo 'Cannot read scan' >&2; exit 1")
+        self._scheduler = ConversionScheduler(backend=ConversionBackend.PROCESS, kit_path=kit_path)
+
+        job = await self._scheduler.convert(self._write_scan("scan"), self._tmp_path / "scan.usd")
+
+        self.assertEqual(job.status, ConversionJobStatus.FAILED)
+        self.assertEqual(job.error, "Cannot read scan")
+
+    @unittest.skipIf(sys.platform == "win32", "POSIX shell script")
+    async def test_process_is_terminated_on_cancel(self):
+        kit_path = self._write_kit("exec sleep 30")
+        self._scheduler = ConversionScheduler(backend=ConversionBackend.PROCESS, kit_path=kit_path)
+        conversion = asyncio.ensure_future(
+            self._scheduler.convert(self._write_scan("scan"), self._tmp_path / "scan.usd")
+        )
+        while not self._scheduler.running_jobs:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.2)
+
+        started_at = time.monotonic()
+        conversion.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await conversion
+        while self._scheduler.running_jobs:
+            await asyncio.sleep(0.01)
+
+        self.assertLess(time.monotonic() - started_at, 2)
+        self.assertEqual(self._scheduler.finished_jobs[-1].status, ConversionJobStatus.CANCELLED)
+
+    @unittest.skipIf(sys.platform == "win32", "POSIX quoting")
+    def test_exec_arguments_are_quoted(self):
+        arguments = ["/opt/convert_asset.py", "/tmp/my scans/it's here.obj", "/tmp/out\\put.usd"]
+
+        self.assertEqual(shlex.split(ConversionScheduler._join_arguments(arguments)), arguments)
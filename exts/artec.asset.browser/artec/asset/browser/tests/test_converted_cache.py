@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import omni.kit.test
+
+from ..converted_cache import ConvertedAssetCache
+
+
+class TestConvertedAssetCache(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._tmp_path = Path(self._tmp_dir.name)
+        self._cache_root = self._tmp_path / "cache"
+        self._cache = ConvertedAssetCache(str(self._cache_root), max_size=250)
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _put(self, fusion_id: str, snapshot_group_id: str, size: int = 100) -> None:
+        usdz_path = self._tmp_path / f"{fusion_id}.usdz"
+        usdz_path.write_bytes(os.urandom(size))
+        self._cache.put(fusion_id, snapshot_group_id, usdz_path)
+        # Distinct use times
+        time.sleep(0.01)
+
+    async def test_hit(self):
+        thumbnail_path = self._tmp_path / "thumbnail.png"
+        thumbnail_path.write_bytes(b"png")
+        usdz_path = self._tmp_path / "scan.usdz"
+        usdz_path.write_bytes(b"usdz")
+        self._cache.put("scan", "group1", usdz_path, thumbnail_path)
+        dest_path = self._tmp_path / "downloads"
+
+        placed_path = self._cache.place("scan", "group1", dest_path)
+
+        self.assertEqual(placed_path, dest_path / "scan.usdz")
+        self.assertEqual(placed_path.read_bytes(), b"usdz")
+        self.assertEqual((dest_path / ".thumbs" / "256x256" / "scan.usdz.png").read_bytes(), b"png")
+        self.assertEqual(self._cache.find("scan"), "group1")
+
+    async def test_miss(self):
+        self._put("scan", "group1")
+
+        self.assertIsNone(self._cache.get("other", "group1"))
+        self.assertIsNone(self._cache.find("other"))
+        self.assertIsNone(self._cache.place("scan", "group2", self._tmp_path / "downloads"))
+        self.assertFalse((self._tmp_path / "downloads").exists())
+
+    async def test_least_recently_used_is_evicted(self):
+        self._put("first", "group")
+        self._put("second", "group")
+        self.assertIsNotNone(self._cache.get("first", "group"))
+
+        self._put("third", "group")
+
+        self.assertIsNotNone(self._cache.get("first", "group"))
+        self.assertIsNone(self._cache.get("second", "group"))
+        self.assertIsNotNone(self._cache.get("third", "group"))
+        self.assertFalse((self._cache_root / ConvertedAssetCache.get_key("second", "group")).exists())
+
+    async def test_outdated_snapshot_group(self):
+        self._put("scan", "group1")
+
+        self._put("scan", "group2")
+
+        self.assertIsNone(self._cache.get("scan", "group1"))
+        self.assertIsNotNone(self._cache.get("scan", "group2"))
+        self.assertEqual(self._cache.find("scan"), "group2")
+
+        self._cache.discard("scan", "group2")
+        self.assertIsNone(self._cache.find("scan"))
+
+    async def test_index_is_persisted(self):
+        self._put("scan", "group1")
+
+        cache = ConvertedAssetCache(str(self._cache_root), max_size=250)
+
+        self.assertEqual(cache.find("scan"), "group1")
+        self.assertIsNotNone(cache.get("scan", "group1"))
@@ -0,0 +1,196 @@
+import tempfile
+import tracemalloc
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+import carb
+import carb.settings
+import omni.client
+import omni.kit.test
+
+from .. import artec_cloud
+from ..artec_cloud import ArtecCloudAssetProvider, SETTING_ROOT
+from ..download_history import DownloadPhase, DownloadStatus
+from ..models.asset_detail_item import AssetDetailItem
+from ..models.asset_fusion import AssetFusion
+from .mock_cloud import MockArtecCloud
+
+# Phases of a download, in pipeline order
+PHASES = ("request", "conversion", "transfer", "unzip", "convert", "package", "thumbnail")
+
+
+class _PhaseTimer:
+    """
+    Wall time and peak traced memory of the phases of one download. Phases run one after another, nested calls
+    are accounted to the outer phase.
+    Memory is what tracemalloc sees: Python allocations, including the in-process mock server, but not native
+    allocations of the asset converter.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, Tuple[float, int]] = {}
+        self._running = False
+
+    def reset(self) -> None:
+        self.phases = {}
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        @wraps(fn)
+        async def __wrapped(*args, **kwargs):
+            if self._running:
+                return await fn(*args, **kwargs)
+            self._running = True
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            (start_memory, _) = tracemalloc.get_traced_memory()
+            started_at = perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                (_, peak_memory) = tracemalloc.get_traced_memory()
+                (seconds, peak) = self.phases.get(name, (0.0, 0))
+                self.phases[name] = (seconds + perf_counter() - started_at, max(peak, peak_memory - start_memory))
+                self._running = False
+
+        return __wrapped
+
+
+class TestDownloadBenchmark(omni.kit.test.AsyncTestCase):
+    """
+    Per phase wall time and peak memory of ArtecCloudAssetProvider.download against a local mock cloud serving
+    generated OBJ scans. Results are logged, the tests only check that downloads succeed.
+    Skipped unless the runBenchmarks setting is enabled.
+    """
+
+    async def setUp(self):
+        self._settings = carb.settings.get_settings()
+        if not self._settings.get_as_bool(SETTING_ROOT + "runBenchmarks"):
+            self.skipTest("Benchmarks are disabled")
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._saved_settings: Dict[str, object] = {}
+        self._download_file = artec_cloud.download_file
+        self._cloud = None
+        self._provider = None
+        # Never touch the caches of the user
+        tmp_path = Path(self._tmp_dir.name)
+        self._set_setting("convertedCachePath", str(tmp_path / "converted"))
+        self._set_setting("thumbnailCachePath", str(tmp_path / "thumbnails"))
+        self._set_setting("searchCachePath", str(tmp_path / "searches.json"))
+        self._set_setting("projectMirrorPath", str(tmp_path / "mirror"))
+
+    async def tearDown(self):
+        artec_cloud.download_file = self._download_file
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if self._provider is not None:
+            self._provider.destroy()
+        if self._cloud is not None:
+            await self._cloud.stop()
+        for key, value in self._saved_settings.items():
+            self._settings.set(SETTING_ROOT + key, value)
+        self._tmp_dir.cleanup()
+
+    def _set_setting(self, key: str, value) -> None:
+        if key not in self._saved_settings:
+            self._saved_settings[key] = self._settings.get(SETTING_ROOT + key)
+        self._settings.set(SETTING_ROOT + key, value)
+
+    async def _start(self, cloud: MockArtecCloud) -> None:
+        self._cloud = cloud
+        await cloud.start()
+        # Archive generation is not part of the transfer
+        await cloud.prepare_archive()
+        for key, value in cloud.settings.items():
+            self._set_setting(key, value)
+        self._set_setting("projectMirror", False)
+        self._set_setting("cloudRequestRate", 1000.0)
+        self._set_setting("cloudRequestBurst", 1000)
+        self._provider = ArtecCloudAssetProvider()
+        await self._provider.authenticate("mock@artec3d.com", "mock")
+        self.assertTrue(self._provider.authorized())
+
+    def _get_fusions(self) -> List[AssetFusion]:
+        fusions = []
+        for project in self._cloud.projects:
+            for fusion_data in project["fusions"]:
+                asset = {
+                    "identifier": fusion_data["fusion_id"],
+                    "name": fusion_data["name"],
+                    "download_url": fusion_data["download_url"],
+                    "thumbnail": fusion_data["preview_url"],
+                    "vendor": self._provider.provider().name,
+                    "user": project["user"],
+                    "categories": [project["id"]],
+                    "fusions": [],
+                    "product_url": project["viewer_url"],
+                }
+                fusions.append(
+                    AssetFusion(AssetDetailItem(asset), asset["name"], asset["download_url"], asset["thumbnail"])
+                )
+        return fusions
+
+    def _instrument(self, timer: _PhaseTimer) -> None:
+        provider = self._provider
+        provider._get_conversion_request = timer.wrap("request", provider._get_conversion_request)
+        provider._conversion_poller.wait = timer.wrap("conversion", provider._conversion_poller.wait)
+        artec_cloud.download_file = timer.wrap("transfer", self._download_file)
+        provider._extract_zip = timer.wrap("unzip", provider._extract_zip)
+        provider.convert = timer.wrap("convert", provider.convert)
+        provider._package_usdz = timer.wrap("package", provider._package_usdz)
+        provider._download_thumbnail = timer.wrap("thumbnail", provider._download_thumbnail)
+
+    async def _benchmark(self, name: str, repeat: int = 2) -> List[Dict[str, Tuple[float, int]]]:
+        fusions = self._get_fusions()
+        self.assertGreaterEqual(len(fusions), repeat)
+        runs = []
+        timer = _PhaseTimer()
+        self._instrument(timer)
+        tracemalloc.start()
+        for index, fusion in enumerate(fusions[:repeat]):
+            timer.reset()
+            dest_path = Path(self._tmp_dir.name) / "downloads" / str(index)
+            dest_path.mkdir(parents=True)
+
+            started_at = perf_counter()
+            result = await self._provider.download(fusion, str(dest_path))
+            total = perf_counter() - started_at
+
+            self.assertEqual(result["status"], omni.client.Result.OK)
+            self.assertTrue(Path(result["url"]).exists())
+            record = self._provider.download_history.records[-1]
+            self.assertEqual(record.status, DownloadStatus.COMPLETED)
+            self.assertEqual(record.phases[DownloadPhase.TRANSFER].byte_count, self._cloud.get_archive_size())
+            peak_memory = max(peak for (_, peak) in timer.phases.values())
+            runs.append(dict(timer.phases, total=(total, peak_memory)))
+        tracemalloc.stop()
+
+        lines = [f"[download benchmark] {name}, archive {self._cloud.get_archive_size() / 1024 / 1024:.1f}MB"]
+        for phase in PHASES + ("total",):
+            timings = ", ".join(
+                f"{run[phase][0] * 1000:8.1f}ms {run[phase][1] / 1024 / 1024:6.1f}MB" if phase in run else "-"
+                for run in runs
+            )
+            lines.append(f"    {phase:<11} {timings}")
+        carb.log_info("\n".join(lines))
+        carb.log_info(self._provider.download_history.get_summary())
+        return runs
+
+    async def test_small_scan(self):
+        await self._start(MockArtecCloud(project_count=1, vertex_count=10000, texture_count=1, texture_resolution=512))
+        await self._benchmark("10k vertices, 1 texture of 512px")
+
+    async def test_large_scan(self):
+        await self._start(
+            MockArtecCloud(project_count=1, vertex_count=250000, texture_count=4, texture_resolution=2048)
+        )
+        await self._benchmark("250k vertices, 4 textures of 2048px")
+
+    async def test_slow_conversion(self):
+        await self._start(
+            MockArtecCloud(project_count=1, latency=0.05, conversion_time=2.0, vertex_count=10000, texture_count=1)
+        )
+        runs = await self._benchmark("10k vertices, 2s server conversion, 50ms latency")
+        for run in runs:
+            self.assertGreaterEqual(run["conversion"][0], 1.5)
@@ -0,0 +1,128 @@
+import time
+
+import omni.kit.test
+
+from ..download_history import DownloadHistory, DownloadPhase, DownloadRecord, DownloadStatus
+
+
+def _record(name: str, **phases) -> DownloadRecord:
+    record = DownloadRecord(name, f"https://cloud.artec3d.com/{name}", "/tmp")
+    for (phase, duration) in phases.items():
+        record.add_phase(phase, duration)
+    return record
+
+
+class TestDownloadRecord(omni.kit.test.AsyncTestCase):
+    async def test_phases_accumulate(self):
+        record = _record("scan")
+        record.started_at -= 1.0
+
+        with record.phase(DownloadPhase.TRANSFER) as timing:
+            timing.byte_count = 100
+            time.sleep(0.02)
+        # Entered again after a retry
+        with record.phase(DownloadPhase.TRANSFER):
+            time.sleep(0.02)
+        record.add_phase(DownloadPhase.QUEUE, 0.5)
+
+        transfer = record.phases[DownloadPhase.TRANSFER]
+        self.assertGreaterEqual(transfer.duration, 0.04)
+        self.assertEqual(transfer.byte_count, 100)
+        # Relative to the start of the download
+        self.assertGreaterEqual(transfer.started_at, 1.0)
+        self.assertEqual(record.phases[DownloadPhase.QUEUE].started_at, -0.5)
+        self.assertEqual(record.phases[DownloadPhase.QUEUE].duration, 0.5)
+
+    async def test_phase_is_timed_on_failure(self):
+        record = _record("scan")
+
+        with self.assertRaises(RuntimeError):
+            with record.phase(DownloadPhase.EXTRACT):
+                time.sleep(0.01)
+                raise RuntimeError("corrupt archive")
+
+        self.assertGreaterEqual(record.phases[DownloadPhase.EXTRACT].duration, 0.01)
+
+    async def test_finish(self):
+        record = _record("scan")
+        self.assertIsNone(record.status)
+        self.assertIn("scan: Running in", record.get_summary())
+
+        record.finish(DownloadStatus.FAILED)
+        duration = record.duration
+        time.sleep(0.01)
+
+        self.assertEqual(record.status, DownloadStatus.FAILED)
+        # Frozen once finished
+        self.assertEqual(record.duration, duration)
+
+    async def test_summary(self):
+        record = _record("scan", transfer=2.0, queue=0.5)
+        record.phases[DownloadPhase.TRANSFER].byte_count = 3 * 1024 * 1024
+        record.finish(DownloadStatus.COMPLETED)
+
+        # Phases in pipeline order
+        self.assertRegex(
+            record.get_summary(), r"^scan: Completed in \d+\.\d\ds \(queue 0\.50s, transfer 2\.00s 3\.0MB\)$"
+        )
+
+        record.cache_hit = True
+        self.assertTrue(record.get_summary().endswith("(converted asset cache)"))
+
+
+class TestDownloadHistory(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._history = DownloadHistory(max_records=3)
+
+    async def tearDown(self):
+        self._history.destroy()
+
+    async def test_size_limit(self):
+        for index in range(5):
+            self._history.add(_record(f"scan{index}"))
+
+        self.assertEqual([record.name for record in self._history.records], ["scan2", "scan3", "scan4"])
+
+        self._history.clear()
+        self.assertEqual(self._history.records, [])
+        self.assertEqual(self._history.get_summary(), "No downloads recorded")
+
+    async def test_subscribers(self):
+        recorded = []
+        subscription_id = self._history.subscribe(recorded.append)
+        record = _record("scan")
+        self._history.add(record)
+        self._history.unsubscribe(subscription_id)
+        self._history.add(_record("other"))
+
+        self.assertEqual(recorded, [record])
+
+    async def test_phase_stats(self):
+        self._history.add(_record("scan1", transfer=1.0, extract=4.0))
+        self._history.add(_record("scan2", transfer=3.0))
+        cached = _record("scan3", transfer=100.0)
+        cached.cache_hit = True
+        self._history.add(cached)
+
+        stats = self._history.get_phase_stats()
+
+        # Cache hits are left out
+        self.assertEqual(list(stats), [DownloadPhase.TRANSFER, DownloadPhase.EXTRACT])
+        self.assertEqual(stats[DownloadPhase.TRANSFER]["count"], 2)
+        self.assertEqual(stats[DownloadPhase.TRANSFER]["median"], 2.0)
+        self.assertEqual(stats[DownloadPhase.TRANSFER]["max"], 3.0)
+        self.assertEqual(stats[DownloadPhase.TRANSFER]["total"], 4.0)
+
+    async def test_summary(self):
+        record = _record("scan1", transfer=3.0, extract=1.0)
+        record.phases[DownloadPhase.TRANSFER].byte_count = 6 * 1024 * 1024
+        self._history.add(record)
+        cached = _record("scan2")
+        cached.cache_hit = True
+        self._history.add(cached)
+
+        lines = self._history.get_summary().splitlines()
+
+        self.assertEqual(lines[0], "2 downloads, 1 from the converted asset cache")
+        self.assertRegex(lines[1], r"^  transfer .* 75% of time  2\.0MB/s$")
+        self.assertRegex(lines[2], r"^  extract .* 25% of time$")
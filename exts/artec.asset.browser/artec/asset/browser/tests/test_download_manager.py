@@ -0,0 +1,164 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+import omni.client
+import omni.kit.test
+
+from .. import download_manager
+from ..download_history import DownloadStatus
+from ..download_manager import DownloadManager
+from ..models.asset_fusion import AssetFusion
+
+VENDOR = "SCRIPTED"
+
+
+class _ScriptedStore:
+    """Store whose downloads run until released by the test. Accepts only the arguments every store shares."""
+
+    def __init__(self):
+        self.started: List[str] = []
+        self.cancelled: List[str] = []
+        self._releases: Dict[str, asyncio.Future] = {}
+
+    def _release_future(self, url: str) -> asyncio.Future:
+        if url not in self._releases:
+            self._releases[url] = asyncio.get_event_loop().create_future()
+        return self._releases[url]
+
+    def release(self, url: str, status=omni.client.Result.OK) -> None:
+        self._release_future(url).set_result(status)
+
+    async def download(self, fusion: AssetFusion, dest_url: str, on_progress_fn=None, timeout: int = 600) -> Dict:
+        self.started.append(fusion.url)
+        try:
+            status = await self._release_future(fusion.url)
+        except asyncio.CancelledError:
+            self.cancelled.append(fusion.url)
+            self._releases.pop(fusion.url, None)
+            raise
+        return {"url": f"{dest_url}/{fusion.name}", "status": status}
+
+
+class TestDownloadManager(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._store = _ScriptedStore()
+        self._get_asset_services = download_manager.get_asset_services
+        download_manager.get_asset_services = lambda: SimpleNamespace(get_store=lambda vendor: self._store)
+        self._manager = None
+        self._changes: List[DownloadStatus] = []
+
+    async def tearDown(self):
+        if self._manager is not None:
+            self._manager.destroy()
+        download_manager.get_asset_services = self._get_asset_services
+
+    def _start(self, max_concurrent: int) -> DownloadManager:
+        self._manager = DownloadManager(max_concurrent=max_concurrent)
+        self._manager.subscribe(lambda job: self._changes.append(job.status))
+        return self._manager
+
+    @staticmethod
+    def _fusion(name: str) -> AssetFusion:
+        asset = SimpleNamespace(asset_model={"vendor": VENDOR})
+        return AssetFusion(asset, name, f"https://cloud.artec3d.com/fusions/{name}", "")
+
+    @staticmethod
+    async def _settle() -> None:
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_concurrency_limit(self):
+        self._start(max_concurrent=2)
+        jobs = [self._manager.enqueue(self._fusion(name), "/downloads") for name in ("a", "b", "c")]
+        await self._settle()
+
+        self.assertEqual([job.status for job in jobs], [DownloadStatus.RUNNING] * 2 + [DownloadStatus.QUEUED])
+
+        self._store.release(jobs[0].fusion.url)
+        await self._settle()
+
+        self.assertEqual(jobs[0].status, DownloadStatus.COMPLETED)
+        self.assertEqual(jobs[2].status, DownloadStatus.RUNNING)
+
+    async def test_priority(self):
+        self._start(max_concurrent=1)
+        blocker = self._manager.enqueue(self._fusion("blocker"), "/downloads")
+        await self._settle()
+        low = self._manager.enqueue(self._fusion("low"), "/downloads")
+        high = self._manager.enqueue(self._fusion("high"), "/downloads", priority=1)
+
+        self._store.release(blocker.fusion.url)
+        await self._settle()
+
+        self.assertEqual(high.status, DownloadStatus.RUNNING)
+        self.assertEqual(low.status, DownloadStatus.QUEUED)
+        self.assertEqual(self._store.started, [blocker.fusion.url, high.fusion.url])
+
+    async def test_identical_requests_are_merged(self):
+        self._start(max_concurrent=2)
+        job = self._manager.enqueue(self._fusion("a"), "/downloads")
+
+        self.assertIs(self._manager.enqueue(self._fusion("a"), "/downloads"), job)
+        self.assertIsNot(self._manager.enqueue(self._fusion("a"), "/elsewhere"), job)
+
+    async def test_pause_and_resume_running(self):
+        self._start(max_concurrent=2)
+        job = self._manager.enqueue(self._fusion("a"), "/downloads")
+        await self._settle()
+
+        self._manager.pause(job)
+        await self._settle()
+
+        self.assertEqual(job.status, DownloadStatus.PAUSED)
+        self.assertEqual(self._store.cancelled, [job.fusion.url])
+
+        self._manager.resume(job)
+        await self._settle()
+        self.assertEqual(job.status, DownloadStatus.RUNNING)
+
+        self._store.release(job.fusion.url)
+        await self._settle()
+        self.assertEqual(job.status, DownloadStatus.COMPLETED)
+        self.assertEqual(self._store.started, [job.fusion.url] * 2)
+
+    async def test_paused_job_is_not_started(self):
+        self._start(max_concurrent=1)
+        blocker = self._manager.enqueue(self._fusion("blocker"), "/downloads")
+        job = self._manager.enqueue(self._fusion("a"), "/downloads")
+        self._manager.pause(job)
+
+        self._store.release(blocker.fusion.url)
+        await self._settle()
+
+        self.assertEqual(job.status, DownloadStatus.PAUSED)
+        self.assertEqual(self._store.started, [blocker.fusion.url])
+
+    async def test_cancel(self):
+        self._start(max_concurrent=1)
+        running = self._manager.enqueue(self._fusion("running"), "/downloads")
+        queued = self._manager.enqueue(self._fusion("queued"), "/downloads")
+        await self._settle()
+
+        self._manager.cancel(queued)
+        self._manager.cancel(running)
+        await self._settle()
+
+        self.assertEqual(running.status, DownloadStatus.CANCELLED)
+        self.assertEqual(queued.status, DownloadStatus.CANCELLED)
+        self.assertEqual(self._store.started, [running.fusion.url])
+        self.assertEqual(self._store.cancelled, [running.fusion.url])
+        self.assertEqual(self._manager.active_jobs, [])
+
+    async def test_failed(self):
+        self._start(max_concurrent=2)
+        job = self._manager.enqueue(self._fusion("a"), "/downloads")
+        await self._settle()
+
+        self._store.release(job.fusion.url, status=omni.client.Result.ERROR)
+        await self._settle()
+
+        self.assertEqual(job.status, DownloadStatus.FAILED)
+        self.assertEqual(self._changes, [DownloadStatus.QUEUED, DownloadStatus.RUNNING, DownloadStatus.FAILED])
+        self._manager.clear_finished()
+        self.assertEqual(self._manager.jobs, [])
@@ -0,0 +1,149 @@
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import omni.kit.test
+
+from ..project_mirror import CloudProjectMirror
+
+PER_PAGE = 2
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Cloud:
+    """Listing of projects, newest first, whose urls get a new signature on every request"""
+
+    def __init__(self, count: int):
+        self.names = [f"project{index}" for index in reversed(range(count))]
+        self.requests: List = []
+        self._signature = 0
+
+    def _project(self, name: str) -> Dict:
+        self._signature += 1
+        return {
+            "identifier": name,
+            "name": name,
+            "product_url": f"https://cloud.artec3d.com/projects/{name}",
+            "thumbnail": f"https://previews.artec3d.com/{name}.png?signature={self._signature}",
+        }
+
+    async def fetch_page(self, page: int, sort: Tuple[str, str]) -> Tuple[List[Dict], Dict]:
+        self.requests.append(page)
+        names = self.names[(page - 1) * PER_PAGE:page * PER_PAGE]
+        return ([self._project(name) for name in names], {"total_count": len(self.names), "per_page": PER_PAGE})
+
+    async def fetch_all(self, sort: Tuple[str, str]) -> List[Dict]:
+        self.requests.append("all")
+        return [self._project(name) for name in self.names]
+
+    async def fetch_project(self, slug: str) -> Optional[Dict]:
+        self.requests.append(slug)
+        return self._project(slug) if slug in self.names else None
+
+
+class TestProjectMirror(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._clock = _Clock()
+        self._cloud = _Cloud(6)
+        self._mirror = self._create_mirror()
+        await self._mirror.sync()
+        self._cloud.requests.clear()
+
+    async def tearDown(self):
+        self._mirror.destroy()
+        self._tmp_dir.cleanup()
+
+    def _create_mirror(self) -> CloudProjectMirror:
+        mirror = CloudProjectMirror(
+            self._tmp_dir.name,
+            self._cloud.fetch_page,
+            self._cloud.fetch_all,
+            self._cloud.fetch_project,
+            sync_interval=60,
+            full_sync_interval=3600,
+            url_max_age=600,
+            page_size=PER_PAGE,
+            clock=self._clock,
+        )
+        mirror.set_user("user")
+        return mirror
+
+    def _thumbnails(self) -> Dict[str, str]:
+        return {project["identifier"]: project["thumbnail"] for project in self._mirror.query()}
+
+    async def test_new_urls_are_not_changes(self):
+        thumbnails = self._thumbnails()
+        self._clock.now += 60
+
+        changed = await self._mirror.sync()
+
+        self.assertFalse(changed)
+        # The first page brought nothing new
+        self.assertEqual(self._cloud.requests, [1])
+        fresh_thumbnails = self._thumbnails()
+        self.assertNotEqual(fresh_thumbnails["project5"], thumbnails["project5"])
+        self.assertEqual(fresh_thumbnails["project1"], thumbnails["project1"])
+
+    async def test_new_projects_are_changes(self):
+        self._cloud.names[0:0] = ["project7", "project6"]
+        self._clock.now += 60
+
+        changed = await self._mirror.sync()
+
+        self.assertTrue(changed)
+        # Until a page without new projects
+        self.assertEqual(self._cloud.requests, [1, 2])
+        self.assertEqual(len(self._mirror.query()), 8)
+
+    async def test_removed_projects_need_a_full_sync(self):
+        self._cloud.names.remove("project2")
+        self._clock.now += 60
+
+        changed = await self._mirror.sync()
+
+        self.assertTrue(changed)
+        self.assertEqual(self._cloud.requests, [1, "all"])
+        self.assertNotIn("project2", self._thumbnails())
+
+    async def test_expired_urls_are_signed_again_when_shown(self):
+        thumbnails = self._thumbnails()
+        self.assertFalse(self._mirror.urls_expired(self._mirror.query()))
+
+        self._clock.now += 601
+        shown = self._mirror.query(category="project1")
+        self.assertTrue(self._mirror.urls_expired(shown))
+        self.assertEqual(await self._mirror.resign(project["identifier"] for project in shown), 1)
+
+        self.assertEqual(self._cloud.requests, ["project1"])
+        fresh_thumbnails = self._thumbnails()
+        self.assertNotEqual(fresh_thumbnails["project1"], thumbnails["project1"])
+        self.assertEqual(fresh_thumbnails["project2"], thumbnails["project2"])
+        self.assertFalse(self._mirror.urls_expired(self._mirror.query(category="project1")))
+        self.assertEqual(await self._mirror.resign(["project1"]), 0)
+
+    async def test_many_expired_urls_are_listed_again(self):
+        self._clock.now += 601
+
+        # More projects than pages in the listing
+        self.assertEqual(await self._mirror.resign(["project1", "project2", "project3", "project4"]), 4)
+
+        self.assertEqual(self._cloud.requests, ["all"])
+        self.assertFalse(self._mirror.urls_expired(self._mirror.query()))
+
+    async def test_signing_times_are_persisted(self):
+        self._clock.now += 601
+        await self._mirror.resign(["project1"])
+        self._mirror.destroy()
+
+        self._mirror = self._create_mirror()
+
+        self.assertTrue(self._mirror.ready)
+        self.assertFalse(self._mirror.urls_expired(self._mirror.query(category="project1")))
+        self.assertTrue(self._mirror.urls_expired(self._mirror.query(category="project2")))
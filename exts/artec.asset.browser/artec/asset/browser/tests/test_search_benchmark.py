@@ -0,0 +1,157 @@
+import statistics
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+import carb
+import carb.settings
+import omni.kit.test
+from artec.services.browser.asset import SearchCriteria
+
+from ..artec_cloud import ArtecCloudAssetProvider, SETTING_ROOT
+from .mock_cloud import MockArtecCloud
+
+# Benchmark runs, first one is reported separately as it also opens connections
+REPEAT = 5
+
+
+class TestSearchBenchmark(omni.kit.test.AsyncTestCase):
+    """
+    Time to first page and total listing time of cloud searches against a local mock cloud.
+    Results are logged, the tests only check that listings are complete and ordered.
+    Skipped unless the runBenchmarks setting is enabled.
+    """
+
+    async def setUp(self):
+        self._settings = carb.settings.get_settings()
+        if not self._settings.get_as_bool(SETTING_ROOT + "runBenchmarks"):
+            self.skipTest("Benchmarks are disabled")
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._saved_settings: Dict[str, object] = {}
+        self._cloud = None
+        self._provider = None
+        # Never touch the caches of the user
+        tmp_path = Path(self._tmp_dir.name)
+        self._set_setting("convertedCachePath", str(tmp_path / "converted"))
+        self._set_setting("thumbnailCachePath", str(tmp_path / "thumbnails"))
+        self._set_setting("searchCachePath", str(tmp_path / "searches.json"))
+        self._set_setting("projectMirrorPath", str(tmp_path / "mirror"))
+
+    async def tearDown(self):
+        if self._provider is not None:
+            self._provider.destroy()
+        if self._cloud is not None:
+            await self._cloud.stop()
+        for key, value in self._saved_settings.items():
+            self._settings.set(SETTING_ROOT + key, value)
+        self._tmp_dir.cleanup()
+
+    def _set_setting(self, key: str, value) -> None:
+        if key not in self._saved_settings:
+            self._saved_settings[key] = self._settings.get(SETTING_ROOT + key)
+        self._settings.set(SETTING_ROOT + key, value)
+
+    async def _start(self, cloud: MockArtecCloud, per_page: int, concurrent_pages: int) -> None:
+        self._cloud = cloud
+        await cloud.start()
+        for key, value in cloud.settings.items():
+            self._set_setting(key, value)
+        self._set_setting("maxCountPerPage", per_page)
+        self._set_setting("maxConcurrentPageRequests", concurrent_pages)
+        # Measure the cloud, not local copies of it
+        self._set_setting("projectMirror", False)
+        # Pagination is benchmarked, not the request policy
+        self._set_setting("cloudRequestRate", 1000.0)
+        self._set_setting("cloudRequestBurst", 1000)
+        self._set_setting("cloudMaxConcurrentRequests", 64)
+        self._provider = ArtecCloudAssetProvider()
+        await self._provider.authenticate("mock@artec3d.com", "mock")
+        self.assertTrue(self._provider.authorized())
+
+    async def _benchmark(self, name: str) -> Dict[str, float]:
+        params = {
+            "auth_token": self._provider._auth_token,
+            "sort_field": "name",
+            "sort_direction": "asc",
+            "term": "",
+            "slug": "",
+            "per_page": self._settings.get_as_int(SETTING_ROOT + "maxCountPerPage"),
+            "page": 0,
+        }
+        first_page_times: List[float] = []
+        total_times: List[float] = []
+        first_page_at: List[float] = []
+        fetch_page = self._provider._fetch_page
+
+        async def __fetch_page(session, page_params):
+            result = await fetch_page(session, page_params)
+            if page_params["page"] == 1:
+                first_page_at.append(perf_counter())
+            return result
+
+        self._provider._fetch_page = __fetch_page
+        try:
+            for _ in range(REPEAT):
+                self._cloud.reset_stats()
+                first_page_at.clear()
+                started_at = perf_counter()
+                (assets, _) = await self._provider._search_all_pages(params)
+                total_times.append(perf_counter() - started_at)
+                first_page_times.append(first_page_at[0] - started_at)
+
+                self.assertEqual(len(assets), self._cloud.project_count)
+                names = [asset.name for asset in assets]
+                self.assertEqual(names, sorted(names))
+        finally:
+            del self._provider._fetch_page
+        requests = sum(self._cloud.request_counts.values())
+        max_in_flight = self._cloud.max_in_flight
+
+        # Through the provider entry point, cold search cache
+        started_at = perf_counter()
+        (assets, _) = await self._provider._search(SearchCriteria(sort=("name", "asc")))
+        search_time = perf_counter() - started_at
+        self.assertEqual(len(assets), self._cloud.project_count)
+
+        results = {
+            "first_page_cold": first_page_times[0],
+            "first_page": statistics.median(first_page_times[1:]),
+            "total_cold": total_times[0],
+            "total": statistics.median(total_times[1:]),
+            "search": search_time,
+            "requests": requests,
+            "max_in_flight": max_in_flight,
+        }
+        carb.log_info(
+            f"[search benchmark] {name}: first page {results['first_page'] * 1000:.1f}ms "
+            f"(cold {results['first_page_cold'] * 1000:.1f}ms), "
+            f"all pages {results['total'] * 1000:.1f}ms (cold {results['total_cold'] * 1000:.1f}ms), "
+            f"_search {results['search'] * 1000:.1f}ms, {results['requests']} requests, "
+            f"{results['max_in_flight']} in flight at most"
+        )
+        return results
+
+    async def test_small_listing(self):
+        await self._start(MockArtecCloud(project_count=20, latency=0.02), per_page=50, concurrent_pages=4)
+        results = await self._benchmark("20 projects, 1 page")
+        self.assertEqual(results["requests"], 1)
+
+    async def test_paginated_listing(self):
+        await self._start(MockArtecCloud(project_count=500, latency=0.02), per_page=20, concurrent_pages=4)
+        results = await self._benchmark("500 projects, 25 pages of 20, 4 concurrent")
+        self.assertLessEqual(results["max_in_flight"], 4)
+
+    async def test_paginated_listing_sequential(self):
+        await self._start(MockArtecCloud(project_count=500, latency=0.02), per_page=20, concurrent_pages=1)
+        results = await self._benchmark("500 projects, 25 pages of 20, sequential")
+        self.assertEqual(results["max_in_flight"], 1)
+
+    async def test_server_page_cap(self):
+        # Server serves smaller pages than asked for, the listing must still be complete
+        await self._start(
+            MockArtecCloud(project_count=300, max_per_page=25, latency=0.02, latency_jitter=0.02),
+            per_page=100,
+            concurrent_pages=4,
+        )
+        await self._benchmark("300 projects, pages capped to 25, jittered latency")
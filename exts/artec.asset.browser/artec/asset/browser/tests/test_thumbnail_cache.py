@@ -0,0 +1,84 @@
+import tempfile
+from pathlib import Path
+
+import omni.kit.test
+
+from ..cloud_policy import CloudRequestPolicy
+from ..thumbnail_cache import ThumbnailCache
+from .mock_cloud import MockArtecCloud, create_png
+
+PREVIEW_SIZE = len(create_png(64, 64))
+
+
+class TestThumbnailCache(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._cloud = MockArtecCloud(project_count=1)
+        await self._cloud.start()
+        self._cache = self._create_cache()
+
+    async def tearDown(self):
+        await self._cloud.stop()
+        self._tmp_dir.cleanup()
+
+    def _create_cache(self, max_size: int = 10 * PREVIEW_SIZE) -> ThumbnailCache:
+        """A new cache on the same folder, as in a new session"""
+        policy = CloudRequestPolicy(max_retries=0, rate=1000.0, burst=1000)
+        return ThumbnailCache(self._tmp_dir.name, max_size, policy)
+
+    def _url(self, name: str, signature: int = 0) -> str:
+        return f"{self._cloud.base_url}/previews/{name}.png?signature={signature}"
+
+    @property
+    def _request_count(self) -> int:
+        return self._cloud.request_counts["preview"]
+
+    async def test_miss_then_hit(self):
+        self.assertIsNone(self._cache.get_path("scan", self._url("a")))
+
+        path = await self._cache.fetch("scan", self._url("a"))
+
+        self.assertEqual(Path(path).read_bytes(), create_png(64, 64))
+        self.assertEqual(self._request_count, 1)
+        # Signed again, still the same preview
+        self.assertEqual(self._cache.get_path("scan", self._url("a", signature=1)), path)
+        self.assertEqual(await self._cache.fetch("scan", self._url("a", signature=1)), path)
+        self.assertEqual(self._request_count, 1)
+
+    async def test_revalidated_once_per_session(self):
+        path = await self._cache.fetch("scan", self._url("a"))
+
+        self._cache = self._create_cache()
+
+        self.assertEqual(self._cache.get_path("scan", self._url("a")), path)
+        self.assertEqual(await self._cache.fetch("scan", self._url("a")), path)
+        self.assertEqual(await self._cache.fetch("scan", self._url("a")), path)
+        # A single conditional request, answered with 304
+        self.assertEqual(self._request_count, 2)
+
+    async def test_stale_preview_on_failure(self):
+        path = await self._cache.fetch("scan", self._url("a"))
+        self._cache = self._create_cache()
+        self._cloud.failures.extend([(500, {})] * 2)
+
+        self.assertEqual(await self._cache.fetch("scan", self._url("a")), path)
+        self.assertIsNone(await self._cache.fetch("scan", self._url("b")))
+
+    async def test_least_recently_used_are_evicted(self):
+        self._cache = self._create_cache(max_size=2 * PREVIEW_SIZE)
+        path_a = await self._cache.fetch("scan", self._url("a"))
+        path_b = await self._cache.fetch("scan", self._url("b"))
+        # Used again, b becomes the oldest
+        await self._cache.fetch("scan", self._url("a"))
+
+        path_c = await self._cache.fetch("scan", self._url("c"))
+
+        self.assertIsNone(self._cache.get_path("scan", self._url("b")))
+        self.assertFalse(Path(path_b).exists())
+        self.assertEqual(self._cache.get_path("scan", self._url("a")), path_a)
+        self.assertEqual(self._cache.get_path("scan", self._url("c")), path_c)
+
+        # The index is persisted
+        self._cache = self._create_cache(max_size=2 * PREVIEW_SIZE)
+        self.assertIsNone(self._cache.get_path("scan", self._url("b")))
+        self.assertEqual(self._cache.get_path("scan", self._url("c")), path_c)
@@ -0,0 +1,57 @@
+import os
+import struct
+import tempfile
+import zipfile
+from pathlib import Path
+
+import omni.kit.test
+
+from ..usdz_writer import PADDING_HEADER_ID, USDZ_ALIGNMENT, UsdzWriter
+
+LOCAL_FILE_HEADER = struct.Struct("<4s5H3L2H")
+
+
+class TestUsdzWriter(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._tmp_path = Path(self._tmp_dir.name)
+        self._usdz_path = self._tmp_path / "scan.usdz"
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write(self, files) -> None:
+        with UsdzWriter(self._usdz_path) as writer:
+            for (arcname, data) in files.items():
+                file_path = self._tmp_path / "source"
+                file_path.write_bytes(data)
+                writer.add_file(file_path, arcname)
+
+    async def test_members_are_stored_and_aligned(self):
+        # Name lengths and sizes giving every padding, including the ones too small for an extra field
+        files = {"scan.usd": os.urandom(1000)}
+        for index in range(USDZ_ALIGNMENT):
+            files[f"textures/{'t' * (index + 1)}.png"] = os.urandom(index * 7)
+        self._write(files)
+
+        with zipfile.ZipFile(self._usdz_path) as archive, open(self._usdz_path, "rb") as usdz_file:
+            infos = archive.infolist()
+            self.assertEqual([info.filename for info in infos], list(files))
+            for info in infos:
+                self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+
+                usdz_file.seek(info.header_offset)
+                header = LOCAL_FILE_HEADER.unpack(usdz_file.read(LOCAL_FILE_HEADER.size))
+                (signature, name_length, extra_length) = (header[0], header[-2], header[-1])
+                self.assertEqual(signature, b"PK\x03\x04")
+                usdz_file.seek(name_length, os.SEEK_CUR)
+                extra = usdz_file.read(extra_length)
+                data_offset = info.header_offset + LOCAL_FILE_HEADER.size + name_length + extra_length
+
+                self.assertEqual(data_offset % USDZ_ALIGNMENT, 0, info.filename)
+                if extra:
+                    (header_id, size) = struct.unpack("<HH", extra[:4])
+                    self.assertEqual(header_id, PADDING_HEADER_ID)
+                    self.assertEqual(size, extra_length - 4)
+                # Data is in place, uncompressed
+                self.assertEqual(usdz_file.read(info.file_size), files[info.filename])
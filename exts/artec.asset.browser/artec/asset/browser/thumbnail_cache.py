@@ -0,0 +1,186 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import hashlib
+import os
+import threading
+from pathlib import Path
+from time import time
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+
+import aiofiles
+import aiohttp
+import carb
+
+from .cloud_policy import CircuitOpenError, CloudRequestPolicy
+from .json_index import load_json_index, save_json_index
+
+INDEX_FILE = "index.json"
+
+
+class ThumbnailCache:
+    """
+    Local cache of preview images.
+    Preview urls carry session dependent tokens and signatures in their query, so entries are keyed by asset id and
+    url path, which changes with the preview content. Cached entries are revalidated once per session with
+    conditional requests (ETag / Last-Modified) and least recently used entries are evicted once the cache grows
+    over max_size.
+    Args:
+        cache_root (str): Folder of the cache.
+        max_size (int): Maximum total size of cached files in bytes.
+        request_policy (CloudRequestPolicy): Policy previews are fetched under.
+        max_concurrent (int): Maximum number of previews fetched at the same time.
+    """
+
+    def __init__(self, cache_root: str, max_size: int, request_policy: CloudRequestPolicy, max_concurrent: int = 6):
+        self._cache_root = Path(cache_root)
+        self._request_policy = request_policy
+        self._index_file = self._cache_root / INDEX_FILE
+        self._max_size = max_size
+        self._max_concurrent = max(1, max_concurrent)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._revalidated: Set[str] = set()
+        self._fetching: Dict[str, asyncio.Future] = {}
+
+        self._load_index()
+
+    @staticmethod
+    def get_key(asset_id: str, url: str) -> str:
+        return hashlib.sha1(f"{asset_id}/{urlparse(url).path}".encode("utf-8")).hexdigest()
+
+    def get_path(self, asset_id: str, url: str) -> Optional[str]:
+        """
+        Get the cached preview of an asset without any request.
+        Args:
+            asset_id (str): Asset identifier.
+            url (str): Preview url.
+        Return:
+            Local path of the preview if cached. Else None.
+        """
+        key = self.get_key(asset_id, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["last_used"] = time()
+        path = self._cache_root / entry["file"]
+        return str(path) if path.exists() else None
+
+    async def fetch(self, asset_id: str, url: str) -> Optional[str]:
+        """
+        Get the preview of an asset, downloading or revalidating it if required.
+        Args:
+            asset_id (str): Asset identifier.
+            url (str): Preview url.
+        Return:
+            Local path of the preview. None if it could not be downloaded.
+        """
+        key = self.get_key(asset_id, url)
+        cached_path = self.get_path(asset_id, url)
+        if cached_path and key in self._revalidated:
+            return cached_path
+
+        # Same preview shown by several items is fetched once
+        if key not in self._fetching:
+            self._fetching[key] = asyncio.ensure_future(self._fetch(key, url))
+            self._fetching[key].add_done_callback(lambda _: self._fetching.pop(key, None))
+        return await asyncio.shield(self._fetching[key])
+
+    async def _fetch(self, key: str, url: str) -> Optional[str]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent)
+
+        with self._lock:
+            entry = dict(self._entries.get(key, {}))
+        path = self._cache_root / entry["file"] if entry else None
+        headers = {}
+        if path and path.exists():
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with self._semaphore:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    (status, response_headers, data) = await self._request_policy.get_bytes(
+                        session, url, headers=headers
+                    )
+            except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+                status = None
+                error = str(e) or type(e).__name__
+            else:
+                error = f"status {status}"
+        if status == 304:
+            self._revalidated.add(key)
+            return str(path)
+        if status != 200:
+            carb.log_warn(f"Failed to fetch preview {urlparse(url).path}: {error}")
+            # Better a stale preview than none
+            return str(path) if path and path.exists() else None
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        content_type = response_headers.get("Content-Type", "")
+
+        file_name = key + self._get_extension(url, content_type)
+        try:
+            self._cache_root.mkdir(parents=True, exist_ok=True)
+            async with aiofiles.open(self._cache_root / file_name, "wb") as file:
+                await file.write(data)
+        except OSError as e:
+            carb.log_warn(f"Failed to cache preview {file_name}: {e}")
+            return None
+
+        with self._lock:
+            self._entries[key] = {
+                "file": file_name,
+                "size": len(data),
+                "etag": etag,
+                "last_modified": last_modified,
+                "last_used": time(),
+            }
+        self._revalidated.add(key)
+        await asyncio.get_event_loop().run_in_executor(None, self._evict_and_save, key)
+        return str(self._cache_root / file_name)
+
+    @staticmethod
+    def _get_extension(url: str, content_type: str) -> str:
+        extension = os.path.splitext(urlparse(url).path)[-1].lower()
+        if extension in (".png", ".jpg", ".jpeg"):
+            return extension
+        return ".jpg" if "jpeg" in content_type else ".png"
+
+    def _evict_and_save(self, keep: str) -> None:
+        with self._lock:
+            total_size = sum(entry["size"] for entry in self._entries.values())
+            candidates = sorted(
+                (key for key in self._entries if key != keep), key=lambda key: self._entries[key]["last_used"]
+            )
+            for key in candidates:
+                if total_size <= self._max_size:
+                    break
+                entry = self._entries.pop(key)
+                total_size -= entry["size"]
+                self._revalidated.discard(key)
+                try:
+                    (self._cache_root / entry["file"]).unlink()
+                except OSError:
+                    pass
+        self._save_index()
+
+    def _save_index(self):
+        with self._lock:
+            entries = dict(self._entries)
+        save_json_index(self._index_file, entries, indent=4)
+
+    def _load_index(self):
+        self._entries = load_json_index(self._index_file) or {}
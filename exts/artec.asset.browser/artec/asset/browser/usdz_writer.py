@@ -0,0 +1,76 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import shutil
+import struct
+import zipfile
+from pathlib import Path
+from typing import Union
+
+# USD memory maps usdz members, which requires uncompressed data starting on a 64 bytes boundary
+USDZ_ALIGNMENT = 64
+# Header id of the extra field used to pad local file headers, the same one USD uses
+PADDING_HEADER_ID = 0x1986
+LOCAL_FILE_HEADER_SIZE = 30
+ZIP64_EXTRA_SIZE = 20
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class UsdzWriter:
+    """
+    Write a USDZ package.
+    Members are stored without compression and the data of every member starts on a 64 bytes boundary, so USD
+    can memory map the package instead of reading it. Files are streamed in chunks, never loaded in memory.
+    The first file added should be the root layer.
+    Args:
+        usdz_path (Union[str, Path]): Path of the package to create.
+    """
+
+    def __init__(self, usdz_path: Union[str, Path]):
+        self._archive = zipfile.ZipFile(str(usdz_path), "w", compression=zipfile.ZIP_STORED)
+
+    def __enter__(self) -> "UsdzWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._archive.close()
+
+    def add_file(self, file_path: Union[str, Path], arcname: Union[str, Path]) -> None:
+        """
+        Add a file to the package.
+        Args:
+            file_path (Union[str, Path]): Local file to add.
+            arcname (Union[str, Path]): Path of the file inside the package.
+        """
+        zip_info = zipfile.ZipInfo.from_file(str(file_path), arcname=str(arcname))
+        zip_info.compress_type = zipfile.ZIP_STORED
+        zip_info.extra = self._get_padding(zip_info)
+        with open(file_path, "rb") as source, self._archive.open(zip_info, "w") as dest:
+            shutil.copyfileobj(source, dest, COPY_CHUNK_SIZE)
+
+    def _get_padding(self, zip_info: zipfile.ZipInfo) -> bytes:
+        try:
+            filename = zip_info.filename.encode("ascii")
+        except UnicodeEncodeError:
+            filename = zip_info.filename.encode("utf-8")
+        header_size = LOCAL_FILE_HEADER_SIZE + len(filename)
+        # Same rule zipfile uses to decide whether the local header gets a zip64 extra field
+        if zip_info.file_size * 1.05 > zipfile.ZIP64_LIMIT:
+            header_size += ZIP64_EXTRA_SIZE
+
+        data_offset = self._archive.fp.tell() + header_size
+        padding = -data_offset % USDZ_ALIGNMENT
+        if padding == 0:
+            return b""
+        if padding < 4:
+            # Too small for an extra field header, pad up to the next boundary
+            padding += USDZ_ALIGNMENT
+        return struct.pack("<HH", PADDING_HEADER_ID, padding - 4) + b"\0" * (padding - 4)
@@ -6,6 +6,8 @@
 # distribution of this software and related documentation without an express
 # license agreement from NVIDIA CORPORATION is strictly prohibited.
 from .extension import AssetServiceExtension, get_instance
-from .models import AssetModel, SearchCriteria, ProviderModel
-from .store import BaseAssetStore, LocalFolderAssetProvider
+from .models import AssetModel, SearchCriteria, ProviderModel, MergedSearchCriteria, MergedSearchResult
+from .store import BaseAssetStore, DownloadOutcome, LocalFolderAssetProvider, get_sort_key
 from .collector import S3Collector
+from .transfer import download_file, TransferError
+from .archive import extract_zip, select_usd_members
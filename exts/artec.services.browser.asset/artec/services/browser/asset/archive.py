@@ -0,0 +1,213 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import io
+import os
+import posixpath
+import re
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Set
+
+import carb
+
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+USD_LAYER_EXTENSIONS = (".usd", ".usda", ".usdc", ".usdz")
+CRATE_MAGIC = b"PXR-USDC"
+# Asset paths of text files, readable without USD
+USDA_ASSET_PATH_PATTERN = re.compile(r"@([^@\n]+)@")
+MDL_ASSET_PATH_PATTERN = re.compile(r'"([^"\n]+\.[A-Za-z0-9]+)"')
+UDIM_TOKEN = "<UDIM>"
+
+
+class ExtractionCancelled(Exception):
+    """Raised inside extraction workers when extraction has been cancelled."""
+    pass
+
+
+async def extract_zip(
+    zip_path: str,
+    output_path: str,
+    members: Optional[List[str]] = None,
+    on_progress_fn: Optional[Callable[[float], None]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> List[str]:
+    """
+    Extract a zip archive in worker threads so the event loop stays responsive.
+    Members are spread over several workers, each with its own handle on the archive, and extracted in parallel.
+    Cancelling the awaiting task stops the workers after the member they are currently writing.
+    Args:
+        zip_path (str): Local path of the archive.
+        output_path (str): Local folder to extract into.
+        members (List[str]): Names of the members to extract. All members if None.
+        on_progress_fn (Callable): Called on the event loop with the extraction progress in [0, 1].
+        max_workers (int): Maximum number of worker threads.
+    Return:
+        Names of the extracted members.
+    """
+    loop = asyncio.get_event_loop()
+    infos = await loop.run_in_executor(None, _read_index, zip_path)
+    if members is not None:
+        wanted = set(members)
+        infos = [info for info in infos if info.filename in wanted]
+
+    # Workers creating the same folder at once would fail, folders are created up front
+    await loop.run_in_executor(None, _create_member_folders, output_path, infos)
+    total_size = sum(info.file_size for info in infos) or 1
+    extracted_size = 0
+    cancel_event = threading.Event()
+
+    def __on_member_extracted(size: int) -> None:
+        nonlocal extracted_size
+        extracted_size += size
+        if on_progress_fn:
+            on_progress_fn(min(float(extracted_size) / total_size, 1))
+
+    def __extract(bucket: List[zipfile.ZipInfo]) -> None:
+        with zipfile.ZipFile(zip_path, "r") as archive:
+            for info in bucket:
+                if cancel_event.is_set():
+                    raise ExtractionCancelled()
+                archive.extract(info, output_path)
+                loop.call_soon_threadsafe(__on_member_extracted, info.file_size)
+
+    # Balance workers by size, largest members first
+    buckets: List[List[zipfile.ZipInfo]] = [[] for _ in range(max(1, min(max_workers, len(infos))))]
+    bucket_sizes = [0] * len(buckets)
+    for info in sorted(infos, key=lambda info: info.file_size, reverse=True):
+        index = bucket_sizes.index(min(bucket_sizes))
+        buckets[index].append(info)
+        bucket_sizes[index] += info.file_size
+
+    if on_progress_fn:
+        on_progress_fn(0)
+    with ThreadPoolExecutor(max_workers=len(buckets)) as executor:
+        futures = [loop.run_in_executor(executor, __extract, bucket) for bucket in buckets if bucket]
+        try:
+            await asyncio.gather(*futures)
+        except (asyncio.CancelledError, Exception):
+            # Let workers stop before leaving, callers usually remove the output folder right after
+            cancel_event.set()
+            await asyncio.wait(futures)
+            raise
+
+    return [info.filename for info in infos]
+
+
+def _read_index(zip_path: str) -> List[zipfile.ZipInfo]:
+    with zipfile.ZipFile(zip_path, "r") as archive:
+        return archive.infolist()
+
+
+def _create_member_folders(output_path: str, infos: List[zipfile.ZipInfo]) -> None:
+    os.makedirs(output_path, exist_ok=True)
+    for folder in {posixpath.dirname(info.filename) for info in infos}:
+        # Same sanitizing as zipfile applies to member paths
+        parts = [part for part in folder.split("/") if part not in ("", ".", "..")]
+        if parts:
+            os.makedirs(os.path.join(output_path, *parts), exist_ok=True)
+
+
+async def select_usd_members(zip_path: str) -> Optional[List[str]]:
+    """
+    Select the members of a zip archive needed by its USD layers: the layers and, recursively, the files they
+    reference (sublayers, references, payloads, textures, MDL materials and their textures). Text layers are
+    scanned from the archive, binary layers are read with USD when it is available.
+    Args:
+        zip_path (str): Local path of the archive.
+    Return:
+        Names of the selected members, to be passed to extract_zip. None if the archive has no USD layer or some
+        dependencies cannot be read, then the whole archive should be extracted.
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, _select_usd_members, zip_path)
+
+
+def _select_usd_members(zip_path: str) -> Optional[List[str]]:
+    with zipfile.ZipFile(zip_path, "r") as archive:
+        names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        name_set = set(names)
+        pending = [name for name in names if name.lower().endswith(USD_LAYER_EXTENSIONS)]
+        if not pending:
+            return None
+        selected: Set[str] = set()
+        while pending:
+            name = pending.pop()
+            if name in selected:
+                continue
+            selected.add(name)
+            asset_paths = _read_asset_paths(archive, name)
+            if asset_paths is None:
+                carb.log_info(f"Cannot read dependencies of {name} in {zip_path}, extracting the whole archive")
+                return None
+            for asset_path in asset_paths:
+                pending += [member for member in _resolve_asset_path(name, asset_path, names, name_set)
+                            if member not in selected]
+    return sorted(selected)
+
+
+def _read_asset_paths(archive: zipfile.ZipFile, name: str) -> Optional[List[str]]:
+    """Asset paths referenced by a member, as authored. None if they cannot be read."""
+    extension = posixpath.splitext(name)[1].lower()
+    if extension in (".usd", ".usdc"):
+        with archive.open(name) as file:
+            if file.read(len(CRATE_MAGIC)) == CRATE_MAGIC:
+                return _read_crate_asset_paths(archive, name)
+        pattern = USDA_ASSET_PATH_PATTERN
+    elif extension == ".usda":
+        pattern = USDA_ASSET_PATH_PATTERN
+    elif extension == ".mdl":
+        pattern = MDL_ASSET_PATH_PATTERN
+    else:
+        # Packages are self-contained, textures and other files reference nothing
+        return []
+
+    asset_paths = []
+    # Asset paths never span lines, large layers are scanned line by line
+    with archive.open(name) as file:
+        for line in io.TextIOWrapper(file, encoding="utf-8", errors="replace"):
+            asset_paths += pattern.findall(line)
+    return asset_paths
+
+
+def _read_crate_asset_paths(archive: zipfile.ZipFile, name: str) -> Optional[List[str]]:
+    try:
+        from pxr import UsdUtils
+    except ImportError:
+        return None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        layer_path = archive.extract(name, tmp_dir)
+        try:
+            (sublayers, references, payloads) = UsdUtils.ExtractExternalReferences(layer_path)
+        except Exception:
+            return None
+        # Paths may come back anchored to the extracted layer
+        layer_dir = os.path.dirname(layer_path)
+        asset_paths = []
+        for asset_path in list(sublayers) + list(references) + list(payloads):
+            if os.path.isabs(asset_path) and os.path.normpath(asset_path).startswith(os.path.normpath(layer_dir)):
+                asset_path = os.path.relpath(asset_path, layer_dir).replace(os.sep, "/")
+            asset_paths.append(asset_path)
+        return asset_paths
+
+
+def _resolve_asset_path(layer_name: str, asset_path: str, names: List[str], name_set: Set[str]) -> List[str]:
+    """Members an asset path of a layer refers to, none for paths outside the archive."""
+    asset_path = asset_path.replace("\\", "/")
+    # Files inside a package, like textures of a usdz, come with the package
+    asset_path = asset_path.split("[")[0]
+    if not asset_path or "://" in asset_path or asset_path.startswith("/") or re.match(r"^[A-Za-z]:", asset_path):
+        return []
+    member = posixpath.normpath(posixpath.join(posixpath.dirname(layer_name), asset_path))
+    if UDIM_TOKEN in member:
+        pattern = re.compile(r"\d{4}".join(re.escape(part) for part in member.split(UDIM_TOKEN)))
+        return [name for name in names if pattern.fullmatch(name)]
+    return [member] if member in name_set else []
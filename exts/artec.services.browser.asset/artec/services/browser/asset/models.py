@@ -120,3 +120,20 @@ class SearchCriteria(pydantic.BaseModel):
                 "search_timeout": 60,
             }
         }
+
+
+class MergedSearchCriteria(SearchCriteria):
+    cursor: Optional[str] = pydantic.Field(
+        None,
+        title="Cursor",
+        description="Cursor returned with the previous page of a merged search, none for the first page",
+    )
+
+
+class MergedSearchResult(pydantic.BaseModel):
+    assets: List[AssetModel] = pydantic.Field(
+        ..., title="Assets", description="One page of the results of all stores, in sort order"
+    )
+    cursor: Optional[str] = pydantic.Field(
+        None, title="Cursor", description="Cursor of the next page, none once every store is exhausted"
+    )
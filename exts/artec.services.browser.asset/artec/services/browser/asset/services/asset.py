@@ -12,14 +12,14 @@ import asyncio
 from enum import Enum
 from typing import Dict, List, Tuple
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 
 from omni.services.core import routers
 
 from .dependencies import get_app_header, get_app_version
 
 from ..store.base import AssetStoreGroupFacility
-from ..models import AssetModel, ProviderModel, SearchCriteria, ConfigModel
+from ..models import AssetModel, ProviderModel, SearchCriteria, ConfigModel, MergedSearchCriteria, MergedSearchResult
 
 router = routers.ServiceAPIRouter()
 router.dependencies = [Depends(get_app_header), Depends(get_app_version)]
@@ -43,6 +43,19 @@ async def search(search: SearchCriteria, asset_store: AssetStoreGroupFacility =
     return await asset_store.search(search, stores=search.vendors, search_timeout=60)
 
 
+@router.post("/search/merged", response_model=MergedSearchResult)
+async def search_merged(
+    search: MergedSearchCriteria, asset_store: AssetStoreGroupFacility = router.get_facility("asset_store")
+):
+    try:
+        (assets, cursor) = await asset_store.search_merged(
+            search, stores=search.vendors, search_timeout=60, cursor=search.cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return MergedSearchResult(assets=assets, cursor=cursor)
+
+
 @router.get("/providers", response_model=Dict[str, ProviderModel])
 async def list_vendors(
     asset_store: AssetStoreGroupFacility = router.get_facility("asset_store"),
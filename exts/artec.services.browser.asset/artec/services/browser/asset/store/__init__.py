@@ -6,5 +6,5 @@
 # distribution of this software and related documentation without an express
 # license agreement from NVIDIA CORPORATION is strictly prohibited.
 
-from .base import BaseAssetStore
+from .base import BaseAssetStore, DownloadOutcome, get_sort_key
 from .local import LocalFolderAssetProvider
@@ -10,16 +10,71 @@
 
 import abc
 import asyncio
+import base64
+import contextvars
+import heapq
+import itertools
+import json
+import os
 import traceback
 import omni.client
-import zipfile
 
-from typing import Dict, List, Tuple, Callable
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from time import monotonic
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Callable
 
 import carb
+import carb.settings
 from omni.services.facilities.base import Facility
 
-from ..models import AssetModel, ProviderModel, SearchCriteria
+from ..models import AssetModel, ProviderModel, SearchCriteria, _Page
+from ..archive import extract_zip, select_usd_members
+from ..transfer import download_file, TransferError
+
+SETTING_DOWNLOAD_STALL_TIMEOUT = "/exts/artec.services.browser.asset/downloadStallTimeout"
+SETTING_DOWNLOAD_HEARTBEAT_INTERVAL = "/exts/artec.services.browser.asset/downloadHeartbeatInterval"
+SETTING_SELECTIVE_EXTRACTION = "/exts/artec.services.browser.asset/selectiveZipExtraction"
+SETTING_DOWNLOAD_CONNECTIONS = "/exts/artec.services.browser.asset/downloadConnections"
+SETTING_DOWNLOAD_SEGMENT_SIZE = "/exts/artec.services.browser.asset/downloadSegmentSizeMb"
+DEFAULT_DOWNLOAD_STALL_TIMEOUT = 30.0
+DEFAULT_DOWNLOAD_HEARTBEAT_INTERVAL = 1.0
+
+
+class DownloadOutcome(Enum):
+    """How a supervised download ended, reported as "outcome" in the download response."""
+    COMPLETED = "completed"
+    FAILED = "failed"
+    # No progress reported within the stall window
+    STALLED = "stalled"
+    CANCELLED = "cancelled"
+
+
+class _DownloadSupervision:
+    """Heartbeats of one supervised download"""
+
+    def __init__(self):
+        self.started_at = monotonic()
+        self.last_heartbeat_at: Optional[float] = None
+        # Start of the running local step, which reports no progress of its own
+        self.local_step_started_at: Optional[float] = None
+
+    def heartbeat(self) -> None:
+        self.last_heartbeat_at = monotonic()
+
+    def get_silence(self, timeout: float, stall_timeout: float) -> Tuple[float, float]:
+        """Seconds without a heartbeat, and the window they are allowed"""
+        now = monotonic()
+        if self.local_step_started_at is not None:
+            return (now - max(self.local_step_started_at, self.last_heartbeat_at or 0), timeout)
+        if self.last_heartbeat_at is None:
+            return (now - self.started_at, timeout)
+        return (now - self.last_heartbeat_at, stall_timeout)
+
+
+# Supervision of the download run by the current task, if any
+_download_supervision: contextvars.ContextVar = contextvars.ContextVar("download_supervision", default=None)
 
 
 class BaseAssetStore(Facility, abc.ABC):
@@ -27,7 +82,9 @@ class BaseAssetStore(Facility, abc.ABC):
         super().__init__()
         self._store_id = store_id
         self._categories = {}
-        self._download_progress: Dict[str, float] = {}
+        # Progress of running downloads, by download id
+        self._download_progress: Dict[int, float] = {}
+        self._download_ids = itertools.count()
 
     def authorized(self) -> bool:
         """Override this method to force authentication flow."""
@@ -69,15 +126,22 @@ class BaseAssetStore(Facility, abc.ABC):
 
         This function needs to be implemented as part of an implementation of the BaseAssetStore.
         This function is called by the public `download` function that will wrap this function in a timeout.
+        HTTP assets downloaded to a local folder are fetched with ranged requests over downloadConnections
+        connections, reporting progress.
+        With the selectiveZipExtraction setting, zip assets holding USD layers only get the layers and the files they
+        reference extracted.
         """
         ret_value = {"url": None}
         if asset and asset.download_url:
             file_name = asset.download_url.split("/")[-1]
             dest_url = f"{dest_url}/{file_name}"
             carb.log_info(f"Download {asset.download_url} to {dest_url}")
-            result = await omni.client.copy_async(
-                asset.download_url, dest_url, behavior=omni.client.CopyBehavior.OVERWRITE
-            )
+            if self._is_http_to_local(asset.download_url, dest_url):
+                result = await self._download_http(asset.download_url, dest_url, on_progress_fn=on_progress_fn)
+            else:
+                result = await omni.client.copy_async(
+                    asset.download_url, dest_url, behavior=omni.client.CopyBehavior.OVERWRITE
+                )
             ret_value["status"] = result
             if result != omni.client.Result.OK:
                 carb.log_error(f"Failed to download {asset.download_url} to {dest_url}")
@@ -86,53 +150,163 @@ class BaseAssetStore(Facility, abc.ABC):
                 # unzip
                 output_url = dest_url[:-4]
                 await omni.client.create_folder_async(output_url)
-                carb.log_info(f"Unzip {dest_url} to {output_url}")
-                with zipfile.ZipFile(dest_url, "r") as zip_ref:
-                    zip_ref.extractall(output_url)
-                    dest_url = output_url
+                members = None
+                if carb.settings.get_settings().get(SETTING_SELECTIVE_EXTRACTION):
+                    with self._local_step():
+                        members = await select_usd_members(dest_url)
+                if members is None:
+                    carb.log_info(f"Unzip {dest_url} to {output_url}")
+                else:
+                    carb.log_info(f"Unzip {len(members)} USD layers and dependencies of {dest_url} to {output_url}")
+                with self._local_step():
+                    await extract_zip(dest_url, output_url, members=members, on_progress_fn=on_progress_fn)
+                dest_url = output_url
             ret_value["url"] = dest_url
         return ret_value
 
+    @staticmethod
+    @contextmanager
+    def _local_step() -> Iterator[None]:
+        """
+        Suspend the stall window of the supervised download while a local step reporting little or no progress
+        runs, like archive extraction. The step is still given up after the download timeout without progress.
+        """
+        supervision: Optional[_DownloadSupervision] = _download_supervision.get()
+        if supervision is None:
+            yield
+            return
+        supervision.local_step_started_at = monotonic()
+        try:
+            yield
+        finally:
+            supervision.local_step_started_at = None
+            supervision.heartbeat()
+
+    @staticmethod
+    def _is_http_to_local(url: str, dest_url: str) -> bool:
+        if not url.lower().startswith(("http://", "https://")):
+            return False
+        scheme = omni.client.break_url(dest_url).scheme
+        # Windows drive letters look like one letter schemes
+        return not scheme or len(scheme) == 1
+
+    async def _download_http(
+        self, url: str, dest_path: str, on_progress_fn: Callable[[float], None] = None
+    ) -> omni.client.Result:
+        """Download an HTTP resource into a local file, replacing it, with concurrent ranged requests."""
+        settings = carb.settings.get_settings()
+        connections = settings.get(SETTING_DOWNLOAD_CONNECTIONS) or 1
+        segment_size_mb = settings.get(SETTING_DOWNLOAD_SEGMENT_SIZE) or 8
+        if os.path.exists(dest_path):
+            # A previous file would be resumed rather than replaced
+            os.remove(dest_path)
+        try:
+            await download_file(
+                url,
+                dest_path,
+                on_progress_fn=on_progress_fn,
+                connections=connections,
+                segment_size=segment_size_mb * 1024 * 1024,
+            )
+        except TransferError as e:
+            carb.log_error(str(e))
+            return omni.client.Result.ERROR
+        return omni.client.Result.OK
+
     async def download(
-        self, asset: AssetModel, dest_url: str, on_progress_fn: Callable[[float], None] = None, timeout: int = 600
+        self,
+        asset: AssetModel,
+        dest_url: str,
+        on_progress_fn: Callable[[float], None] = None,
+        timeout: int = 600,
+        stall_timeout: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
     ) -> Dict:
         """Downloads an asset from the asset store.
 
+        The download is supervised: every progress report of `_download` is a heartbeat, checked every
+        `heartbeat_interval` seconds. Once a first heartbeat arrived, a download without any for `stall_timeout`
+        seconds is cancelled as stalled. Before it, `timeout` applies, so stores which report no progress are only
+        given up after `timeout`. `timeout` also applies to the local steps `_download` runs in `_local_step`, like
+        archive extraction.
+
         Args:
             asset (AssetModel): The asset descriptor.
             dest_url (str): Url of the destination file.
 
         Kwargs:
-            timeout (int): Timeout a download after this amount of time. (default: 10 mins.)
+            timeout (int): Timeout a download reporting no progress at all after this amount of time.
+                (default: 10 mins.)
+            stall_timeout (float): Stall window in seconds. Defaults to the downloadStallTimeout setting.
+            heartbeat_interval (float): Seconds between heartbeat checks. Defaults to the downloadHeartbeatInterval
+                setting.
 
         Returns:
-            Response Dict.
-
-        Raises:
-            asyncio.TimeoutError
+            Response Dict. "outcome" is a DownloadOutcome value, "status" is ERROR_ACCESS_LOST for a stalled download
+            and ERROR for a failed or cancelled one.
 
         """
-        self._download_progress[asset.identifier] = 0
+        settings = carb.settings.get_settings()
+        if stall_timeout is None:
+            stall_timeout = settings.get(SETTING_DOWNLOAD_STALL_TIMEOUT) or DEFAULT_DOWNLOAD_STALL_TIMEOUT
+        if heartbeat_interval is None:
+            heartbeat_interval = (
+                settings.get(SETTING_DOWNLOAD_HEARTBEAT_INTERVAL) or DEFAULT_DOWNLOAD_HEARTBEAT_INTERVAL
+            )
+        stall_timeout = min(stall_timeout, timeout)
+
+        download_id = next(self._download_ids)
+        self._download_progress[download_id] = 0
+        supervision = _DownloadSupervision()
 
         def __on_download_progress(progress):
-            self._download_progress[asset.identifier] = progress
+            supervision.heartbeat()
+            self._download_progress[download_id] = progress
             if on_progress_fn:
                 on_progress_fn(progress)
 
-        download_future = asyncio.Task(self._download(asset, dest_url, on_progress_fn=__on_download_progress))
-        while True:
-            last_progress = self._download_progress[asset.identifier]
-            done, pending = await asyncio.wait([download_future], timeout=timeout)
-            if done:
-                return download_future.result()
-            else:
-                # download not completed
-                # if progress changed, continue to wait for completed
-                # otherwwise, treat as timeout
-                if self._download_progress[asset.identifier] == last_progress:
-                    carb.log_warn(f"[{asset.name}]: download timeout")
+        # The download task runs in a copy of the current context, holding its supervision
+        token = _download_supervision.set(supervision)
+        try:
+            download_future = asyncio.ensure_future(
+                self._download(asset, dest_url, on_progress_fn=__on_download_progress)
+            )
+        finally:
+            _download_supervision.reset(token)
+        try:
+            while True:
+                done, _ = await asyncio.wait([download_future], timeout=heartbeat_interval)
+                if done:
+                    break
+                (silent_for, window) = supervision.get_silence(timeout, stall_timeout)
+                if silent_for >= window:
+                    carb.log_warn(
+                        f"[{asset.name}]: download stalled, no progress for {silent_for:.1f}s "
+                        f"at {self._download_progress[download_id]:.0%}"
+                    )
                     download_future.cancel()
-                    return {"status": omni.client.Result.ERROR_ACCESS_LOST}
+                    await asyncio.wait([download_future])
+                    return {
+                        "url": None,
+                        "status": omni.client.Result.ERROR_ACCESS_LOST,
+                        "outcome": DownloadOutcome.STALLED.value,
+                    }
+        except asyncio.CancelledError:
+            download_future.cancel()
+            raise
+        finally:
+            self._download_progress.pop(download_id, None)
+
+        if download_future.cancelled():
+            carb.log_warn(f"[{asset.name}]: download cancelled")
+            return {"url": None, "status": omni.client.Result.ERROR, "outcome": DownloadOutcome.CANCELLED.value}
+        if download_future.exception() is not None:
+            carb.log_error(f"[{asset.name}]: download failed: {download_future.exception()}")
+            return {"url": None, "status": omni.client.Result.ERROR, "outcome": DownloadOutcome.FAILED.value}
+        result = download_future.result()
+        completed = result.get("status", omni.client.Result.OK) == omni.client.Result.OK and result.get("url")
+        result.setdefault("outcome", (DownloadOutcome.COMPLETED if completed else DownloadOutcome.FAILED).value)
+        return result
 
     def categories(self) -> Dict[str, List[str]]:
         """Return the list of predefined categories."""
@@ -151,6 +325,91 @@ class BaseAssetStore(Facility, abc.ABC):
         pass
 
 
+def get_sort_key(value: Any) -> Any:
+    """
+    Key an asset field is sorted by, in stores as in merged searches: text ignores case.
+    Args:
+        value (Any): Value of the sort field.
+    Return:
+        Value to compare.
+    """
+    return value.casefold() if isinstance(value, str) else value
+
+
+class _MergeKey:
+    """Sort key of an asset in a merged search, missing values last whatever the direction"""
+
+    __slots__ = ("value", "reverse")
+
+    def __init__(self, value: Any, reverse: bool):
+        self.value = get_sort_key(value)
+        self.reverse = reverse
+
+    def __eq__(self, other: "_MergeKey") -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: "_MergeKey") -> bool:
+        if self.value is None or other.value is None:
+            return self.value is not None and other.value is None
+        if self.value == other.value:
+            return False
+        try:
+            return self.value > other.value if self.reverse else self.value < other.value
+        except TypeError:
+            # Stores disagree on the type of the field, e.g. timestamps and dates: compare as text
+            (value, other_value) = (str(self.value), str(other.value))
+            return value > other_value if self.reverse else value < other_value
+
+
+class _StoreCursor:
+    """
+    Position of one store in a merged search: the page to fetch and how many of its results were already returned.
+    Stores ignoring pagination, returning everything at once without more, are followed by offset alone.
+    """
+
+    def __init__(self, name: str, store: BaseAssetStore, page: int = 1, offset: int = 0):
+        self.name = name
+        self._store = store
+        self.page = page
+        self.offset = offset
+        self._buffer: Deque[AssetModel] = deque()
+        self._more = True
+
+    @property
+    def head(self) -> Optional[AssetModel]:
+        return self._buffer[0] if self._buffer else None
+
+    @property
+    def exhausted(self) -> bool:
+        return not self._buffer and not self._more
+
+    async def fill(self, search_criteria: SearchCriteria, page_size: int, search_timeout: int) -> None:
+        """Fetch pages until a result is buffered or the store has no more"""
+        while not self._buffer and self._more:
+            criteria = search_criteria.copy(deep=True)
+            criteria.page = _Page(number=self.page, size=page_size)
+            try:
+                (assets, more) = await self._store.search(search_criteria=criteria, search_timeout=search_timeout)
+            except Exception:
+                carb.log_warn(f"Failed to fetch page {self.page} of store {self.name}, leaving it out. Reason:")
+                carb.log_warn(traceback.format_exc())
+                self._more = False
+                return
+            self._buffer = deque(assets[self.offset:])
+            self._more = bool(more and assets)
+            if not self._buffer and self._more:
+                self.page += 1
+                self.offset = 0
+
+    def pop(self) -> AssetModel:
+        asset = self._buffer.popleft()
+        self.offset += 1
+        if not self._buffer and self._more:
+            self.page += 1
+            self.offset = 0
+        return asset
+
+
 class AssetStoreGroupFacility(Facility):
     def __init__(self):
         self._stores: Dict[str, BaseAssetStore] = {}
@@ -221,3 +480,88 @@ class AssetStoreGroupFacility(Facility):
                 carb.log_warn(traceback.format_exc())
 
         return results
+
+    async def search_merged(
+        self,
+        search_criteria: SearchCriteria,
+        stores: List[str] = None,
+        search_timeout: int = 60,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[AssetModel], Optional[str]]:
+        """Search several stores as one listing, ordered by search_criteria.sort across stores and pages.
+
+        Each store is followed by its own cursor over its sorted pages, a page is a k-way merge of the cursors heads.
+        Without sort, stores are listed one after the other.
+
+        Args:
+            search_criteria (SearchCriteria): Search, its page size is the size of merged pages. Its page number is
+                ignored, pages follow the cursor.
+            stores (List[str]): Stores to search. All registered stores if None.
+            search_timeout (int): Timeout of each store search in seconds.
+            cursor (str): Cursor returned with the previous page. None for the first page.
+
+        Returns:
+            Page of assets and the cursor of the next page, None once every store is exhausted.
+
+        Raises:
+            ValueError if the cursor is invalid.
+
+        """
+        if cursor:
+            positions = self._decode_cursor(cursor)
+        else:
+            positions = {name: (1, 0) for name in stores or self.get_registered_stores()}
+        cursors = [
+            _StoreCursor(name, self._stores[name], page, offset)
+            for name, (page, offset) in positions.items()
+            if name in self._stores
+        ]
+        page_size = search_criteria.page.size
+        if search_criteria.sort:
+            (field, order) = search_criteria.sort
+            reverse = order == "desc"
+        else:
+            (field, reverse) = (None, False)
+        if field in ("date", "created_at"):
+            field = "published_at"
+
+        def __push(heap: List, index: int, cursor: _StoreCursor, sequence: int) -> None:
+            key = _MergeKey(getattr(cursor.head, field, None) if field else None, reverse)
+            # Ties keep the order of stores, then the order within a store
+            heapq.heappush(heap, (key, index, sequence))
+
+        await asyncio.gather(*[cursor.fill(search_criteria, page_size, search_timeout) for cursor in cursors])
+        heap: List[Tuple[_MergeKey, int, int]] = []
+        for index, store_cursor in enumerate(cursors):
+            if store_cursor.head is not None:
+                __push(heap, index, store_cursor, 0)
+
+        assets: List[AssetModel] = []
+        while heap and len(assets) < page_size:
+            (_, index, sequence) = heapq.heappop(heap)
+            store_cursor = cursors[index]
+            assets.append(store_cursor.pop())
+            if len(assets) < page_size:
+                await store_cursor.fill(search_criteria, page_size, search_timeout)
+            if store_cursor.head is not None:
+                __push(heap, index, store_cursor, sequence + 1)
+
+        positions = {
+            store_cursor.name: (store_cursor.page, store_cursor.offset)
+            for store_cursor in cursors
+            if not store_cursor.exhausted
+        }
+        return (assets, self._encode_cursor(positions) if positions else None)
+
+    @staticmethod
+    def _encode_cursor(positions: Dict[str, Tuple[int, int]]) -> str:
+        data = json.dumps({name: list(position) for name, position in positions.items()}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Dict[str, Tuple[int, int]]:
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+            return {str(name): (int(page), int(offset)) for name, (page, offset) in data.items()}
+        except (ValueError, TypeError, AttributeError, UnicodeError) as e:
+            raise ValueError(f"Invalid search cursor: {e}") from e
@@ -11,7 +11,7 @@
 from typing import List, Tuple
 
 from ...models import AssetModel, SearchCriteria
-from ..base import BaseAssetStore
+from ..base import BaseAssetStore, get_sort_key
 
 
 class StaticAssetStore(BaseAssetStore):
@@ -42,7 +42,7 @@ class StaticAssetStore(BaseAssetStore):
             reverse = True if order == "desc" else False
             if key == "created_at":
                 key = "published_at"
-            selected = sorted(selected, key=lambda item: getattr(item, key), reverse=reverse)
+            selected = sorted(selected, key=lambda item: get_sort_key(getattr(item, key)), reverse=reverse)
 
         start_index = 0
         end_index = page.size
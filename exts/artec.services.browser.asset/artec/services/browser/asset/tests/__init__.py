@@ -7,3 +7,7 @@
 # license agreement from NVIDIA CORPORATION is strictly prohibited
 
 from .test_service import *
+from .test_archive import *
+from .test_download import *
+from .test_transfer import *
+from .test_merged_search import *
@@ -0,0 +1,99 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import os
+import tempfile
+import zipfile
+
+import omni.kit.test
+
+from ..archive import extract_zip, select_usd_members
+
+
+class TestExtractZip(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._zip_path = os.path.join(self._tmp_dir.name, "asset.zip")
+        with zipfile.ZipFile(self._zip_path, "w") as archive:
+            archive.writestr("asset/model.usda", "#usda 1.0\n")
+            for index in range(8):
+                archive.writestr(f"asset/textures/texture_{index}.png", os.urandom(1024 * (index + 1)))
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    async def test_extract_all(self):
+        output_path = os.path.join(self._tmp_dir.name, "out")
+        progress = []
+
+        extracted = await extract_zip(self._zip_path, output_path, on_progress_fn=progress.append, max_workers=3)
+
+        self.assertEqual(len(extracted), 9)
+        self.assertTrue(os.path.exists(os.path.join(output_path, "asset", "model.usda")))
+        self.assertTrue(os.path.exists(os.path.join(output_path, "asset", "textures", "texture_7.png")))
+        self.assertEqual(progress[-1], 1)
+
+    async def test_extract_members(self):
+        output_path = os.path.join(self._tmp_dir.name, "out")
+
+        extracted = await extract_zip(self._zip_path, output_path, members=["asset/model.usda"])
+
+        self.assertEqual(extracted, ["asset/model.usda"])
+        self.assertFalse(os.path.exists(os.path.join(output_path, "asset", "textures")))
+
+    async def test_select_usd_members(self):
+        zip_path = os.path.join(self._tmp_dir.name, "vendor.zip")
+        with zipfile.ZipFile(zip_path, "w") as archive:
+            archive.writestr(
+                "asset/model.usda",
+                '#usda 1.0\n(\n    subLayers = [@./layers/look.usda@]\n)\n'
+                'def "Model" (references = @parts/part.usda@</Part>) {}\n',
+            )
+            archive.writestr(
+                "asset/layers/look.usda",
+                '#usda 1.0\nasset inputs:file = @../textures/albedo.<UDIM>.png@\n'
+                'asset info:mdl:sourceAsset = @../materials/scan.mdl@\n'
+                'asset inputs:missing = @../textures/missing.png@\nasset inputs:remote = @omniverse://host/a.png@\n',
+            )
+            archive.writestr("asset/parts/part.usda", "#usda 1.0\n")
+            archive.writestr("asset/materials/scan.mdl", 'texture_2d("../textures/normal.png", ::tex::gamma_linear)\n')
+            for name in ("albedo.1001.png", "albedo.1002.png", "normal.png", "unused.png"):
+                archive.writestr(f"asset/textures/{name}", os.urandom(64))
+            archive.writestr("source/scan.obj", os.urandom(1024))
+            archive.writestr("previews/preview.jpg", os.urandom(1024))
+
+        members = await select_usd_members(zip_path)
+
+        self.assertEqual(
+            members,
+            [
+                "asset/layers/look.usda",
+                "asset/materials/scan.mdl",
+                "asset/model.usda",
+                "asset/parts/part.usda",
+                "asset/textures/albedo.1001.png",
+                "asset/textures/albedo.1002.png",
+                "asset/textures/normal.png",
+            ],
+        )
+        output_path = os.path.join(self._tmp_dir.name, "out")
+        await extract_zip(zip_path, output_path, members=members)
+        self.assertTrue(os.path.exists(os.path.join(output_path, "asset", "textures", "normal.png")))
+        self.assertFalse(os.path.exists(os.path.join(output_path, "source")))
+
+    async def test_select_usd_members_falls_back(self):
+        # No USD layer: everything is extracted
+        zip_path = os.path.join(self._tmp_dir.name, "obj.zip")
+        with zipfile.ZipFile(zip_path, "w") as archive:
+            archive.writestr("scan/scan.obj", "v 0 0 0\n")
+        self.assertIsNone(await select_usd_members(zip_path))
+
+        # Binary layer whose dependencies cannot be read
+        with zipfile.ZipFile(zip_path, "w") as archive:
+            archive.writestr("scan/scan.usdc", b"PXR-USDC" + os.urandom(64))
+        self.assertIsNone(await select_usd_members(zip_path))
@@ -0,0 +1,176 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+from typing import Callable, Dict, List, Tuple
+
+import omni.client
+import omni.kit.test
+
+from ..models import AssetModel, SearchCriteria
+from ..store.base import BaseAssetStore, DownloadOutcome
+
+# Short supervision windows keep the tests fast
+STALL_TIMEOUT = 0.3
+HEARTBEAT_INTERVAL = 0.05
+
+
+class _ScriptedStore(BaseAssetStore):
+    """Store whose _download reports progress every `interval` seconds `steps` times, then hangs or ends."""
+
+    def __init__(
+        self,
+        steps: int,
+        interval: float,
+        hang: bool = False,
+        error: bool = False,
+        cancel: bool = False,
+        local_step: float = 0.0,
+    ):
+        super().__init__("SCRIPTED")
+        self._steps = steps
+        self._interval = interval
+        self._local_step_duration = local_step
+        self._hang = hang
+        self._error = error
+        self._cancel = cancel
+        self.cancelled = False
+
+    async def _search(self, search_criteria: SearchCriteria) -> Tuple[List[AssetModel], bool]:
+        return ([], False)
+
+    async def _download(self, asset: AssetModel, dest_url: str, on_progress_fn: Callable[[float], None] = None) -> Dict:
+        try:
+            for step in range(self._steps):
+                await asyncio.sleep(self._interval)
+                on_progress_fn((step + 1) / self._steps)
+            if self._local_step_duration:
+                # Like extraction after the transfer: no progress reported
+                with self._local_step():
+                    await asyncio.sleep(self._local_step_duration)
+            if self._hang:
+                await asyncio.sleep(3600)
+            if self._error:
+                raise RuntimeError("connection reset")
+            if self._cancel:
+                asyncio.current_task().cancel()
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"url": f"{dest_url}/{asset.name}", "status": omni.client.Result.OK}
+
+
+class TestDownloadSupervision(omni.kit.test.AsyncTestCase):
+    def _asset(self) -> AssetModel:
+        return AssetModel(
+            identifier="scan-1",
+            name="scan-1",
+            version="",
+            published_at="",
+            categories=[],
+            tags=[],
+            vendor="SCRIPTED",
+            download_url="https://acme.org/downloads/scan-1.zip",
+            product_url="",
+            price=0.0,
+            thumbnail="",
+            user="",
+            fusions=[],
+        )
+
+    async def _download(self, store: BaseAssetStore, timeout: int = 600) -> Dict:
+        return await store.download(
+            self._asset(), "/tmp", timeout=timeout, stall_timeout=STALL_TIMEOUT, heartbeat_interval=HEARTBEAT_INTERVAL
+        )
+
+    async def test_slow_download_with_heartbeats_completes(self):
+        # Takes longer than the stall window, but never goes silent for that long
+        store = _ScriptedStore(steps=10, interval=STALL_TIMEOUT / 3)
+        progress = []
+        result = await store.download(
+            self._asset(),
+            "/tmp",
+            on_progress_fn=progress.append,
+            stall_timeout=STALL_TIMEOUT,
+            heartbeat_interval=HEARTBEAT_INTERVAL,
+        )
+
+        self.assertEqual(result["status"], omni.client.Result.OK)
+        self.assertEqual(result["outcome"], DownloadOutcome.COMPLETED.value)
+        self.assertEqual(len(progress), 10)
+        self.assertEqual(store._download_progress, {})
+
+    async def test_stalled_download_is_cancelled(self):
+        store = _ScriptedStore(steps=2, interval=0.01, hang=True)
+        loop = asyncio.get_event_loop()
+        started_at = loop.time()
+        result = await self._download(store)
+
+        self.assertEqual(result["status"], omni.client.Result.ERROR_ACCESS_LOST)
+        self.assertEqual(result["outcome"], DownloadOutcome.STALLED.value)
+        # Caught within the stall window and one heartbeat, not after the 600s timeout
+        self.assertLess(loop.time() - started_at, STALL_TIMEOUT + 10 * HEARTBEAT_INTERVAL)
+        self.assertTrue(store.cancelled)
+        self.assertEqual(store._download_progress, {})
+
+    async def test_silent_download_waits_for_timeout(self):
+        # No progress report at all: the stall window does not apply, timeout does
+        store = _ScriptedStore(steps=0, interval=0.0, hang=True)
+        loop = asyncio.get_event_loop()
+        started_at = loop.time()
+        result = await self._download(store, timeout=1)
+
+        self.assertEqual(result["outcome"], DownloadOutcome.STALLED.value)
+        self.assertGreaterEqual(loop.time() - started_at, 1)
+
+    async def test_slow_local_step_completes(self):
+        # Silent for longer than the stall window after the transfer reported progress
+        store = _ScriptedStore(steps=2, interval=0.01, local_step=STALL_TIMEOUT * 3)
+        result = await self._download(store)
+
+        self.assertEqual(result["status"], omni.client.Result.OK)
+        self.assertEqual(result["outcome"], DownloadOutcome.COMPLETED.value)
+
+    async def test_local_step_waits_for_timeout(self):
+        store = _ScriptedStore(steps=2, interval=0.01, local_step=3600)
+        loop = asyncio.get_event_loop()
+        started_at = loop.time()
+        result = await self._download(store, timeout=1)
+
+        self.assertEqual(result["outcome"], DownloadOutcome.STALLED.value)
+        self.assertGreaterEqual(loop.time() - started_at, 1)
+        self.assertTrue(store.cancelled)
+
+    async def test_failed_download(self):
+        store = _ScriptedStore(steps=1, interval=0.01, error=True)
+        result = await self._download(store)
+
+        self.assertEqual(result["status"], omni.client.Result.ERROR)
+        self.assertEqual(result["outcome"], DownloadOutcome.FAILED.value)
+        self.assertEqual(store._download_progress, {})
+
+    async def test_cancelled_download(self):
+        store = _ScriptedStore(steps=1, interval=0.01, cancel=True)
+        result = await self._download(store)
+
+        self.assertEqual(result["status"], omni.client.Result.ERROR)
+        self.assertEqual(result["outcome"], DownloadOutcome.CANCELLED.value)
+        self.assertEqual(store._download_progress, {})
+
+    async def test_caller_cancellation_cancels_download(self):
+        store = _ScriptedStore(steps=1, interval=0.01, hang=True)
+        task = asyncio.ensure_future(self._download(store))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+
+        self.assertTrue(store.cancelled)
+        self.assertEqual(store._download_progress, {})
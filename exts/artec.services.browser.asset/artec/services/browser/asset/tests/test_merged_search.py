@@ -0,0 +1,116 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+from typing import List, Tuple
+
+import omni.kit.test
+
+from ..models import AssetModel, SearchCriteria, _Page
+from ..store.base import AssetStoreGroupFacility, BaseAssetStore, _MergeKey, get_sort_key
+
+
+class _SortedStore(BaseAssetStore):
+    """Store of the given names, sorted by name. Pages are sliced unless `paginate` is False."""
+
+    def __init__(self, store_id: str, names: List[str], paginate: bool = True):
+        super().__init__(store_id)
+        self._names = names
+        self._paginate = paginate
+        self.pages: List[int] = []
+
+    async def _search(self, search_criteria: SearchCriteria) -> Tuple[List[AssetModel], bool]:
+        self.pages.append(search_criteria.page.number)
+        names = sorted(self._names, key=get_sort_key, reverse=search_criteria.sort[1] == "desc")
+        assets = [self._asset(name) for name in names]
+        if not self._paginate:
+            return (assets, False)
+        size = search_criteria.page.size
+        start = (search_criteria.page.number - 1) * size
+        return (assets[start:start + size], start + size < len(assets))
+
+    def _asset(self, name: str) -> AssetModel:
+        return AssetModel(
+            identifier=name,
+            name=name,
+            version="",
+            published_at="",
+            categories=[],
+            tags=[],
+            vendor=self.id(),
+            download_url="",
+            product_url="",
+            price=0.0,
+            thumbnail="",
+            user="",
+            fusions=[],
+        )
+
+
+class TestMergedSearch(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._asset_store_group = AssetStoreGroupFacility()
+        self._asset_store_group.clear_stores()
+
+    async def _search_all(self, order: str = "asc", page_size: int = 3) -> List[List[str]]:
+        search_criteria = SearchCriteria(page=_Page(size=page_size), sort=("name", order))
+        pages = []
+        cursor = None
+        while True:
+            (assets, cursor) = await self._asset_store_group.search_merged(search_criteria, cursor=cursor)
+            pages.append([asset.name for asset in assets])
+            if cursor is None:
+                return pages
+
+    async def test_pages_are_ordered_across_stores(self):
+        first = _SortedStore("FIRST", ["a", "c", "e", "g", "i"])
+        second = _SortedStore("SECOND", ["b", "d", "f", "h"])
+        self._asset_store_group.register_store("FIRST", first)
+        self._asset_store_group.register_store("SECOND", second)
+
+        pages = await self._search_all()
+
+        self.assertEqual(pages, [["a", "b", "c"], ["d", "e", "f"], ["g", "h", "i"]])
+        # Only the store pages a merged page is drawn from are fetched, never a whole extra page per store
+        self.assertEqual(first.pages, [1, 1, 2, 2])
+        self.assertEqual(second.pages, [1, 1, 2])
+
+    async def test_descending_order(self):
+        self._asset_store_group.register_store("FIRST", _SortedStore("FIRST", ["a", "d", "e"]))
+        self._asset_store_group.register_store("SECOND", _SortedStore("SECOND", ["b", "c"]))
+
+        pages = await self._search_all(order="desc", page_size=2)
+
+        self.assertEqual(pages, [["e", "d"], ["c", "b"], ["a"]])
+
+    async def test_names_ignore_case(self):
+        self._asset_store_group.register_store("FIRST", _SortedStore("FIRST", ["apple", "Banana", "cherry"]))
+        self._asset_store_group.register_store("SECOND", _SortedStore("SECOND", ["Avocado", "blueberry"]))
+
+        pages = await self._search_all(page_size=5)
+
+        self.assertEqual(pages, [["apple", "Avocado", "Banana", "blueberry", "cherry"]])
+
+    async def test_store_without_pagination(self):
+        # Returns all of its assets on every page, followed by offset alone
+        self._asset_store_group.register_store("PAGED", _SortedStore("PAGED", ["b", "e"]))
+        self._asset_store_group.register_store("ALL", _SortedStore("ALL", ["a", "c", "d", "f"], paginate=False))
+
+        pages = await self._search_all(page_size=4)
+
+        self.assertEqual(pages, [["a", "b", "c", "d"], ["e", "f"]])
+
+    async def test_invalid_cursor(self):
+        self._asset_store_group.register_store("FIRST", _SortedStore("FIRST", ["a"]))
+
+        with self.assertRaises(ValueError):
+            await self._asset_store_group.search_merged(SearchCriteria(), cursor="not a cursor")
+
+    async def test_keys_of_mixed_types(self):
+        keys = [_MergeKey(value, reverse=False) for value in ("2021-01-01", 1600000000.0, None, 2)]
+
+        self.assertEqual([key.value for key in sorted(keys)], [2, 1600000000.0, "2021-01-01", None])
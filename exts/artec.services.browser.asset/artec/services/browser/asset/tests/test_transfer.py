@@ -0,0 +1,261 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+import omni.kit.test
+from aiohttp import web
+
+from ..transfer import download_file, TransferError, VALIDATORS_SUFFIX
+
+SEGMENT_SIZE = 64 * 1024
+
+
+class TestRangedDownload(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._source_path = os.path.join(self._tmp_dir.name, "archive.zip")
+        self._data = os.urandom(SEGMENT_SIZE * 5 + 123)
+        with open(self._source_path, "wb") as file:
+            file.write(self._data)
+        self._ranges: List[Optional[str]] = []
+        self._fail_segment_once: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    async def tearDown(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+        self._tmp_dir.cleanup()
+
+    async def _serve(self, ranges: bool = True) -> str:
+        async def __on_file(request: web.Request) -> web.StreamResponse:
+            range_header = request.headers.get("Range")
+            self._ranges.append(range_header)
+            if range_header and range_header == self._fail_segment_once:
+                # Drop the connection half way through the segment
+                self._fail_segment_once = None
+                response = web.StreamResponse(status=206)
+                (start, end) = (int(value) for value in range_header[len("bytes="):].split("-"))
+                response.headers["Content-Range"] = f"bytes {start}-{end}/{len(self._data)}"
+                response.content_length = end - start + 1
+                await response.prepare(request)
+                await response.write(self._data[start:start + (end - start) // 2])
+                request.transport.close()
+                return response
+            if not ranges:
+                return web.Response(body=self._data)
+            return web.FileResponse(self._source_path)
+
+        app = web.Application()
+        app.router.add_get("/archive.zip", __on_file)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{self._runner.addresses[0][1]}/archive.zip"
+
+    async def test_ranged_download(self):
+        url = await self._serve()
+        dest_path = os.path.join(self._tmp_dir.name, "download.zip")
+        progress = []
+
+        size = await download_file(
+            url,
+            dest_path,
+            on_progress_fn=progress.append,
+            expected_md5=hashlib.md5(self._data).hexdigest(),
+            connections=4,
+            segment_size=SEGMENT_SIZE,
+        )
+
+        self.assertEqual(size, len(self._data))
+        with open(dest_path, "rb") as file:
+            self.assertEqual(file.read(), self._data)
+        # Range probe, then one request per segment
+        self.assertEqual(self._ranges[0], "bytes=0-0")
+        self.assertEqual(len(self._ranges), 5)
+        self.assertEqual(progress[-1], 1)
+
+    async def test_segment_resumes(self):
+        url = await self._serve()
+        dest_path = os.path.join(self._tmp_dir.name, "download.zip")
+        # Second of four segments
+        (start, end) = (len(self._data) // 4, 2 * len(self._data) // 4)
+        self._fail_segment_once = f"bytes={start}-{end - 1}"
+
+        await download_file(url, dest_path, connections=4, segment_size=SEGMENT_SIZE, retry_delay=0.01)
+
+        with open(dest_path, "rb") as file:
+            self.assertEqual(file.read(), self._data)
+        # Only the interrupted segment was requested again, from its last written byte
+        retried = [value for value in self._ranges[1:] if value and value.endswith(f"-{end - 1}")]
+        self.assertEqual(len(retried), 2)
+        self.assertEqual(len(self._ranges), 6)
+
+    async def test_small_file_uses_one_connection(self):
+        url = await self._serve()
+        dest_path = os.path.join(self._tmp_dir.name, "download.zip")
+
+        await download_file(url, dest_path, connections=4, segment_size=len(self._data))
+
+        with open(dest_path, "rb") as file:
+            self.assertEqual(file.read(), self._data)
+        self.assertEqual(self._ranges, ["bytes=0-0", None])
+
+    async def test_server_without_ranges(self):
+        url = await self._serve(ranges=False)
+        dest_path = os.path.join(self._tmp_dir.name, "download.zip")
+
+        await download_file(url, dest_path, connections=4, segment_size=SEGMENT_SIZE)
+
+        with open(dest_path, "rb") as file:
+            self.assertEqual(file.read(), self._data)
+
+    async def test_checksum_mismatch_removes_file(self):
+        url = await self._serve()
+        dest_path = os.path.join(self._tmp_dir.name, "download.zip")
+
+        with self.assertRaises(TransferError):
+            await download_file(
+                url, dest_path, expected_md5="0" * 32, connections=4, segment_size=SEGMENT_SIZE
+            )
+        self.assertFalse(os.path.exists(dest_path))
+
+
+class TestResumedDownload(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._dest_path = os.path.join(self._tmp_dir.name, "download.zip")
+        self._data = os.urandom(256 * 1024 + 123)
+        self._etag = '"v1"'
+        self._requests: List[Dict[str, str]] = []
+        self._drop_once_at: Optional[int] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._url = await self._serve()
+
+    async def tearDown(self):
+        await self._runner.cleanup()
+        self._tmp_dir.cleanup()
+
+    async def _serve(self) -> str:
+        async def __on_file(request: web.Request) -> web.StreamResponse:
+            self._requests.append(dict(request.headers))
+            size = len(self._data)
+            start = 0
+            range_header = request.headers.get("Range")
+            if range_header and request.headers.get("If-Range", self._etag) == self._etag:
+                start = int(range_header[len("bytes="):].rstrip("-"))
+            if start >= size:
+                return web.Response(status=416, headers={"Content-Range": f"bytes */{size}"})
+            response = web.StreamResponse(status=206 if start else 200)
+            response.headers["ETag"] = self._etag
+            if start:
+                response.headers["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+            response.content_length = size - start
+            await response.prepare(request)
+            if self._drop_once_at is not None and start < self._drop_once_at:
+                await response.write(self._data[start:self._drop_once_at])
+                self._drop_once_at = None
+                # Let the client read what was sent before the connection drops
+                await asyncio.sleep(0.1)
+                request.transport.close()
+                return response
+            await response.write(self._data[start:])
+            return response
+
+        app = web.Application()
+        app.router.add_get("/archive.zip", __on_file)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{self._runner.addresses[0][1]}/archive.zip"
+
+    def _read(self) -> bytes:
+        with open(self._dest_path, "rb") as file:
+            return file.read()
+
+    async def _leave_partial_file(self) -> int:
+        """Download half of the file in an "earlier session" that gives up on the dropped connection"""
+        half = len(self._data) // 2
+        self._drop_once_at = half
+        with self.assertRaises(TransferError):
+            await download_file(self._url, self._dest_path, max_retries=0)
+        self.assertEqual(os.path.getsize(self._dest_path), half)
+        self.assertTrue(os.path.exists(self._dest_path + VALIDATORS_SUFFIX))
+        self._requests.clear()
+        return half
+
+    async def test_resumes_after_dropped_connection(self):
+        half = len(self._data) // 2
+        self._drop_once_at = half
+        progress = []
+
+        size = await download_file(
+            self._url,
+            self._dest_path,
+            on_progress_fn=progress.append,
+            expected_md5=hashlib.md5(self._data).hexdigest(),
+            retry_delay=0.01,
+        )
+
+        self.assertEqual(size, len(self._data))
+        self.assertEqual(self._read(), self._data)
+        self.assertEqual([headers.get("Range") for headers in self._requests], [None, f"bytes={half}-"])
+        self.assertEqual(self._requests[1]["If-Range"], self._etag)
+        self.assertEqual(progress[-1], 1)
+        self.assertFalse(os.path.exists(self._dest_path + VALIDATORS_SUFFIX))
+
+    async def test_partial_file_of_earlier_session_is_resumed(self):
+        half = await self._leave_partial_file()
+
+        await download_file(self._url, self._dest_path, expected_md5=hashlib.md5(self._data).hexdigest())
+
+        self.assertEqual(self._read(), self._data)
+        self.assertEqual(len(self._requests), 1)
+        self.assertEqual(self._requests[0]["Range"], f"bytes={half}-")
+        self.assertEqual(self._requests[0]["If-Range"], self._etag)
+
+    async def test_changed_resource_is_downloaded_again(self):
+        await self._leave_partial_file()
+        self._data = os.urandom(len(self._data))
+        self._etag = '"v2"'
+
+        await download_file(self._url, self._dest_path, expected_md5=hashlib.md5(self._data).hexdigest())
+
+        # If-Range did not match, the whole new resource was sent
+        self.assertEqual(self._read(), self._data)
+        self.assertEqual(len(self._requests), 1)
+        self.assertIn("Range", self._requests[0])
+
+    async def test_partial_file_without_validators_is_downloaded_again(self):
+        with open(self._dest_path, "wb") as file:
+            file.write(os.urandom(1000))
+
+        await download_file(self._url, self._dest_path)
+
+        self.assertEqual(self._read(), self._data)
+        self.assertNotIn("Range", self._requests[0])
+
+    async def test_size_mismatch_removes_file(self):
+        with self.assertRaises(TransferError):
+            await download_file(self._url, self._dest_path, expected_size=len(self._data) - 1)
+
+        self.assertFalse(os.path.exists(self._dest_path))
+        self.assertFalse(os.path.exists(self._dest_path + VALIDATORS_SUFFIX))
+
+    async def test_checksum_mismatch_removes_file(self):
+        with self.assertRaises(TransferError):
+            await download_file(self._url, self._dest_path, expected_md5="0" * 32)
+
+        self.assertFalse(os.path.exists(self._dest_path))
+        self.assertFalse(os.path.exists(self._dest_path + VALIDATORS_SUFFIX))
@@ -0,0 +1,375 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import re
+from typing import Callable, Dict, Optional, Tuple
+
+import aiofiles
+import aiohttp
+import carb
+
+CHUNK_SIZE = 512 * 1024
+# Smallest part of a file fetched by its own connection in a ranged download
+SEGMENT_SIZE = 8 * 1024 * 1024
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (?:\d+-\d+|\*)/(\d+|\*)")
+# Suffix of the file keeping the validators of a partial download, next to it
+VALIDATORS_SUFFIX = ".validators"
+
+
+class TransferError(Exception):
+    """Raised when a file could not be transferred or does not pass verification."""
+    pass
+
+
+async def download_file(
+    url: str,
+    dest_path: str,
+    on_progress_fn: Optional[Callable[[float], None]] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    expected_size: Optional[int] = None,
+    expected_md5: Optional[str] = None,
+    max_retries: int = 5,
+    retry_delay: float = 1.0,
+    chunk_size: int = CHUNK_SIZE,
+    connections: int = 1,
+    segment_size: int = SEGMENT_SIZE,
+) -> int:
+    """
+    Stream an HTTP resource into a file.
+    Chunks are written straight to disk so memory use does not depend on the file size. If the connection drops,
+    the transfer resumes from the last written byte with a Range request (guarded by If-Range when the server sent
+    an ETag or a Last-Modified date). These validators are kept next to the file while it is written, so a partial
+    file left at dest_path by an earlier session is resumed as well. Without them the file is downloaded again.
+    With several connections, a resource of at least two segments served with range support is split into up to
+    `connections` segments fetched concurrently, each written in place into the preallocated file. Segments are
+    resumed on their own, but a failed ranged download is not resumable and its file is removed.
+    Args:
+        url (str): Url to download.
+        dest_path (str): Local file to write.
+        on_progress_fn (Callable): Called with the transfer progress in [0, 1].
+        session (aiohttp.ClientSession): Session to use. A new one is created if not given.
+        expected_size (int): Expected size in bytes. Defaults to the size announced by the server.
+        expected_md5 (str): Expected md5 hex digest. Defaults to the Content-MD5 header if the server sends one.
+        max_retries (int): Number of consecutive failed attempts tolerated before giving up.
+        retry_delay (float): Delay before the first retry in seconds, doubled after each failed attempt.
+        connections (int): Maximum number of concurrent connections.
+        segment_size (int): Smallest segment fetched by one connection, in bytes.
+    Return:
+        Size of the downloaded file in bytes.
+    Raises:
+        TransferError
+    """
+    if session is None:
+        async with aiohttp.ClientSession() as own_session:
+            return await download_file(
+                url,
+                dest_path,
+                on_progress_fn=on_progress_fn,
+                session=own_session,
+                expected_size=expected_size,
+                expected_md5=expected_md5,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                chunk_size=chunk_size,
+                connections=connections,
+                segment_size=segment_size,
+            )
+
+    validators = _load_validators(dest_path)
+    if not validators and os.path.exists(dest_path):
+        # Nothing tells whether the resource changed since the file was written, it cannot be resumed
+        carb.log_info(f"No validators for the partial file {dest_path}, downloading {url} again")
+        _remove(dest_path)
+
+    if connections > 1 and segment_size > 0 and not os.path.exists(dest_path):
+        (total_size, etag) = await _probe_ranges(session, url)
+        if total_size is not None and (expected_size is None or expected_size == total_size) and (
+            total_size >= 2 * segment_size
+        ):
+            return await _download_ranged(
+                session,
+                url,
+                dest_path,
+                total_size,
+                etag,
+                min(connections, math.ceil(total_size / segment_size)),
+                on_progress_fn=on_progress_fn,
+                expected_md5=expected_md5,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                chunk_size=chunk_size,
+            )
+
+    hasher = hashlib.md5()
+    downloaded = 0
+    if os.path.exists(dest_path):
+        # Resume a previous partial transfer, the hash has to cover the bytes already on disk
+        async with aiofiles.open(dest_path, "rb") as file:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                downloaded += len(chunk)
+
+    total_size = expected_size
+    failures = 0
+    while True:
+        headers = {}
+        if downloaded > 0:
+            headers["Range"] = f"bytes={downloaded}-"
+            if_range = _if_range(validators)
+            if if_range:
+                headers["If-Range"] = if_range
+        progress_before = downloaded
+        try:
+            async with session.get(url, headers=headers) as response:
+                if total_size is None:
+                    total_size = _total_from_content_range(response.headers)
+                if response.status == 416 and total_size is not None and downloaded >= total_size:
+                    # Nothing left to fetch
+                    break
+                response.raise_for_status()
+
+                mode = "ab"
+                if response.status != 206:
+                    # Server sent the whole resource, start over
+                    if downloaded > 0:
+                        carb.log_info(f"{url} does not support resuming or changed, restarting download")
+                    validators = {
+                        name: response.headers[header]
+                        for (name, header) in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                        if response.headers.get(header)
+                    }
+                    await _save_validators(dest_path, validators)
+                    mode = "wb"
+                    downloaded = 0
+                    progress_before = 0
+                    hasher = hashlib.md5()
+                    if total_size is None and response.content_length:
+                        total_size = response.content_length
+                    if expected_md5 is None:
+                        # Content-MD5 of a partial response only covers the range, trust full responses only
+                        expected_md5 = _md5_from_headers(response.headers)
+
+                if on_progress_fn:
+                    on_progress_fn(float(downloaded) / total_size if total_size else 0)
+                async with aiofiles.open(dest_path, mode) as file:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        await file.write(chunk)
+                        hasher.update(chunk)
+                        downloaded += len(chunk)
+                        if on_progress_fn and total_size:
+                            on_progress_fn(min(float(downloaded) / total_size, 1))
+            if total_size is None or downloaded >= total_size:
+                break
+            raise aiohttp.ClientPayloadError(f"Connection closed after {downloaded} of {total_size} bytes")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+            if isinstance(e, aiohttp.ClientResponseError) and e.status < 500 and e.status != 429:
+                # Client errors (expired or invalid url) will not go away by retrying
+                raise TransferError(f"Failed to download {url}: {e}") from e
+            if downloaded > progress_before:
+                # Attempt made progress, only consecutive failures count
+                failures = 0
+            failures += 1
+            if failures > max_retries:
+                raise TransferError(f"Failed to download {url}: {e}") from e
+            delay = retry_delay * 2 ** (failures - 1)
+            carb.log_warn(f"Download of {url} interrupted at {downloaded} bytes ({e}), resuming in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    _remove(dest_path + VALIDATORS_SUFFIX)
+    if total_size is not None and downloaded != total_size:
+        _remove(dest_path)
+        raise TransferError(f"Downloaded {downloaded} bytes from {url}, {total_size} expected")
+    if expected_md5 and hasher.hexdigest() != expected_md5.lower():
+        _remove(dest_path)
+        raise TransferError(f"Checksum mismatch for {url}")
+    if on_progress_fn:
+        on_progress_fn(1)
+    return downloaded
+
+
+async def _probe_ranges(session: aiohttp.ClientSession, url: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Ask for the first byte of a resource.
+    Return:
+        (total size, ETag) if the server supports range requests. Else (None, None).
+    """
+    try:
+        async with session.get(url, headers={"Range": "bytes=0-0"}) as response:
+            if response.status != 206:
+                return (None, None)
+            return (_total_from_content_range(response.headers), response.headers.get("ETag"))
+    except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError):
+        # The regular download reports the failure
+        return (None, None)
+
+
+async def _download_ranged(
+    session: aiohttp.ClientSession,
+    url: str,
+    dest_path: str,
+    total_size: int,
+    etag: Optional[str],
+    segment_count: int,
+    on_progress_fn: Optional[Callable[[float], None]] = None,
+    expected_md5: Optional[str] = None,
+    max_retries: int = 5,
+    retry_delay: float = 1.0,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """Fetch segments of a resource concurrently into a file preallocated to total_size. Return: total_size."""
+    bounds = [
+        (index * total_size // segment_count, (index + 1) * total_size // segment_count)
+        for index in range(segment_count)
+    ]
+    written = [0] * segment_count
+
+    def __on_chunk() -> None:
+        if on_progress_fn:
+            on_progress_fn(min(float(sum(written)) / total_size, 1))
+
+    async def __fetch(index: int) -> None:
+        (start, end) = bounds[index]
+        failures = 0
+        async with aiofiles.open(dest_path, "r+b") as file:
+            while True:
+                offset = start + written[index]
+                headers = {"Range": f"bytes={offset}-{end - 1}"}
+                if etag:
+                    headers["If-Range"] = etag
+                progress_before = written[index]
+                try:
+                    async with session.get(url, headers=headers) as response:
+                        response.raise_for_status()
+                        if response.status != 206:
+                            # Resource changed since the probe, or ranges are no longer honoured
+                            raise TransferError(f"{url} answered segment {index} with status {response.status}")
+                        await file.seek(offset)
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            chunk = chunk[:end - start - written[index]]
+                            await file.write(chunk)
+                            written[index] += len(chunk)
+                            __on_chunk()
+                    if start + written[index] >= end:
+                        return
+                    raise aiohttp.ClientPayloadError(
+                        f"Connection closed after {written[index]} of {end - start} bytes of segment {index}"
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                    if isinstance(e, aiohttp.ClientResponseError) and e.status < 500 and e.status != 429:
+                        raise TransferError(f"Failed to download {url}: {e}") from e
+                    if written[index] > progress_before:
+                        failures = 0
+                    failures += 1
+                    if failures > max_retries:
+                        raise TransferError(f"Failed to download {url}: {e}") from e
+                    delay = retry_delay * 2 ** (failures - 1)
+                    carb.log_warn(f"Segment {index} of {url} interrupted ({e}), resuming in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+    # Preallocate, segments are written at their offset and need no reassembly
+    async with aiofiles.open(dest_path, "wb") as file:
+        await file.truncate(total_size)
+    if on_progress_fn:
+        on_progress_fn(0)
+    tasks = [asyncio.ensure_future(__fetch(index)) for index in range(segment_count)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
+        # Holes of unfinished segments would pass for data when resuming, the file cannot be kept
+        _remove(dest_path)
+        raise
+
+    if expected_md5:
+        digest = await asyncio.get_event_loop().run_in_executor(None, _md5_of_file, dest_path)
+        if digest != expected_md5.lower():
+            _remove(dest_path)
+            raise TransferError(f"Checksum mismatch for {url}")
+    if on_progress_fn:
+        on_progress_fn(1)
+    return total_size
+
+
+def _load_validators(dest_path: str) -> Dict[str, str]:
+    """Validators kept for a partial file. Return: ETag and Last-Modified by "etag" and "last_modified", if known."""
+    validators_path = dest_path + VALIDATORS_SUFFIX
+    if not os.path.exists(dest_path):
+        # Left over from a download whose file is gone
+        _remove(validators_path)
+        return {}
+    try:
+        with open(validators_path, "r") as file:
+            validators = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return validators if isinstance(validators, dict) else {}
+
+
+async def _save_validators(dest_path: str, validators: Dict[str, str]) -> None:
+    validators_path = dest_path + VALIDATORS_SUFFIX
+    if not validators:
+        _remove(validators_path)
+        return
+    try:
+        async with aiofiles.open(validators_path, "w") as file:
+            await file.write(json.dumps(validators))
+    except OSError as e:
+        # The download goes on, it just cannot be resumed by a later session
+        carb.log_warn(f"Failed to write {validators_path}: {e}")
+
+
+def _if_range(validators: Dict[str, str]) -> Optional[str]:
+    """If-Range value for the validators. Weak ETags cannot be used for ranges, the date is used instead."""
+    etag = validators.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return validators.get("last_modified")
+
+
+def _md5_of_file(path: str) -> str:
+    hasher = hashlib.md5()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _total_from_content_range(headers) -> Optional[int]:
+    match = CONTENT_RANGE_PATTERN.match(headers.get("Content-Range", ""))
+    if match and match.group(1) != "*":
+        return int(match.group(1))
+    return None
+
+
+def _md5_from_headers(headers) -> Optional[str]:
+    content_md5 = headers.get("Content-MD5")
+    if not content_md5:
+        return None
+    try:
+        return base64.b64decode(content_md5).hex()
+    except (ValueError, TypeError):
+        return None
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass